@@ -0,0 +1,179 @@
+################################################################################
+# apps.py
+#-------------------------------------------------------------------------------
+# Benchmarks for each bundled app configuration
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import gc
+import json
+import time
+import random
+import tracemalloc
+
+from .common import CONFIG_DIR, localize_paths, load_system_config, measure, summarize_latencies
+
+# Values substituted into templated app configs by synack-restore-defaults.sh
+TEMPLATE_VALUES = {
+    "{ALIAS}": "benchmark-user",
+    "{SHOW_ALIAS}": "true",
+    "{SHOW_TIME}": "true",
+}
+
+# Joystick (z, rz) axes steering the snake up, left, down then right, round
+# a square clear of the walls of the first level
+SNAKE_ROUTE = [(0.0, -1.0), (-1.0, 0.0), (0.0, 1.0), (1.0, 0.0)]
+SNAKE_ROUTE_SIDE = 20
+
+def load_app_configs():
+    """
+    Load the bundled app configurations, by screen name
+    """
+    app_configs = []
+    apps_path = os.path.join(CONFIG_DIR, "apps")
+    for filename in sorted(os.listdir(apps_path)):
+        if filename.endswith(".json") or filename.endswith(".json.in"):
+            with open(os.path.join(apps_path, filename)) as f:
+                data = f.read()
+            for key, value in TEMPLATE_VALUES.items():
+                data = data.replace(key, value)
+            screen_name = filename.split(".")[0]
+            app_configs += [(screen_name, localize_paths(json.loads(data)))]
+    return app_configs
+
+class SnakeDriver(object):
+    """
+    Plays the snake game headlessly, with scripted joystick input, timing each
+    move of the snake in place of the game's FramePacer
+    """
+    def __init__(self, input_class, pacer_class, moves):
+        """
+        Initialize a driver extending the game's input handler and pacer
+        classes, which exits the game after a number of moves
+        """
+        self.input_class = input_class
+        self.pacer_class = pacer_class
+        self.moves = moves
+        self.move = 0
+        self.route_move = 0
+        self.move_start = None
+        self.latencies = []
+
+    def create_input(self, stop_event):
+        """
+        Create the game's input handler
+        """
+        driver = self
+        class ScriptedInput(self.input_class):
+            def axis_state(self, axis):
+                z, rz = SNAKE_ROUTE[(driver.route_move // SNAKE_ROUTE_SIDE) % len(SNAKE_ROUTE)]
+                return z if axis == "z" else rz
+
+            def button_state(self, button):
+                return button == "start" and driver.move >= driver.moves
+
+            def get_input_event(self):
+                # Carry on past each pause screen, with the snake back at its start
+                driver.route_move = 0
+                return "select"
+
+        return ScriptedInput(stop_event)
+
+    def create_pacer(self, stop_event):
+        """
+        Create the game's pacer, which times moves rather than waiting
+        """
+        driver = self
+        class TimedPacer(self.pacer_class):
+            def wait(self, period):
+                now = time.perf_counter()
+                if driver.move_start is not None:
+                    driver.latencies.append(now - driver.move_start)
+                driver.move += 1
+                driver.route_move += 1
+                driver.move_start = time.perf_counter()
+                return stop_event.is_set()
+
+        return TimedPacer(stop_event)
+
+def play_snake(create_app, moves):
+    """
+    Play the snake game for a number of moves, returning the driver
+    """
+    from led_display.apps import snake
+
+    driver = SnakeDriver(snake.InputHandler, snake.FramePacer, moves)
+    snake.InputHandler, snake.FramePacer = driver.create_input, driver.create_pacer
+    try:
+        random.seed(0)
+        create_app()
+    finally:
+        snake.InputHandler, snake.FramePacer = driver.input_class, driver.pacer_class
+    return driver
+
+def measure_snake(create_app, frames, warmup):
+    """
+    Benchmark the snake game, which runs its own loop drawing straight to the
+    matrix, as the time taken by each move of the snake
+    """
+    gc.collect()
+    latencies = play_snake(create_app, warmup + frames + 1).latencies[warmup:]
+
+    gc.collect()
+    tracemalloc.start()
+    play_snake(create_app, warmup + frames + 1)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    elapsed = sum(latencies)
+    return {
+        "frames": len(latencies),
+        "frames_drawn": len(latencies),
+        "fps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+        "peak_memory_kb": peak_memory / 1024.0,
+    }
+
+def make_benchmark(app_info):
+    def benchmark(frames, warmup):
+        config = load_system_config()
+        loaded_fonts = {}
+
+        # Imported here, as importing the apps starts the weather updater
+        from led_display import addons
+
+        def create_app():
+            app = addons.apps[app_info["app"]](config, app_info.get("config", {}), loaded_fonts, config_directory=CONFIG_DIR)
+            app.setup_display()
+            app.run()
+            return app
+
+        if app_info["app"] == "snake":
+            return measure_snake(create_app, frames, warmup)
+        return measure(create_app, frames, warmup)
+    return benchmark
+
+BENCHMARKS = [("apps/%s" % screen_name, make_benchmark(app_info)) for screen_name, app_info in load_app_configs()]
@@ -0,0 +1,161 @@
+################################################################################
+# common.py
+#-------------------------------------------------------------------------------
+# Shared helpers for running apps and controls headlessly and timing their frames
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import gc
+import json
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(REPO_DIR, "initial_install", "synack_config")
+INSTALL_DIR = "/home/pi/led-display"
+
+def localize_paths(value):
+    """
+    Point paths into the installed repo at this checkout instead
+    """
+    if isinstance(value, str):
+        return value.replace(INSTALL_DIR, REPO_DIR)
+    if isinstance(value, list):
+        return [localize_paths(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, localize_paths(item)) for key, item in value.items())
+    return value
+
+def load_system_config():
+    """
+    Load the bundled system configuration, using the virtual display backend
+    and the fonts in this checkout
+    """
+    with open(os.path.join(CONFIG_DIR, "system.json")) as f:
+        config = json.loads(f.read())
+    config["display"]["backend"] = "virtual"
+    config["fonts"]["paths"] = [os.path.join(REPO_DIR, "fonts")]
+    config["settings"]["perfStatsEnable"] = False
+    return config
+
+def percentile(sorted_samples, percent):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if len(sorted_samples) == 0:
+        return 0.0
+    index = int(round(percent / 100.0 * (len(sorted_samples) - 1)))
+    return sorted_samples[index]
+
+def run_frames(app, frames, now, full_redraw=False, latencies=None):
+    """
+    Run "frames" frames of an app's scheduler on a simulated clock starting at
+    "now", as fast as possible. With "full_redraw", every control is redrawn
+    each frame. Returns the simulated time after the last frame and the number
+    of frames drawn.
+    """
+    period = 1.0 / app.scheduler.frame_rate
+    drawn = 0
+    for i in range(frames):
+        now += period
+        if full_redraw:
+            app.invalidate_all()
+            for control in app.controls.values():
+                control.invalidate()
+        start = time.perf_counter()
+        if app.scheduler.run_frame(now):
+            drawn += 1
+        if latencies is not None:
+            latencies.append(time.perf_counter() - start)
+    return now, drawn
+
+def summarize_latencies(latencies):
+    """
+    Summarize per-frame latencies in seconds as milliseconds
+    """
+    latencies = sorted(latencies)
+    return {
+        "mean": 1000.0 * sum(latencies) / len(latencies),
+        "p50": 1000.0 * percentile(latencies, 50),
+        "p90": 1000.0 * percentile(latencies, 90),
+        "p99": 1000.0 * percentile(latencies, 99),
+        "max": 1000.0 * latencies[-1],
+    }
+
+def time_calls(function, frames=300, warmup=20):
+    """
+    Benchmark a drawing routine by timing "frames" calls of "function", after
+    "warmup" untimed calls
+    """
+    for i in range(warmup):
+        function()
+
+    latencies = []
+    for i in range(frames):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+
+    elapsed = sum(latencies)
+    return {
+        "frames": frames,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+    }
+
+def measure(create_app, frames=300, warmup=20, full_redraw=False):
+    """
+    Benchmark an app created by "create_app", which should return it with its
+    display set up and controls created. Frame latency is timed in one run,
+    and peak memory (including setup) traced in a second, as tracing slows
+    everything down.
+    """
+    gc.collect()
+    app = create_app()
+    now, drawn = run_frames(app, warmup, time.monotonic(), full_redraw)
+
+    latencies = []
+    start = time.perf_counter()
+    now, drawn = run_frames(app, frames, now, full_redraw, latencies)
+    elapsed = time.perf_counter() - start
+    app.stop()
+    app = None
+
+    gc.collect()
+    tracemalloc.start()
+    app = create_app()
+    run_frames(app, warmup + frames, time.monotonic(), full_redraw)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    app.stop()
+
+    return {
+        "frames": frames,
+        "frames_drawn": drawn,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+        "peak_memory_kb": peak_memory / 1024.0,
+    }
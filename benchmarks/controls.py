@@ -0,0 +1,117 @@
+################################################################################
+# controls.py
+#-------------------------------------------------------------------------------
+# Benchmarks for each graphical control type
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+
+from led_display.app_base import AppBase
+from .common import REPO_DIR, load_system_config, measure
+
+IMAGES_DIR = os.path.join(REPO_DIR, "images")
+
+def setup_text(app):
+    control = app.create_control("text", "text")
+    control.font = "6x9"
+    control.text = "Hello World!"
+    control.x = 32
+    control.y = 36
+    control.align = "center"
+    control.color = [255, 0, 0]
+
+def setup_text_scroll(app):
+    control = app.create_control("text", "text")
+    control.font = "6x9"
+    control.text = "The quick brown fox jumps over the lazy dog"
+    control.x = 32
+    control.y = 36
+    control.align = "center"
+    control.scroll = "auto"
+    control.color = [255, 255, 255]
+
+def setup_image(app):
+    control = app.create_control("image", "image")
+    control.filename = os.path.join(IMAGES_DIR, "srt_64.png")
+    control.width = 64
+    control.height = 64
+
+def setup_rect(app):
+    control = app.create_control("rect", "rect")
+    control.x = 8
+    control.y = 8
+    control.width = 48
+    control.height = 48
+    control.has_fill = True
+    control.fill_color = [0, 0, 255]
+    control.has_stroke = True
+    control.stroke_color = [255, 255, 255]
+
+def setup_fill(app):
+    control = app.create_control("fill", "fill")
+    control.color = [0, 255, 0]
+
+def setup_synack_load(app):
+    control = app.create_control("synack_load", "synack_load")
+    control.path = IMAGES_DIR
+    control.width = 64
+    control.height = 64
+
+CONTROLS = [
+    ("text", setup_text),
+    ("text_scroll", setup_text_scroll),
+    ("image", setup_image),
+    ("rect", setup_rect),
+    ("fill", setup_fill),
+    ("synack_load", setup_synack_load),
+]
+
+def make_app_factory(setup):
+    """
+    Create a function returning an app showing the controls from "setup"
+    """
+    config = load_system_config()
+    loaded_fonts = {}
+
+    def create_app():
+        app = AppBase(config, {}, loaded_fonts)
+        app.setup_display()
+        setup(app)
+        return app
+
+    return create_app
+
+def make_benchmark(setup, full_redraw):
+    def benchmark(frames, warmup):
+        return measure(make_app_factory(setup), frames, warmup, full_redraw)
+    return benchmark
+
+# Each control is run both as the scheduler draws it, redrawing only when it
+# changes, and forced to redraw every frame
+BENCHMARKS = []
+for name, setup in CONTROLS:
+    BENCHMARKS += [("controls/%s/incremental" % name, make_benchmark(setup, False))]
+    BENCHMARKS += [("controls/%s/full" % name, make_benchmark(setup, True))]
@@ -0,0 +1,153 @@
+################################################################################
+# decode.py
+#-------------------------------------------------------------------------------
+# Benchmarks for decoding large photos down to display size
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import time
+import resource
+import tempfile
+import multiprocessing
+
+from PIL import Image
+
+from led_display.thumbnail_cache import decode_image
+from .common import percentile
+
+# Decodes timed per benchmark, as each one is much slower than a frame
+REPEATS = 5
+
+# Photos generated to decode, as (width, height)
+PHOTO_SIZES = [
+    ("jpeg_12mp", (4000, 3000)),
+    ("jpeg_2mp", (1920, 1080)),
+]
+
+TARGET_SIZE = (64, 64)
+
+def create_photo(path, size):
+    """
+    Save a JPEG with smooth gradients and some detail, roughly like a photo
+    """
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 64)
+    image = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    image.save(path, quality=90)
+
+def full_decode(path, size):
+    """
+    Decode at full resolution before shrinking, as without draft decoding
+    """
+    image = Image.open(path)
+    image.load()
+    image.thumbnail(size, Image.BICUBIC)
+    return image.convert("RGB")
+
+DECODERS = {
+    "full": full_decode,
+    "draft": decode_image,
+}
+
+def read_memory_status(field):
+    """
+    Read a memory figure in kB for this process from /proc, such as VmRSS or
+    VmHWM (peak RSS), or None where that isn't available
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return None
+
+def reset_peak_rss():
+    """
+    Reset this process's peak RSS to its current RSS, where supported
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except IOError:
+        pass
+
+def run_decodes(decoder_name, path, queue):
+    """
+    Time repeated decodes in a fresh process, measuring its peak RSS while decoding
+    """
+    decoder = DECODERS[decoder_name]
+    reset_peak_rss()
+    start_rss = read_memory_status("VmRSS")
+    latencies = []
+    for i in range(REPEATS):
+        start = time.perf_counter()
+        decoder(path, TARGET_SIZE)
+        latencies += [time.perf_counter() - start]
+
+    # Without /proc, fall back to the peak over the process's lifetime
+    peak_rss = read_memory_status("VmHWM")
+    if peak_rss is None or start_rss is None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start_rss = 0
+    queue.put((latencies, peak_rss, peak_rss - start_rss))
+
+def make_benchmark(photo_size, decoder_name):
+    def benchmark(frames, warmup):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "photo.jpg")
+            create_photo(path, photo_size)
+
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            process = context.Process(target=run_decodes, args=(decoder_name, path, queue))
+            process.start()
+            latencies, peak_rss, rss_increase = queue.get()
+            process.join()
+
+        latencies.sort()
+        return {
+            "images": REPEATS,
+            "fps": len(latencies) / sum(latencies),
+            "latency_ms": {
+                "mean": 1000.0 * sum(latencies) / len(latencies),
+                "p50": 1000.0 * percentile(latencies, 50),
+                "p90": 1000.0 * percentile(latencies, 90),
+                "p99": 1000.0 * percentile(latencies, 99),
+                "max": 1000.0 * latencies[-1],
+            },
+            "peak_rss_kb": peak_rss,
+            "rss_increase_kb": rss_increase,
+        }
+    return benchmark
+
+# Each photo is decoded at full resolution as a baseline, and with the draft
+# decoding used to load images
+BENCHMARKS = []
+for name, photo_size in PHOTO_SIZES:
+    for decoder_name in DECODERS:
+        BENCHMARKS += [("decode/%s/%s" % (name, decoder_name), make_benchmark(photo_size, decoder_name))]
@@ -0,0 +1,163 @@
+################################################################################
+# drawing.py
+#-------------------------------------------------------------------------------
+# Benchmarks of drawing primitives on virtual canvases at a few display sizes.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+from PIL import Image
+
+from led_display import graphics
+from led_display.canvas_utils import fill_rect, blit_array
+from led_display.color_correction import build_lut, apply_lut
+from led_display.displays.virtual_display import VirtualCanvas
+from .common import time_calls
+
+# Canvas sizes drawn to, as (width, height)
+CANVAS_SIZES = [
+    ("64x64", (64, 64)),
+    ("256x128", (256, 128)),
+]
+
+COLOR = [0, 0, 255]
+
+class LedCanvasStub(object):
+    """
+    Stand-in for an rpi-rgb-led-matrix FrameCanvas, which isn't available off
+    a Pi. SetImage reads every pixel of the image once, so uploads include the
+    cost of converting frames to PIL images, though not the library's own
+    per-pixel upload, which comes on top of it on real hardware.
+    """
+    def __init__(self, width, height):
+        """
+        Initialize the stub canvas
+        """
+        self.width = width
+        self.height = height
+
+    def SetPixel(self, x, y, red, green, blue):
+        """
+        Accept a pixel, without drawing it
+        """
+        return
+
+    def SetImage(self, image, offset_x=0, offset_y=0, unsafe=True):
+        """
+        Read the image's pixels, without drawing them
+        """
+        image.tobytes()
+
+def fill_per_line(canvas, x, y, width, height):
+    """
+    Fill a rectangle one line per row, as filled rectangles were drawn before.
+    This times the NumPy emulation of DrawLine for virtual canvases, not the
+    rpi-rgb-led-matrix DrawLine used on LED canvases, which is much faster.
+    """
+    color = graphics.Color(*COLOR)
+    for row in range(y, y + height):
+        graphics.DrawLine(canvas, x, row, x + width - 1, row, color)
+
+def fill_bulk(canvas, x, y, width, height):
+    """
+    Fill a rectangle with a single bulk fill
+    """
+    fill_rect(canvas, (x, y, width, height), COLOR)
+
+# Fills timed, as (name, canvas type, fill). Drawing lines on LED canvases
+# needs rpi-rgb-led-matrix, so the line by line baseline is only the virtual
+# emulation, and overstates the speed-up on hardware.
+FILLS = [
+    ("virtual/per_line_emulated", VirtualCanvas, fill_per_line),
+    ("virtual/bulk", VirtualCanvas, fill_bulk),
+    ("led_stub/bulk", LedCanvasStub, fill_bulk),
+]
+
+def upload_set_pixel(canvas, pixels):
+    """
+    Upload a frame one SetPixel call per pixel
+    """
+    for y, row in enumerate(pixels.tolist()):
+        for x, (red, green, blue) in enumerate(row):
+            canvas.SetPixel(x, y, red, green, blue)
+
+def upload_set_image(canvas, pixels):
+    """
+    Upload a frame by converting it to a PIL image for SetImage
+    """
+    canvas.SetImage(Image.fromarray(pixels))
+
+def upload_blit_array(canvas, pixels):
+    """
+    Upload a frame straight from its array
+    """
+    blit_array(canvas, pixels)
+
+UPLOADS = [
+    ("set_pixel", upload_set_pixel),
+    ("set_image", upload_set_image),
+    ("blit_array", upload_blit_array),
+]
+
+# Canvas types uploaded to
+UPLOAD_CANVASES = [
+    ("virtual", VirtualCanvas),
+    ("led_stub", LedCanvasStub),
+]
+
+def make_fill_benchmark(size, canvas_class, fill):
+    def benchmark(frames, warmup):
+        canvas = canvas_class(*size)
+        return time_calls(lambda: fill(canvas, 0, 0, size[0], size[1]), frames, warmup)
+    return benchmark
+
+def make_upload_benchmark(size, canvas_class, upload):
+    def benchmark(frames, warmup):
+        canvas = canvas_class(*size)
+        pixels = numpy.random.RandomState(0).randint(0, 256, (size[1], size[0], 3)).astype(numpy.uint8)
+        return time_calls(lambda: upload(canvas, pixels), frames, warmup)
+    return benchmark
+
+def make_color_correction_benchmark(size):
+    def benchmark(frames, warmup):
+        pixels = numpy.random.RandomState(0).randint(0, 256, (size[1], size[0], 3)).astype(numpy.uint8)
+        out = numpy.empty_like(pixels)
+        lut = build_lut(brightness=60, gamma=2.2, white_balance=(1.0, 0.9, 0.8))
+        return time_calls(lambda: apply_lut(pixels, lut, out), frames, warmup)
+    return benchmark
+
+# Filling the whole canvas with a rectangle, line by line as a baseline and
+# with a bulk fill. Then uploading a computed frame pixel by pixel, through a
+# PIL image, and directly from its array, to a virtual canvas and to a stub
+# LED canvas. Finally, color correcting a whole 128x128 frame.
+BENCHMARKS = []
+for name, size in CANVAS_SIZES:
+    for fill_name, canvas_class, fill in FILLS:
+        BENCHMARKS += [("drawing/fill_rect/%s/%s" % (name, fill_name), make_fill_benchmark(size, canvas_class, fill))]
+for name, size in CANVAS_SIZES:
+    for canvas_name, canvas_class in UPLOAD_CANVASES:
+        for upload_name, upload in UPLOADS:
+            BENCHMARKS += [("drawing/upload/%s/%s/%s" % (name, canvas_name, upload_name), make_upload_benchmark(size, canvas_class, upload))]
+BENCHMARKS += [("drawing/color_correction/128x128", make_color_correction_benchmark((128, 128)))]
@@ -0,0 +1,81 @@
+################################################################################
+# network.py
+#-------------------------------------------------------------------------------
+# Benchmarks encoding and decoding frames streamed to remote displays.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+
+import numpy
+from PIL import Image
+
+from led_display.network_frames import FrameEncoder, FrameDecoder, MAX_DATAGRAM_SIZE
+from .common import REPO_DIR, time_calls
+
+# Display sizes streamed, as (width, height)
+DISPLAY_SIZES = [
+    ("64x64", (64, 64)),
+    ("256x128", (256, 128)),
+]
+
+def make_frames(size, count=32):
+    """
+    Make frames of a picture with a band of noise scrolling across its middle,
+    like a line of scrolling text over a still background
+    """
+    width, height = size
+    picture = Image.open(os.path.join(REPO_DIR, "images", "srt_64.png")).convert("RGB").resize(size)
+    background = numpy.asarray(picture)
+    band = numpy.random.RandomState(0).randint(0, 256, (9, width * 2, 3)).astype(numpy.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame[height // 2:height // 2 + 9] = band[:, i:i + width]
+        frames += [frame]
+    return frames
+
+def make_benchmark(size, keyframe):
+    def benchmark(frames, warmup):
+        stream = make_frames(size)
+        encoder = FrameEncoder()
+        decoder = FrameDecoder(*size)
+        position = [0]
+
+        def send_frame():
+            frame = stream[position[0] % len(stream)]
+            position[0] += 1
+            for packet in encoder.encode(frame, keyframe, MAX_DATAGRAM_SIZE):
+                decoder.decode(packet)
+
+        return time_calls(send_frame, frames, warmup)
+    return benchmark
+
+# Encoding a frame into UDP-sized packets and decoding it again, sending
+# only the tiles changed by a scrolling band (changed) or every tile (keyframe)
+BENCHMARKS = []
+for name, size in DISPLAY_SIZES:
+    BENCHMARKS += [("network/%s/changed" % name, make_benchmark(size, False))]
+    BENCHMARKS += [("network/%s/keyframe" % name, make_benchmark(size, True))]
@@ -0,0 +1,150 @@
+################################################################################
+# run_benchmarks.py
+#-------------------------------------------------------------------------------
+# Runs the benchmark suite, writing results as JSON
+#
+# Usage: python -m benchmarks.run_benchmarks [--output results.json] [--compare baseline.json]
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import sys
+import time
+import json
+import queue
+import resource
+import argparse
+import contextlib
+import platform
+import subprocess
+import multiprocessing
+
+from .common import REPO_DIR
+from . import controls
+from . import apps
+from . import decode
+from . import drawing
+from . import tiled
+from . import network
+
+SUITES = [controls, apps, decode, drawing, tiled, network]
+SUITES_BY_NAME = dict((suite.__name__.split(".")[-1], suite) for suite in SUITES)
+
+def get_commit():
+    """
+    Retrieve the git commit being benchmarked, if available
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def run_benchmark(suite_name, name, frames, warmup, results):
+    """
+    Run one benchmark in a fresh process, so threads started by apps (such as
+    the weather updater) can't keep running through later benchmarks
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        benchmark = dict(SUITES_BY_NAME[suite_name].BENCHMARKS)[name]
+        try:
+            result = benchmark(frames, warmup)
+        except Exception as err:
+            result = {"error": str(err)}
+    results.put(result)
+
+def run_isolated(context, suite_name, name, frames, warmup):
+    """
+    Run a benchmark in a child process, returning its result
+    """
+    results = context.Queue()
+    process = context.Process(target=run_benchmark, args=(suite_name, name, frames, warmup, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                result = {"error": "benchmark process exited with code %s" % process.exitcode}
+                break
+    process.join()
+    return result
+
+def compare(results, baseline):
+    """
+    Print the change in frames/sec and p99 latency relative to a baseline run
+    """
+    print("%-40s %12s %12s %12s" % ("benchmark", "fps", "fps change", "p99 change"))
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if "fps" not in result or previous is None or "fps" not in previous:
+            continue
+        fps_change = (result["fps"] / previous["fps"] - 1.0) * 100.0 if previous["fps"] > 0 else 0.0
+        p99 = previous["latency_ms"]["p99"]
+        p99_change = (result["latency_ms"]["p99"] / p99 - 1.0) * 100.0 if p99 > 0 else 0.0
+        print("%-40s %12.1f %+11.1f%% %+11.1f%%" % (name, result["fps"], fps_change, p99_change))
+
+def main():
+    parser = argparse.ArgumentParser(description="LED display benchmarks")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to time per benchmark")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed frames run first")
+    parser.add_argument("--filter", default="", help="Only run benchmarks with names containing this")
+    parser.add_argument("--output", help="Write results to a JSON file, rather than stdout")
+    parser.add_argument("--compare", help="Compare against a previous results file")
+    args = parser.parse_args()
+
+    # Each benchmark runs in a fresh process, so background threads started by
+    # one can't slow down the next. Anything they print goes to stderr, keeping
+    # stdout for the results
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for suite_name, suite in SUITES_BY_NAME.items():
+        for name, benchmark in suite.BENCHMARKS:
+            if args.filter not in name:
+                continue
+            sys.stderr.write("Running %s\n" % name)
+            results[name] = run_isolated(context, suite_name, name, args.frames, args.warmup)
+
+    output = {
+        "commit": get_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "frames": args.frames,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(output, indent=4))
+    else:
+        print(json.dumps(output, indent=4))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.loads(f.read()))
+
+if __name__ == "__main__":
+    main()
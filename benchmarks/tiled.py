@@ -0,0 +1,104 @@
+################################################################################
+# tiled.py
+#-------------------------------------------------------------------------------
+# Benchmarks drawing a large display locally, and in tiles on 1 to 4 worker
+# processes.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+
+from led_display.app_base import AppBase
+from .common import REPO_DIR, load_system_config, measure
+
+IMAGES_DIR = os.path.join(REPO_DIR, "images")
+
+# Display size drawn, as (width, height), like four 64x64 panels chained in two rows
+DISPLAY_SIZE = (256, 128)
+
+# Numbers of worker processes, where 0 draws locally as a baseline
+WORKER_COUNTS = [0, 1, 2, 3, 4]
+
+def setup_scene(app):
+    """
+    Fill the display with a background image, scrolling lines of text and
+    translucent rectangles
+    """
+    width, height = DISPLAY_SIZE
+
+    image = app.create_control("image", "image")
+    image.filename = os.path.join(IMAGES_DIR, "srt_64.png")
+    image.width = width
+    image.height = height
+
+    for i in range(8):
+        text = app.create_control("text", "text_%d" % i)
+        text.font = "6x9"
+        text.text = "The quick brown fox jumps over the lazy dog %d" % i
+        text.x = 0
+        text.y = 12 + i * 15
+        text.scroll = "auto"
+        text.color = [255, 255, 255]
+
+    for i in range(4):
+        rect = app.create_control("rect", "rect_%d" % i)
+        rect.x = i * 64 + 8
+        rect.y = 8
+        rect.width = 48
+        rect.height = height - 16
+        rect.has_fill = True
+        rect.fill_color = [0, 0, 255]
+        rect.opacity = 0.5
+
+def make_benchmark(workers):
+    def benchmark(frames, warmup):
+        config = load_system_config()
+        config["display"]["virtualWidth"], config["display"]["virtualHeight"] = DISPLAY_SIZE
+        config["settings"]["tiledRenderWorkers"] = workers
+        loaded_fonts = {}
+        renderers = []
+
+        def create_app():
+            app = AppBase(config, {}, loaded_fonts)
+            app.setup_display()
+            if app.tiled_renderer is not None:
+                renderers.append(app.tiled_renderer)
+            setup_scene(app)
+            return app
+
+        try:
+            return measure(create_app, frames, warmup, full_redraw=True)
+        finally:
+            for renderer in renderers:
+                renderer.stop()
+    return benchmark
+
+# The whole display redrawn every frame, locally and split into 64x64 tiles
+# between worker processes. Workers only speed drawing up with as many free
+# CPU cores, as pickling controls and handing out tiles costs time too.
+BENCHMARKS = []
+for workers in WORKER_COUNTS:
+    name = "local" if workers == 0 else "workers_%d" % workers
+    BENCHMARKS += [("tiled/%dx%d/%s" % (DISPLAY_SIZE + (name,)), make_benchmark(workers))]
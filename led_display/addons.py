@@ -1,7 +1,7 @@
 ################################################################################
 # addons.py
 #-------------------------------------------------------------------------------
-# Extensions for adding apps and controllers.
+# Extensions for adding apps, controllers, and display backends.
 # 
 # By Malcolm Stagg
 #
@@ -35,11 +35,16 @@ from .apps.snake import SnakeGame
 from .apps.lamp import Lamp
 from .apps.weather import Weather
 from .apps.synack_loading import SynackLoading
+from .apps.frame_player import FramePlayer
 
 from .controllers.controller_server import ControllerServer
 from .controllers.joystick_controller import JoystickController
 from .controllers.web_controller import WebController
 
+from .displays.rgb_matrix_display import RGBMatrixDisplay
+from .displays.virtual_display import VirtualDisplay
+from .displays.network_display import NetworkDisplay
+
 # List of installed apps
 
 apps = {
@@ -51,6 +56,7 @@ apps = {
     "lamp": Lamp,
     "weather": Weather,
     "synack_loading": SynackLoading,
+    "frame_player": FramePlayer,
 }
 
 # List of installed controllers
@@ -60,3 +66,11 @@ controllers = {
     "joystick": JoystickController,
     "web": WebController
 }
+
+# List of installed display backends
+
+displays = {
+    "rgbmatrix": RGBMatrixDisplay,
+    "virtual": VirtualDisplay,
+    "network": NetworkDisplay,
+}
@@ -0,0 +1,218 @@
+################################################################################
+# animation_cache.py
+#-------------------------------------------------------------------------------
+# Process-wide cache of animations decoded to display-sized frames
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import threading
+import collections
+
+from PIL import Image
+
+# Browsers show frames with no (or a tiny) duration for 100 ms, so do the same
+DEFAULT_DURATION = 100
+MIN_DURATION = 10
+
+class Animation(object):
+    """
+    Frames of an animated image (GIF, APNG or WebP), shrunk to fit a target
+    size and converted to RGB. Frames are decoded from the file as they are
+    first needed, so a long animation can start playing immediately. If the
+    decoded frames would take more than "max_bytes", only a window of frames
+    ahead of the one last shown is kept, and the rest are decoded again when
+    they come round.
+    """
+    def __init__(self, path, size, resample=Image.BICUBIC, max_bytes=None, on_decode=None):
+        """
+        Open an animation, decoding only its first frame. "on_decode" is called
+        after each frame is decoded, such as to enforce a cache's memory cap.
+        """
+        self.path = path
+        self.size = tuple(size)
+        self.resample = resample
+        self.max_bytes = max_bytes
+        self.on_decode = on_decode
+        self.frames = []
+        self.durations = []
+        self.complete = False
+        self.memory = 0
+        self.lock = threading.Lock()
+        self._image = Image.open(path)
+        self._decode_next()
+
+    def _decode(self, index):
+        """
+        Decode a frame from the file, reopening it if it was closed
+        """
+        if self._image is None:
+            self._image = Image.open(self.path)
+        self._image.seek(index)
+        frame = self._image.convert("RGB")
+        frame.thumbnail(self.size, self.resample)
+        self.memory += frame.width * frame.height * 3
+        return frame
+
+    def _decode_next(self):
+        """
+        Decode the next frame from the file, returning False at the end
+        """
+        if self.complete:
+            return False
+        try:
+            self._image.seek(len(self.frames))
+        except EOFError:
+            self._finish()
+            return False
+
+        duration = self._image.info.get("duration", DEFAULT_DURATION)
+        if not duration or duration <= MIN_DURATION:
+            duration = DEFAULT_DURATION
+
+        self.frames += [self._decode(len(self.frames))]
+        self.durations += [duration / 1000.0]
+
+        if not getattr(self._image, "is_animated", False):
+            self._finish()
+        return True
+
+    def _finish(self):
+        """
+        Close the file once every frame has been decoded, unless some were
+        dropped and will need decoding again
+        """
+        self.complete = True
+        if None not in self.frames:
+            self._image.close()
+            self._image = None
+
+    def _trim(self, index):
+        """
+        Drop decoded frames beyond the memory cap, starting with the one just
+        before "index", which is needed again the furthest ahead
+        """
+        if self.max_bytes is None:
+            return
+        count = len(self.frames)
+        for offset in range(1, count):
+            if self.memory <= self.max_bytes:
+                break
+            drop = (index - offset) % count
+            frame = self.frames[drop]
+            if frame is not None:
+                self.memory -= frame.width * frame.height * 3
+                self.frames[drop] = None
+
+    def get_frame(self, index):
+        """
+        Retrieve a frame and its duration in seconds, decoding up to it if needed.
+        Returns None if the animation has fewer frames.
+        """
+        with self.lock:
+            decoded = False
+            while index >= len(self.frames) and self._decode_next():
+                self._trim(len(self.frames) - 1)
+                decoded = True
+            if index >= len(self.frames):
+                return None
+            frame = self.frames[index]
+            if frame is None:
+                frame = self.frames[index] = self._decode(index)
+                self._trim(index)
+                decoded = True
+
+        if decoded and self.on_decode is not None:
+            self.on_decode(self)
+        return (frame, self.durations[index])
+
+    def get_memory(self):
+        """
+        Estimate the memory used by the frames currently decoded
+        """
+        return self.memory
+
+class AnimationCache(object):
+    """
+    Least recently used cache of animations, keyed by path, modification time,
+    target size and resample mode, holding up to a cap on decoded frame memory
+    """
+    def __init__(self, max_bytes=32*1024*1024):
+        """
+        Initialize an empty cache
+        """
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path, size, resample=Image.BICUBIC):
+        """
+        Retrieve an animation, opening it if it isn't already cached
+        """
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns, tuple(size), resample)
+
+        with self.lock:
+            animation = self.entries.get(key)
+            if animation is not None:
+                self.entries.move_to_end(key)
+                return animation
+
+        animation = Animation(path, size, resample, self.max_bytes, self._frame_decoded)
+
+        with self.lock:
+            self.entries[key] = animation
+            self._evict(animation)
+        return animation
+
+    def _frame_decoded(self, animation):
+        """
+        Enforce the memory cap as an animation decodes more of its frames
+        """
+        with self.lock:
+            self._evict(animation)
+
+    def _evict(self, keep):
+        """
+        Remove least recently used animations beyond the memory cap, other than
+        the one being decoded, which trims its own frames to fit
+        """
+        total_bytes = sum(animation.get_memory() for animation in self.entries.values())
+        for key, animation in list(self.entries.items()):
+            if total_bytes <= self.max_bytes:
+                break
+            if animation is not keep:
+                del self.entries[key]
+                total_bytes -= animation.get_memory()
+
+    def clear(self):
+        """
+        Remove all cached animations
+        """
+        with self.lock:
+            self.entries.clear()
+
+# Shared by all apps, so restarting a screen doesn't decode its animations again
+decoded_animations = AnimationCache()
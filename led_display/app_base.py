@@ -34,16 +34,31 @@ import os
 import json
 import weakref
 import threading
-from rgbmatrix import RGBMatrix, RGBMatrixOptions
-from rgbmatrix import graphics
  
+from . import graphics
 from . import app_controls
 from . import synack_controls
+from .canvas_utils import clear_rect, copy_rect, blit_array
+from .compositor import Compositor
+from .color_correction import color_correction
+from .render_thread import RenderThread
+from .tiled_renderer import TiledRenderer
+from .displays.virtual_display import VirtualCanvas
+from .damage_tracker import DamageTracker
+from .static_layer import StaticLayer
+from .control_registry import ControlRegistry
+from .frame_scheduler import FrameScheduler
+from .perf_stats import PerfStats
 
 class AppBase(object):
     """
     Base class to be implemented by all apps
     """
+
+    # Default frame rate for updating the display, which may be overridden
+    # per app with "frameRate" in the app configuration
+    frame_rate = 10
+
     def __init__(self, config, app_config, loaded_fonts, matrix=None, parent=None, config_directory=None):
         """
         Initialize a running app
@@ -52,11 +67,28 @@ class AppBase(object):
         self.app_config = app_config
         self.loaded_fonts = loaded_fonts
         self.stop_event = threading.Event()
-        self.controls = {}
+        self.render_lock = threading.RLock()
+        self.scheduler = FrameScheduler(self, app_config.get("frameRate", self.frame_rate))
+        self.controls = ControlRegistry()
+        self.dirty_controls = set()
+        self.damage_tracker = None
+        self.static_layer = None
+        self.compositor = None
+        self.color_correction_version = None
+        self.render_thread = None
+        self.tiled_renderer = None
+        self.perf_stats = None
+
+        # Transition to play in place of the first frame drawn
+        self.transition = None
+        if config.get("settings", {}).get("perfStatsEnable", False):
+            self.perf_stats = PerfStats(config["settings"].get("perfStatsHistory", 120))
         self.control_classes = {
             "fill": app_controls.FillControl,
             "text": app_controls.TextControl,
             "image": app_controls.ImageControl,
+            "animation": app_controls.AnimationControl,
+            "frame_stream": app_controls.FrameStreamControl,
             "rect": app_controls.RectControl,
             "synack_load": synack_controls.SynackLoadAnimationControl,
         }
@@ -69,6 +101,9 @@ class AppBase(object):
         self.running_app = None
         self.parent_app = None
 
+        # Last frame of the previous child app, to transition from
+        self.last_frame = None
+
         if parent is not None:
             self.parent_app = weakref.ref(parent)
 
@@ -135,24 +170,72 @@ class AppBase(object):
     def create_control(self, control_type, control_id):
         """
         Create a graphical control by type. See app_controls.py for a list of supported types.
+        Any existing control with the same ID is deleted, so the area it covered is redrawn.
         """
-        self.controls[control_id] = self.control_classes[control_type](control_id, self)
-        self.controls[control_id].z_index = self.next_z_index
+        self._delete_control(control_id)
+        control = self.control_classes[control_type](control_id, self)
+        control.z_index = self.next_z_index
         self.next_z_index += 1
-        return self.controls[control_id]
+        self.controls.add(control)
+        return control
 
-    def get_control(control_id):
+    def get_control(self, control_id):
         """
         Retrieve a graphical control by name
         """
         return self.controls.get(control_id)
 
-    def _delete_control(control_id):
+    def _delete_control(self, control_id):
         """
         Delete a graphical control by name
         """
         if control_id in self.controls:
-            del self.controls[control_id]
+            control = self.controls.remove(control_id)
+            self.dirty_controls.discard(control)
+            if self.perf_stats is not None:
+                self.perf_stats.remove_control(control_id)
+            if self.damage_tracker is not None:
+                self.damage_tracker.control_changed(control, None, False)
+
+    def invalidate_control(self, control):
+        """
+        Mark a control as changed, so the area it covers is redrawn on the next update
+        """
+        self.dirty_controls.add(control)
+        if self.static_layer is not None:
+            self.static_layer.control_changed(control)
+        self.scheduler.wake()
+
+    def invalidate_all(self):
+        """
+        Redraw the whole display on the next update, such as after something
+        else has drawn to the matrix
+        """
+        if self.damage_tracker is not None:
+            self.damage_tracker.invalidate_all()
+        if self.static_layer is not None:
+            self.static_layer.invalidate()
+        self.scheduler.wake()
+
+    def add_tick_callback(self, callback, interval=None):
+        """
+        Call a function on the app thread every "interval" seconds, or every frame
+        if None, starting with the next frame. If the function returns a number,
+        it is the delay in seconds until its next call.
+        """
+        self.scheduler.add_tick_callback(callback, interval)
+
+    def remove_tick_callback(self, callback):
+        """
+        Stop calling a tick callback
+        """
+        self.scheduler.remove_tick_callback(callback)
+
+    def call_soon(self, callback):
+        """
+        Call a function once on the app thread, at the start of the next frame
+        """
+        self.scheduler.call_soon(callback)
 
     def get_state(self):
         """
@@ -167,33 +250,205 @@ class AppBase(object):
         """
         static = True
 
-        for control in self.controls.items():
-            if control[1].enabled and not control[1].static:
+        for control in self.controls.enabled_controls:
+            if not control.static:
                 static = False
                 break
 
         return static
 
+    def needs_update(self):
+        """
+        Returns whether the display needs to be updated, because a control has
+        changed or a dynamic control is animating
+        """
+        if len(self.dirty_controls) > 0 or not self.is_static():
+            return True
+        if self.color_correction_version != color_correction.version:
+            return True
+        return self.damage_tracker is not None and self.damage_tracker.full_frames > 0
+
     def update(self, directToMatrix = False):
         """
         Update the canvas (or matrix) with graphical control data. This should generally 
         be called before "draw", which will update the matrix with current canvas data.
         """
-        canvas = self.matrix if directToMatrix else self.offscreen_canvas
-
-        sorted_controls = sorted(self.controls.items(), key=lambda kv: kv[1].z_index)
-        for control in sorted_controls:
-            if control[1].enabled:
-                control[1].on_frame()
-                control[1].draw(canvas)
+        enabled_controls = list(self.controls.enabled_controls)
+
+        if directToMatrix:
+            for control in enabled_controls:
+                control.on_frame()
+                control.draw(self.matrix)
+            return
+
+        canvas = self.offscreen_canvas
+        perf_stats = self.perf_stats
+        if perf_stats is not None:
+            update_start = time.perf_counter()
+
+        for control in enabled_controls:
+            if perf_stats is None:
+                control.on_frame()
+            else:
+                start = time.perf_counter()
+                control.on_frame()
+                perf_stats.record_on_frame(control.control_id, time.perf_counter() - start)
+
+        # Damage the old and new areas of each changed control
+        dirty_controls, self.dirty_controls = self.dirty_controls, set()
+        for control in dirty_controls:
+            visible = control.enabled and self.controls.get(control.control_id) is control
+            self.damage_tracker.control_changed(control, control.get_bounds() if visible else None, visible)
+
+        # Color correction changes every pixel. The version is read first, so a
+        # change made meanwhile still redraws everything on the next frame.
+        version = color_correction.version
+        lut = color_correction.lut
+        if self.color_correction_version != version:
+            self.color_correction_version = version
+            self.damage_tracker.invalidate_all()
+
+        # Blending needs to read back pixels, and pixels left from the previous
+        # frame must not be color corrected twice. In those cases, frames are
+        # drawn to the compositor's canvas and the damaged areas copied over.
+        # With a render thread, frames are always drawn there to be published,
+        # and with tiled rendering, to the canvas shared with the workers.
+        target = canvas
+        composing = lut is not None or self.render_thread is not None or self.tiled_renderer is not None
+        if not composing and not isinstance(canvas, VirtualCanvas):
+            for control in enabled_controls:
+                if control.needs_blending():
+                    composing = True
+                    break
+        if composing != self.compositor.active:
+            self.compositor.active = composing
+            self.damage_tracker.invalidate_all()
+        if self.tiled_renderer is not None:
+            target = self.tiled_renderer.canvas
+        elif composing:
+            target = self.compositor.canvas
+        blend = isinstance(target, VirtualCanvas)
+
+        # Static controls below the first dynamic control are cached as a
+        # background, unless workers draw the tiles, which redraw every control
+        static_controls = []
+        if self.tiled_renderer is None:
+            static_controls = self.static_layer.get_static_controls(enabled_controls)
+        if len(static_controls) > 0:
+            # The layer's contents change wherever a control joins or leaves it
+            if self.static_layer.update(static_controls, self.compositor):
+                self.damage_tracker.invalidate_all()
+            for control in static_controls:
+                self.damage_tracker.control_drawn(control, self.damage_tracker.clip(control.get_bounds()))
+
+        # Redraw the damaged regions, leaving the rest of the previous frame
+        control_bounds = [(control, self.damage_tracker.clip(control.get_bounds())) for control in enabled_controls[len(static_controls):]]
+        rects, redraw_controls = self.damage_tracker.resolve(control_bounds)
+
+        if self.tiled_renderer is not None and self.tiled_renderer.render(control_bounds, dirty_controls, rects):
+            for control, bounds in control_bounds:
+                if control in redraw_controls:
+                    self.damage_tracker.control_drawn(control, bounds)
+        else:
+            for rect in rects:
+                if len(static_controls) > 0:
+                    self.static_layer.blit(target, rect)
+                else:
+                    clear_rect(target, rect)
+
+            for control, bounds in control_bounds:
+                if control in redraw_controls:
+                    if perf_stats is None:
+                        if blend:
+                            self.compositor.draw(control, target)
+                        else:
+                            control.draw(target)
+                    else:
+                        start = time.perf_counter()
+                        if blend:
+                            self.compositor.draw(control, target)
+                        else:
+                            control.draw(target)
+                        perf_stats.record_draw(control.control_id, time.perf_counter() - start)
+                    self.damage_tracker.control_drawn(control, bounds)
+
+        if target is not canvas and self.render_thread is None:
+            for rect in rects:
+                copy_rect(canvas, target, rect, lut)
+
+        if perf_stats is not None:
+            perf_stats.record_update(time.perf_counter() - update_start)
 
     def draw(self):
         """
         Transfer contents of the canvas to the display. This should generally
         be called after "update".
         """
-        self.offscreen_canvas = self.matrix.SwapOnVSync(self.offscreen_canvas)
-        self.offscreen_canvas.Clear()
+        if self.transition is not None:
+            transition, self.transition = self.transition, None
+            if transition.play(self.present_frame, self.snapshot(), self.stop_event):
+                # The transition ended on this frame, drawn to other canvases
+                self.damage_tracker.invalidate_all()
+                return
+
+        if self.perf_stats is None:
+            self.swap()
+        else:
+            start = time.perf_counter()
+            self.swap()
+            end = time.perf_counter()
+            self.perf_stats.record_swap(end - start, end)
+
+    def swap(self):
+        """
+        Show the frame drawn by "update", publishing it to the render thread
+        if there is one
+        """
+        if self.render_thread is not None:
+            pixels = self.render_thread.acquire()
+            if self.tiled_renderer is not None:
+                pixels[:] = self.tiled_renderer.canvas.framebuffer
+            else:
+                pixels[:] = self.compositor.canvas.framebuffer
+            self.render_thread.publish(pixels)
+        else:
+            self.offscreen_canvas = self.matrix.SwapOnVSync(self.offscreen_canvas)
+
+    def present_frame(self, pixels):
+        """
+        Show a complete (height, width, 3) frame, color corrected, in place of
+        the app's drawing. The pixels may be modified.
+        """
+        if self.render_thread is not None:
+            frame = self.render_thread.acquire()
+            frame[:] = pixels
+            self.render_thread.publish(frame)
+        else:
+            blit_array(self.offscreen_canvas, color_correction.apply(pixels, pixels))
+            self.offscreen_canvas = self.matrix.SwapOnVSync(self.offscreen_canvas)
+
+    def snapshot(self):
+        """
+        Render the enabled controls to a (height, width, 3) array, as they
+        were last drawn. Returns None if the app draws outside of controls.
+        """
+        canvas = VirtualCanvas(self.offscreen_canvas.width, self.offscreen_canvas.height)
+        for control in self.controls.enabled_controls:
+            self.compositor.draw(control, canvas)
+        return canvas.framebuffer
+
+    def get_perf_stats(self):
+        """
+        Retrieve frame timing statistics for the app currently drawing to the display
+        """
+        if self.running_app is not None:
+            return self.running_app.get_perf_stats()
+        if self.perf_stats is None:
+            return {"enabled": False}
+        stats = self.perf_stats.get_stats()
+        if self.render_thread is not None:
+            stats["render_thread"] = self.render_thread.get_stats()
+        return stats
 
     def enter_sleep_mode(self):
         """
@@ -231,7 +486,9 @@ class AppBase(object):
 
     def run(self):
         """
-        Main app run routine, to be implemented by the application
+        Main app run routine, to be implemented by the application. This should
+        create controls and register tick callbacks, after which the frame
+        scheduler updates the display until the app is stopped.
         """
         return
 
@@ -239,10 +496,11 @@ class AppBase(object):
         """
         Starts a child app running by name. This will block until the app exits.
         """
-        import addons
+        from . import addons
         app_config = self.load_app_config(self.config_directory, screen_name)
         screen_class = addons.apps[app_config["app"]]
         self.running_app = screen_class(self.config, app_config.get("config", {}), self.loaded_fonts, matrix=self.matrix, parent=self, config_directory=self.config_directory)
+        self.running_app.transition = self.create_transition(app_config)
         try:
             print("Starting app for screen " + screen_name)
             print("Press CTRL-C to stop...")
@@ -251,56 +509,80 @@ class AppBase(object):
         except Exception as err:
             print("Exception while running app: %s" % err)
 
+        try:
+            self.last_frame = self.running_app.snapshot()
+        except Exception as err:
+            print("Exception capturing last frame: %s" % err)
+            self.last_frame = None
+
         self.running_app = None
 
+        # The child app drew over this app's display
+        self.invalidate_all()
+
+    def create_transition(self, app_config):
+        """
+        Returns the Transition to play when starting a child app from the last
+        frame of the previous one, or None to show it straight away
+        """
+        return None
+
     def stop(self):
         """
         Attempt to stop the current app
         """
         self.stop_event.set()
+        self.scheduler.wake()
 
-    def start(self):
+    def setup_display(self):
         """
-        Setup routine which is called before "run"
+        Create the matrix if needed, and the offscreen canvas drawn by "update"
         """
-        if self.matrix is None:
-            options = RGBMatrixOptions()
-
-            if self.config["display"].get("ledGpioMapping") != None:
-                options.hardware_mapping = self.config["display"]["ledGpioMapping"]
-            options.rows = self.config["display"]["ledRows"]
-            options.cols = self.config["display"]["ledCols"]
-            options.chain_length = self.config["display"]["ledChain"]
-            options.parallel = self.config["display"]["ledParallel"]
-            options.row_address_type = self.config["display"]["ledRowAddrType"]
-            options.multiplexing = self.config["display"]["ledMultiplexing"]
-            options.pwm_bits = self.config["display"]["ledPwmBits"]
-            options.brightness = self.config["display"]["ledBrightness"]
-            options.pwm_lsb_nanoseconds = self.config["display"]["ledPwmLsbNanoseconds"]
-            options.led_rgb_sequence = self.config["display"]["ledRgbSequence"]
-            options.pixel_mapper_config = self.config["display"]["ledPixelMapper"]
-            if self.config["display"]["ledShowRefresh"]:
-                options.show_refresh_rate = 1
-
-            if self.config["display"].get("ledSlowdownGpio") != None:
-                options.gpio_slowdown = self.config["display"]["ledSlowdownGpio"]
-            if self.config["display"].get("ledNoHardwarePulse") != None:
-                options.disable_hardware_pulsing = self.config["display"]["ledNoHardwarePulse"]
-
-            # Dropping privileges makes other things fail
-            options.drop_privileges = False
-
-            self.matrix = RGBMatrix(options = options)
+        settings = self.config.get("settings", {})
+        owner = self.matrix is None
+        if owner:
+            from . import addons
+            display_class = addons.displays[self.config["display"].get("backend", "rgbmatrix")]
+            self.matrix = display_class(self.config).create_matrix()
+
+            # Swap frames on their own thread, shared with child apps
+            if settings.get("renderThread", False):
+                self.render_thread = RenderThread(self.matrix, settings.get("renderQueueSize", 1))
+                self.render_thread.start()
+        elif self.parent_app is not None:
+            self.render_thread = self.parent_app().render_thread
+            self.tiled_renderer = self.parent_app().tiled_renderer
 
         self.offscreen_canvas = self.matrix.CreateFrameCanvas()
         self.offscreen_canvas.Clear()
+        self.damage_tracker = DamageTracker(self.offscreen_canvas.width, self.offscreen_canvas.height)
+        self.static_layer = StaticLayer(self.offscreen_canvas.width, self.offscreen_canvas.height)
+        self.compositor = Compositor(self.offscreen_canvas.width, self.offscreen_canvas.height)
+
+        # Draw tiles of each frame on worker processes, shared with child apps
+        if owner and settings.get("tiledRenderWorkers", 0) > 0:
+            self.tiled_renderer = TiledRenderer(self.config, self.offscreen_canvas.width, self.offscreen_canvas.height,
+                settings["tiledRenderWorkers"], settings.get("tiledRenderTileSize", 64))
+            self.tiled_renderer.start()
+
+    def start(self):
+        """
+        Setup routine which is called before "run"
+        """
+        self.setup_display()
 
         try:
             self.run()
+            self.scheduler.run(self.stop_event)
         except Exception as err:
             print("Exception while running app: %s" % err)
 
         if self.on_app_exit:
             self.on_app_exit(self)
 
+        if self.render_thread is not None and self.parent_app is None:
+            self.render_thread.stop()
+        if self.tiled_renderer is not None and self.parent_app is None:
+            self.tiled_renderer.stop()
+
         return True
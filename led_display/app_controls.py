@@ -29,8 +29,16 @@
 ################################################################################
 
 import weakref
+import numpy
 from PIL import Image
-from rgbmatrix import graphics
+from . import graphics
+from .displays.virtual_display import VirtualCanvas
+from .text_cache import text_rasters
+from .image_cache import decoded_images
+from .animation_cache import decoded_animations
+from .frame_stream import FrameStream
+from .compositor import premultiply, composite
+from .canvas_utils import fill_rect, blit_array
 
 class Control(object):
     """
@@ -42,8 +50,10 @@ class Control(object):
         """
         self.control_id = control_id
         self.app_base = weakref.ref(app_base)
-        self.z_index = 0
-        self.enabled = True
+        self._z_index = 0
+        self._enabled = True
+        self._opacity = 1.0
+        self.invalidate()
 
     def delete(self):
         """
@@ -51,6 +61,100 @@ class Control(object):
         """
         self.app_base()._delete_control(self.control_id)
 
+    def invalidate(self):
+        """
+        Mark the control as changed, so the area it covers is redrawn on the next update
+        """
+        app_base = self.app_base()
+        if app_base is not None:
+            app_base.invalidate_control(self)
+
+    def set_enabled(self, enable):
+        """
+        Set whether the control is drawn (bool)
+        """
+        if enable != self._enabled:
+            self._enabled = enable
+            self.invalidate()
+            app_base = self.app_base()
+            if app_base is not None:
+                app_base.controls.update_enabled(self)
+
+    def get_enabled(self):
+        """
+        Retrieve whether the control is drawn (bool)
+        """
+        return self._enabled
+
+    def set_z_index(self, z_index):
+        """
+        Set the drawing order of the control, where higher values are drawn on top
+        """
+        if z_index != self._z_index:
+            self._z_index = z_index
+            self.invalidate()
+            app_base = self.app_base()
+            if app_base is not None:
+                app_base.controls.update_z_index(self)
+
+    def get_z_index(self):
+        """
+        Retrieve the drawing order of the control, where higher values are drawn on top
+        """
+        return self._z_index
+
+    def set_opacity(self, opacity):
+        """
+        Set how opaque the control is drawn over the controls below it, from 0.0 to 1.0
+        """
+        if opacity != self._opacity:
+            self._opacity = opacity
+            self.invalidate()
+
+    def get_opacity(self):
+        """
+        Retrieve how opaque the control is drawn over the controls below it, from 0.0 to 1.0
+        """
+        return self._opacity
+
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the control draws to, or None if
+        it may draw anywhere on the canvas
+        """
+        return None
+
+    def __getstate__(self):
+        """
+        Retrieve the control's state for pickling, without the app reference.
+        Controls should leave out resources which "load_resources" can load again.
+        """
+        state = self.__dict__.copy()
+        state["app_base"] = None
+        return state
+
+    def load_resources(self):
+        """
+        Load the resources left out of the pickled state, after "app_base" has
+        been set again
+        """
+        return
+
+    def needs_blending(self):
+        """
+        Returns whether the control must be blended with the controls below it,
+        rather than drawn over them
+        """
+        return self._opacity < 1.0
+
+    def get_layer(self, compositor):
+        """
+        Returns the control's drawing as a premultiplied (height, width, 4) RGBA
+        array and its position, as (layer, x, y), or None if there is nothing
+        to draw. Controls with transparency should override this.
+        """
+        return compositor.render_layer(self)
+
     def get_static(self):
         """
         Returns whether the display contents is static
@@ -59,7 +163,8 @@ class Control(object):
 
     def on_frame(self):
         """
-        Handles a new frame event, for dynamic controls (scrolling, etc)
+        Handles a new frame event, for dynamic controls (scrolling, etc). Controls
+        which change their display here should call "invalidate".
         """
         return
 
@@ -69,6 +174,9 @@ class Control(object):
         """
         return
 
+    enabled = property(get_enabled, set_enabled)
+    z_index = property(get_z_index, set_z_index)
+    opacity = property(get_opacity, set_opacity)
     static = property(get_static)
 
 class TextControl(Control):
@@ -83,6 +191,7 @@ class TextControl(Control):
         self._font = ""
         self._font_obj = None
         self._text = ""
+        self._raster = None
         self._width = 0
         self._scroll_mode = "none"
         self._color = [0, 0, 0]
@@ -127,7 +236,9 @@ class TextControl(Control):
         """
         Set x coordinate for where to draw the text
         """
-        self._x = x
+        if x != self._x:
+            self._x = x
+            self.invalidate()
 
     def get_x(self):
         """
@@ -139,7 +250,9 @@ class TextControl(Control):
         """
         Set y coordinate for where to draw the text (bottom of character)
         """
-        self._y = y
+        if y != self._y:
+            self._y = y
+            self.invalidate()
 
     def get_y(self):
         """
@@ -151,8 +264,10 @@ class TextControl(Control):
         """
         Set scroll mode (auto, none) for whether the text should scroll if too long
         """
-        self._scroll_mode = scroll_mode
-        self._update_scroll()
+        if scroll_mode != self._scroll_mode:
+            self._scroll_mode = scroll_mode
+            self._update_scroll()
+            self.invalidate()
 
     def get_scroll(self):
         """
@@ -164,7 +279,9 @@ class TextControl(Control):
         """
         Set text alignment (left, center, right)
         """
-        self._align = align
+        if align != self._align:
+            self._align = align
+            self.invalidate()
 
     def get_align(self):
         """
@@ -176,8 +293,10 @@ class TextControl(Control):
         """
         Set text color, as [r, g, b] from 0 to 255
         """
-        self._color = color
-        self._color_obj = graphics.Color(*self._color)
+        if color != self._color:
+            self._color = color
+            self._color_obj = graphics.Color(*self._color)
+            self.invalidate()
 
     def get_color(self):
         """
@@ -190,10 +309,11 @@ class TextControl(Control):
         Update text width based on current parameters
         """
         self._width = 0
+        self._raster = None
         if self._font_obj is not None:
-            for character in self._text:
-                self._width += self._font_obj.CharacterWidth(ord(character))
+            self._width = self._font_obj.TextWidth(self._text)
         self._update_scroll()
+        self.invalidate()
 
     def _update_scroll(self):
         """
@@ -201,12 +321,50 @@ class TextControl(Control):
         """
         self._scrolling = (self._width > self.app_base().offscreen_canvas.width and self._scroll_mode == "auto")
 
+    def __getstate__(self):
+        """
+        Retrieve the control's state for pickling, without the font and raster
+        """
+        state = super(TextControl, self).__getstate__()
+        state["_font_obj"] = None
+        state["_raster"] = None
+        return state
+
+    def load_resources(self):
+        """
+        Load the font again after unpickling
+        """
+        if self._font != "":
+            self._font_obj = self.app_base().load_font(self._font)
+
     def get_static(self):
         """
-        Retrieve text color, as [r, g, b] from 0 to 255
+        Returns whether the display contents is static
         """
         return not self._scrolling
 
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the text draws to
+        """
+        if self._font_obj is None:
+            return (0, 0, 0, 0)
+
+        top = int(self._y) - self._font_obj.baseline
+
+        if self._scrolling:
+            return (0, top, self.app_base().offscreen_canvas.width, self._font_obj.height)
+
+        x = self._x
+
+        if self._align == "right":
+            x -= self._width
+        elif self._align == "center":
+            x -= self._width / 2
+
+        # Allow a pixel on either side for glyphs drawn outside of their advance width
+        return (int(x) - 1, top, self._width + 2, self._font_obj.height)
+
     def on_frame(self):
         """
         Handles a new frame event, for scrolling
@@ -214,6 +372,8 @@ class TextControl(Control):
         if not self._scrolling:
             return
 
+        self.invalidate()
+
         if self._scroll_dir == 0:
             self._scroll_pos += 1
             if self._scroll_pos >= self._width:
@@ -240,7 +400,20 @@ class TextControl(Control):
             x = max(0, x)
             x_offset = -self._scroll_pos
 
-        if self._font_obj is not None and self._color_obj is not None:
+        if self._font_obj is None or self._color_obj is None:
+            return
+
+        if isinstance(canvas, VirtualCanvas):
+            # Rasterized once per font and text, then only blitted each frame
+            if self._raster is None:
+                self._raster = text_rasters.get(self._font_obj, self._text)
+            self._raster.draw(canvas, x + x_offset, self._y, self._color_obj)
+        else:
+            # The cached raster isn't used on LED matrix canvases: they can't
+            # draw a mask in one call, and setting its pixels one at a time from
+            # Python is slower than the library drawing its own glyph bitmaps.
+            # Text is only kept rasterized there when frames are composed on a
+            # virtual canvas (blending, color correction or a render thread).
             graphics.DrawText(canvas, self._font_obj, x + x_offset, self._y, self._color_obj, self._text)
 
     font = property(get_font, set_font)
@@ -267,6 +440,7 @@ class ImageControl(Control):
         self._width = 0
         self._height = 0
         self._image = None
+        self._layer = None
 
     def set_filename(self, filename):
         """
@@ -282,11 +456,37 @@ class ImageControl(Control):
         """
         return self._filename
 
+    def set_image(self, image):
+        """
+        Set an already decoded RGB or RGBA image to display, instead of a filename
+        """
+        if image is not self._image:
+            self._filename = ""
+            self._set_loaded_image(image)
+
+    def _set_loaded_image(self, image):
+        """
+        Display a decoded image, keeping a premultiplied copy for blending if it has alpha
+        """
+        self._image = image
+        self._layer = None
+        if image is not None and image.mode == "RGBA":
+            self._layer = premultiply(numpy.asarray(image))
+        self.invalidate()
+
+    def get_image(self):
+        """
+        Retrieve the decoded image being displayed
+        """
+        return self._image
+
     def set_x(self, x):
         """
         Set x coordinate of image (top-left)
         """
-        self._x = x
+        if x != self._x:
+            self._x = x
+            self.invalidate()
 
     def get_x(self):
         """
@@ -298,7 +498,9 @@ class ImageControl(Control):
         """
         Set y coordinate of image (top-left)
         """
-        self._y = y
+        if y != self._y:
+            self._y = y
+            self.invalidate()
 
     def get_y(self):
         """
@@ -339,22 +541,425 @@ class ImageControl(Control):
         Load the image based on current parameters
         """
         if self._filename != "" and self._width != 0 and self._height != 0:
-            image = Image.open(self._filename)
-            image.thumbnail((self._width, self._height), Image.BICUBIC)
-            self._image = image.convert('RGB')
+            # RGBA if the image has transparency, which is only checked when it isn't cached
+            self._set_loaded_image(decoded_images.get(self._filename, (self._width, self._height), Image.BICUBIC, None))
+
+    def __getstate__(self):
+        """
+        Retrieve the control's state for pickling, without the decoded image if
+        it can be loaded again from the file
+        """
+        state = super(ImageControl, self).__getstate__()
+        if self._filename != "":
+            state["_image"] = None
+            state["_layer"] = None
+        return state
+
+    def load_resources(self):
+        """
+        Load the image again after unpickling
+        """
+        if self._image is None:
+            self._update()
+
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the image draws to
+        """
+        if self._image is None:
+            return (0, 0, 0, 0)
+        return (self._x, self._y, self._image.width, self._image.height)
+
+    def needs_blending(self):
+        """
+        Returns whether the control must be blended with the controls below it,
+        as it is partly opaque or the image has transparency
+        """
+        return self._opacity < 1.0 or self._layer is not None
+
+    def get_layer(self, compositor):
+        """
+        Returns the image as a premultiplied RGBA layer and its position
+        """
+        if self._image is None:
+            return None
+        if self._layer is not None:
+            return (self._layer, self._x, self._y)
+        pixels = numpy.asarray(self._image)
+        return (numpy.dstack((pixels, numpy.full(pixels.shape[:2], 255, dtype=numpy.uint8))), self._x, self._y)
 
     def draw(self, canvas):
         """
         Draw the control's graphical data on the canvas.
         """
-        if self._image is not None:
+        if self._image is None:
+            return
+
+        if self._layer is None:
             canvas.SetImage(self._image, offset_x=self._x, offset_y=self._y)
+        elif isinstance(canvas, VirtualCanvas):
+            composite(canvas, self._layer, self._x, self._y, self._opacity)
+        else:
+            canvas.SetImage(self._image.convert("RGB"), offset_x=self._x, offset_y=self._y)
+
+    filename = property(get_filename, set_filename)
+    image = property(get_image, set_image)
+    x = property(get_x, set_x)
+    y = property(get_y, set_y)
+    width = property(get_width, set_width)
+    height = property(get_height, set_height)
+
+class AnimationControl(Control):
+    """
+    Control for playing an animated image file (GIF, APNG or WebP)
+    """
+    def __init__(self, control_id, app_base):
+        """
+        Initialize the control with an ID and app reference
+        """
+        super(AnimationControl, self).__init__(control_id, app_base)
+        self._filename = ""
+        self._x = 0
+        self._y = 0
+        self._width = 0
+        self._height = 0
+        self._loop = True
+        self._animation = None
+        self._frame_num = 0
+        self._frame = None
+        self._frame_end = None
+
+    def set_filename(self, filename):
+        """
+        Set filename of animation to play
+        """
+        if filename != self._filename:
+            self._filename = filename
+            self._update()
+
+    def get_filename(self):
+        """
+        Retrieve filename of animation to play
+        """
+        return self._filename
+
+    def set_x(self, x):
+        """
+        Set x coordinate of animation (top-left)
+        """
+        if x != self._x:
+            self._x = x
+            self.invalidate()
+
+    def get_x(self):
+        """
+        Retrieve x coordinate of animation (top-left)
+        """
+        return self._x
+
+    def set_y(self, y):
+        """
+        Set y coordinate of animation (top-left)
+        """
+        if y != self._y:
+            self._y = y
+            self.invalidate()
+
+    def get_y(self):
+        """
+        Retrieve y coordinate of animation (top-left)
+        """
+        return self._y
+
+    def set_width(self, width):
+        """
+        Set width of animation
+        """
+        if width != self._width:
+            self._width = width
+            self._update()
+
+    def get_width(self):
+        """
+        Retrieve width of animation
+        """
+        return self._width
+
+    def set_height(self, height):
+        """
+        Set height of animation
+        """
+        if height != self._height:
+            self._height = height
+            self._update()
+
+    def get_height(self):
+        """
+        Retrieve height of animation
+        """
+        return self._height
+
+    def set_loop(self, loop):
+        """
+        Set whether the animation starts over after the last frame
+        """
+        if loop != self._loop:
+            self._loop = loop
+            self.invalidate()
+
+    def get_loop(self):
+        """
+        Retrieve whether the animation starts over after the last frame
+        """
+        return self._loop
+
+    def _update(self):
+        """
+        Load the animation based on current parameters, starting from the first frame
+        """
+        if self._filename != "" and self._width != 0 and self._height != 0:
+            self._animation = decoded_animations.get(self._filename, (self._width, self._height), Image.BICUBIC)
+            self._frame_num = 0
+            self._frame, duration = self._animation.get_frame(0)
+            self._frame_end = None
+            self.invalidate()
+
+    def __getstate__(self):
+        """
+        Retrieve the control's state for pickling, with only the current frame
+        of the animation
+        """
+        state = super(AnimationControl, self).__getstate__()
+        state["_animation"] = None
+        return state
+
+    def get_static(self):
+        """
+        Returns whether the display contents is static
+        """
+        if self._animation is None:
+            return True
+        if not self._animation.complete:
+            return False
+        return len(self._animation.frames) <= 1 or (not self._loop and self._frame_num == len(self._animation.frames) - 1)
+
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the animation draws to
+        """
+        if self._frame is None:
+            return (0, 0, 0, 0)
+        return (self._x, self._y, self._frame.width, self._frame.height)
+
+    def on_frame(self):
+        """
+        Handles a new frame event, advancing to the animation frame due at the
+        scheduler's frame time
+        """
+        if self._animation is None:
+            return
+
+        now = self.app_base().scheduler.frame_time
+        if self._frame_end is None:
+            self._frame_end = now + self._animation.get_frame(self._frame_num)[1]
+            return
+
+        frame_num = self._frame_num
+        while now >= self._frame_end:
+            next_frame = self._animation.get_frame(frame_num + 1)
+            if next_frame is None:
+                if not self._loop:
+                    break
+                next_frame = self._animation.get_frame(0)
+                frame_num = 0
+            else:
+                frame_num += 1
+            self._frame_end += next_frame[1]
+
+            # Start again from now if we have fallen a whole loop behind
+            if self._frame_end + 1.0 < now:
+                self._frame_end = now + next_frame[1]
+
+        if frame_num != self._frame_num:
+            self._frame_num = frame_num
+            self._frame = self._animation.get_frame(frame_num)[0]
+            self.invalidate()
+
+    def draw(self, canvas):
+        """
+        Draw the control's graphical data on the canvas.
+        """
+        if self._frame is not None:
+            canvas.SetImage(self._frame, offset_x=self._x, offset_y=self._y)
 
     filename = property(get_filename, set_filename)
     x = property(get_x, set_x)
     y = property(get_y, set_y)
     width = property(get_width, set_width)
     height = property(get_height, set_height)
+    loop = property(get_loop, set_loop)
+    static = property(get_static)
+
+class FrameStreamControl(Control):
+    """
+    Control for playing a frame stream file of pre-rendered frames
+    """
+    def __init__(self, control_id, app_base):
+        """
+        Initialize the control with an ID and app reference
+        """
+        super(FrameStreamControl, self).__init__(control_id, app_base)
+        self._filename = ""
+        self._x = 0
+        self._y = 0
+        self._loop = True
+        self._stream = None
+        self._frame_num = 0
+        self._start_time = None
+
+    def set_filename(self, filename):
+        """
+        Set filename of frame stream to play
+        """
+        if filename != self._filename:
+            self._filename = filename
+            self._update()
+
+    def get_filename(self):
+        """
+        Retrieve filename of frame stream to play
+        """
+        return self._filename
+
+    def set_x(self, x):
+        """
+        Set x coordinate of frames (top-left)
+        """
+        if x != self._x:
+            self._x = x
+            self.invalidate()
+
+    def get_x(self):
+        """
+        Retrieve x coordinate of frames (top-left)
+        """
+        return self._x
+
+    def set_y(self, y):
+        """
+        Set y coordinate of frames (top-left)
+        """
+        if y != self._y:
+            self._y = y
+            self.invalidate()
+
+    def get_y(self):
+        """
+        Retrieve y coordinate of frames (top-left)
+        """
+        return self._y
+
+    def set_loop(self, loop):
+        """
+        Set whether playback starts over after the last frame
+        """
+        if loop != self._loop:
+            self._loop = loop
+            self.invalidate()
+
+    def get_loop(self):
+        """
+        Retrieve whether playback starts over after the last frame
+        """
+        return self._loop
+
+    def get_frame_rate(self):
+        """
+        Retrieve the frame rate the stream was made for
+        """
+        return self._stream.frame_rate if self._stream is not None else 0
+
+    def _update(self):
+        """
+        Open the frame stream, starting from the first frame
+        """
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._filename != "":
+            self._stream = FrameStream(self._filename)
+            self._frame_num = 0
+            self._start_time = None
+            self.invalidate()
+
+    def __getstate__(self):
+        """
+        Retrieve the control's state for pickling, without the open stream
+        """
+        state = super(FrameStreamControl, self).__getstate__()
+        state["_stream"] = None
+        return state
+
+    def load_resources(self):
+        """
+        Open the stream again after unpickling, keeping the current frame
+        """
+        if self._filename != "":
+            self._stream = FrameStream(self._filename)
+
+    def get_static(self):
+        """
+        Returns whether the display contents is static
+        """
+        if self._stream is None or self._stream.frame_count <= 1:
+            return True
+        return not self._loop and self._frame_num == self._stream.frame_count - 1
+
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the frames draw to
+        """
+        if self._stream is None:
+            return (0, 0, 0, 0)
+        return (self._x, self._y, self._stream.width, self._stream.height)
+
+    def on_frame(self):
+        """
+        Handles a new frame event, advancing to the frame due at the scheduler's
+        frame time, and skipping frames if drawing can't keep up
+        """
+        if self._stream is None or self._stream.frame_count == 0:
+            return
+
+        now = self.app_base().scheduler.frame_time
+        if self._start_time is None:
+            self._start_time = now
+
+        frame_num = int((now - self._start_time) * self._stream.frame_rate)
+        if self._loop:
+            frame_num %= self._stream.frame_count
+        else:
+            frame_num = min(frame_num, self._stream.frame_count - 1)
+
+        if frame_num != self._frame_num:
+            self._frame_num = frame_num
+            self.invalidate()
+
+    def draw(self, canvas):
+        """
+        Draw the control's graphical data on the canvas.
+        """
+        if self._stream is None or self._stream.frame_count == 0:
+            return
+
+        blit_array(canvas, self._stream.get_frame(self._frame_num), self._x, self._y)
+
+    filename = property(get_filename, set_filename)
+    x = property(get_x, set_x)
+    y = property(get_y, set_y)
+    loop = property(get_loop, set_loop)
+    frame_rate = property(get_frame_rate)
+    static = property(get_static)
 
 class FillControl(Control):
     """
@@ -371,7 +976,9 @@ class FillControl(Control):
         """
         Set fill color, as [r, g, b] from 0 to 255
         """
-        self._color = color
+        if color != self._color:
+            self._color = color
+            self.invalidate()
 
     def get_color(self):
         """
@@ -411,8 +1018,10 @@ class RectControl(Control):
         """
         Set stroke color, as [r, g, b] from 0 to 255
         """
-        self._stroke_color = color
-        self._stroke_color_obj = graphics.Color(*self._stroke_color)
+        if color != self._stroke_color:
+            self._stroke_color = color
+            self._stroke_color_obj = graphics.Color(*self._stroke_color)
+            self.invalidate()
 
     def get_stroke_color(self):
         """
@@ -424,8 +1033,10 @@ class RectControl(Control):
         """
         Set fill color, as [r, g, b] from 0 to 255
         """
-        self._fill_color = color
-        self._fill_color_obj = graphics.Color(*self._fill_color)
+        if color != self._fill_color:
+            self._fill_color = color
+            self._fill_color_obj = graphics.Color(*self._fill_color)
+            self.invalidate()
 
     def get_fill_color(self):
         """
@@ -437,7 +1048,9 @@ class RectControl(Control):
         """
         Set whether stroke is enabled (bool)
         """
-        self._has_stroke = enable
+        if enable != self._has_stroke:
+            self._has_stroke = enable
+            self.invalidate()
 
     def get_has_stroke(self):
         """
@@ -449,7 +1062,9 @@ class RectControl(Control):
         """
         Set whether fill is enabled (bool)
         """
-        self._has_fill = enable
+        if enable != self._has_fill:
+            self._has_fill = enable
+            self.invalidate()
 
     def get_has_fill(self):
         """
@@ -461,7 +1076,9 @@ class RectControl(Control):
         """
         Set x coordinate of rectangle (top-left)
         """
-        self._x = x
+        if x != self._x:
+            self._x = x
+            self.invalidate()
 
     def get_x(self):
         """
@@ -473,7 +1090,9 @@ class RectControl(Control):
         """
         Set y coordinate of rectangle (top-left)
         """
-        self._y = y
+        if y != self._y:
+            self._y = y
+            self.invalidate()
 
     def get_y(self):
         """
@@ -485,7 +1104,9 @@ class RectControl(Control):
         """
         Set width of rectangle
         """
-        self._width = width
+        if width != self._width:
+            self._width = width
+            self.invalidate()
 
     def get_width(self):
         """
@@ -497,7 +1118,9 @@ class RectControl(Control):
         """
         Set height of rectangle
         """
-        self._height = height
+        if height != self._height:
+            self._height = height
+            self.invalidate()
 
     def get_height(self):
         """
@@ -505,15 +1128,23 @@ class RectControl(Control):
         """
         return self._height
 
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the rectangle draws to, which
+        extends left of or above (x, y) for a negative width or height
+        """
+        return (min(self._x, self._x + self._width), min(self._y, self._y + self._height), abs(self._width) + 1, abs(self._height) + 1)
+
     def draw(self, canvas):
         """
         Draw the control's graphical data on the canvas.
         """
         if self._has_fill:
-            for y in range(self._y, self._y + self._height):
-                graphics.DrawLine(canvas, self._x, y, self._x + self._width, y, self._fill_color_obj)
+            # Rows y to y + height - 1, each from x to x + width inclusive
+            fill_rect(canvas, (min(self._x, self._x + self._width), self._y, abs(self._width) + 1, self._height), self._fill_color)
 
         if self._has_stroke:
+            y = self._y
             graphics.DrawLine(canvas, self._x, y, self._x + self._width, y, self._stroke_color_obj)
             graphics.DrawLine(canvas, self._x+self._width, y, self._x+self._width, y+self._height, self._stroke_color_obj)
             graphics.DrawLine(canvas, self._x, y+self._height, self._x + self._width, y+self._height, self._stroke_color_obj)
@@ -0,0 +1,49 @@
+################################################################################
+# frame_player.py
+#-------------------------------------------------------------------------------
+# App to play a pre-rendered frame stream file
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+from ..app_base import AppBase
+
+class FramePlayer(AppBase):
+    """
+    App to play pre-rendered content, such as intros, from a frame stream file
+    made with "python -m led_display.frame_stream"
+    """
+    def run(self):
+        """
+        Main routine to play the frame stream from the app configuration
+        """
+        stream_control = self.create_control("frame_stream", "frame_stream_0")
+        stream_control.filename = self.app_config["filename"]
+        stream_control.x = self.app_config.get("x", 0)
+        stream_control.y = self.app_config.get("y", 0)
+        stream_control.loop = self.app_config.get("loop", True)
+
+        # Draw at the rate the frames were made for, unless configured otherwise
+        if "frameRate" not in self.app_config:
+            self.scheduler.frame_rate = stream_control.frame_rate
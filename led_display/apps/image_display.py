@@ -42,13 +42,21 @@ class ImageDisplay(AppBase):
         Initialize the app
         """
         super(ImageDisplay, self).__init__(*args, **kwargs)
+        self.clocks = []
+
+    def update_clocks(self):
+        """
+        Update the time on any clocks, returning the delay until the next second
+        """
+        time_val = datetime.datetime.now()
+        for clock in self.clocks:
+            clock["control"].text = time_val.strftime(clock["format"])
+        return 1.0 - time_val.microsecond / 1000000.0
 
     def run(self):
         """
         Load configuration and display the result
         """
-        static_display = True
-        clocks = []
 
         for i,display in enumerate(self.app_config["display"]):
             if display["type"] == "image":
@@ -58,8 +66,20 @@ class ImageDisplay(AppBase):
                 image_control.y = display["rect"][1]
                 image_control.width = display["rect"][2]
                 image_control.height = display["rect"][3]
+                image_control.opacity = display.get("opacity", 1.0)
                 image_control.enabled = display.get("enable", True)
 
+            elif display["type"] == "animation":
+                animation_control = self.create_control("animation", "animation_" + str(i))
+                animation_control.filename = display["filename"]
+                animation_control.x = display["rect"][0]
+                animation_control.y = display["rect"][1]
+                animation_control.width = display["rect"][2]
+                animation_control.height = display["rect"][3]
+                animation_control.loop = display.get("loop", True)
+                animation_control.opacity = display.get("opacity", 1.0)
+                animation_control.enabled = display.get("enable", True)
+
             elif display["type"] == "text":
                 text_control = self.create_control("text", "text_" + str(i))
                 text_control.font = display["font"]
@@ -69,9 +89,8 @@ class ImageDisplay(AppBase):
                 text_control.y = display["point"][1]
                 text_control.align = display["align"]
                 text_control.scroll = display["scroll"]
+                text_control.opacity = display.get("opacity", 1.0)
                 text_control.enabled = display.get("enable", True)
-                if text_control.enabled and not text_control.static:
-                    static_display = False
 
             elif display["type"] == "datetime":
                 text_control = self.create_control("text", "text_" + str(i))
@@ -81,29 +100,14 @@ class ImageDisplay(AppBase):
                 text_control.y = display["point"][1]
                 text_control.align = display["align"]
                 text_control.scroll = display["scroll"]
+                text_control.opacity = display.get("opacity", 1.0)
                 text_control.enabled = display.get("enable", True)
 
-                clocks += [{
+                self.clocks += [{
                     "format": display["format"],
                     "control": text_control
                 }]
 
-                if text_control.enabled:
-                    static_display = False
-
-        while not self.stop_event.wait(0.1):
-            # update the time on any clocks
-            time_val = datetime.datetime.now()
-            for clock in clocks:
-                clock["control"].text = time_val.strftime(clock["format"])
-
-            # update the display buffer with image data from the controls
-            self.update()
-
-            # redraw the display
-            self.draw()
-
-            if static_display:
-                break
-
-        self.stop_event.wait()
+        # update the time on any clocks
+        if len(self.clocks) > 0:
+            self.add_tick_callback(self.update_clocks)
@@ -43,12 +43,3 @@ class Lamp(AppBase):
         """
         lamp_control = self.create_control("fill", "fill_0")
         lamp_control.color = self.app_config["color"]
-
-        # update the display buffer with image data from the controls
-        self.update()
-
-        # redraw the display
-        self.draw()
-
-        # wait for exit
-        self.stop_event.wait()
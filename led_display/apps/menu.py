@@ -55,8 +55,6 @@ class Menu(AppBase):
         for entry_info in self.app_config["menu"]:
             self.menu_items += [(entry_info["text"], entry_info["screen"])]
 
-        self.redraw_lock = threading.Lock()
-
     def stop(self):
         """
         Stop the app from running, including any running child app
@@ -89,6 +87,7 @@ class Menu(AppBase):
                 handled = True
             elif input_event == "select":
                 self.selected_app = self.menu_row
+                self.call_soon(self.run_selected_app)
                 handled = True
 
         if not handled:
@@ -140,9 +139,9 @@ class Menu(AppBase):
 
     def redraw(self):
         """
-        Update the menu display and redraw it on the LED display
+        Update the menu display, to be redrawn on the LED display
         """
-        with self.redraw_lock:
+        with self.render_lock:
             selected_row = self.menu_row
 
             # Update the menu selection position
@@ -154,12 +153,6 @@ class Menu(AppBase):
 
             self.menu_controls[selected_row].color = self.app_config["selected_fgcolor"]
 
-            # update the display buffer with image data from the controls
-            self.update()
-
-            # redraw the display
-            self.draw()
-
     def _start_app(self, index):
         """
         Start a new child app based on index in on the display
@@ -169,6 +162,22 @@ class Menu(AppBase):
         self.current_screen_name = screen_name
         self._start_app_by_name(screen_name)
 
+    def run_selected_app(self):
+        """
+        Run the child app selected from the menu, until it exits
+        """
+        if self.selected_app is None:
+            return
+
+        try:
+            self._start_app(self.selected_app)
+            self.selected_app = None
+        except Exception as err:
+            print("Exception while running app: %s" % err)
+            self.selected_app = None
+            self.running_app = None
+        self.redraw()
+
     def run(self):
         """
         Main routine to setup the menu and allow user selection
@@ -217,24 +226,3 @@ class Menu(AppBase):
             y += self.app_config["item_height"]
 
         self.redraw()
-
-        is_static = self.is_static()
-
-        if is_static:
-            update_rate = 1.0
-        else:
-            update_rate = 0.1
-
-        while not self.stop_event.wait(update_rate):
-            if self.selected_app is not None:
-                try:
-                    self._start_app(self.selected_app)
-                    self.selected_app = None
-                except Exception as err:
-                    print("Exception while running app: %s" % err)
-                    self.selected_app = None
-                    self.running_app = None
-                self.redraw()
-            else:
-                if not is_static:
-                    self.redraw()
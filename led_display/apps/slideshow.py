@@ -31,58 +31,147 @@
 import time
 import datetime
 import os
+import concurrent.futures
 
 from ..app_base import AppBase
+from ..image_cache import load_image
+from ..folder_watcher import FolderWatcher
 
 class Slideshow(AppBase):
     """
-    App to display a collection of pictures
+    App to display a collection of pictures. Only the file paths are indexed,
+    and kept up to date as pictures are added to or removed from the folders;
+    pictures are decoded a few ahead of time on background workers, so
+    startup time and memory use don't grow with the number of pictures.
     """
+
+    # Extensions of the files shown
+    extensions = ['.jpg', '.jpeg', '.png', '.bmp']
+
+    # Delay before checking again if the next picture hasn't finished decoding
+    retry_delay = 0.05
+
     def __init__(self, *args, **kwargs):
         """
         Initialize the app
         """
         super(Slideshow, self).__init__(*args, **kwargs)
+        self.files = []
+        self.current_indx = 0
+        self.image_control = None
+        self.executor = None
+        self.watcher = None
+        self.prefetch_count = max(1, self.app_config.get("prefetch", 3))
+        self.prefetched = {}
 
-    def run(self):
+    def on_file_added(self, path):
         """
-        Main routine to load pictures from folders based on the app configuration,
-        and display them in sequence on the LED display
+        Handle a picture added to a folder, from the watcher thread
+        """
+        self.call_soon(lambda: self.add_file(path))
+
+    def on_file_removed(self, path):
         """
-        files = []
-        image_controls = []
-        for folder in self.app_config["folders"]:
-            for filename in os.listdir(folder):
-                if os.path.splitext(filename)[1].lower() in ['.jpg', '.jpeg', '.png', '.bmp']:
-                    files += [os.path.join(folder, filename)]
+        Handle a picture removed from a folder, from the watcher thread
+        """
+        self.call_soon(lambda: self.remove_file(path))
 
-        for i,filename in enumerate(files):
-            image_control = self.create_control("image", "image_" + str(i))
-            image_control.filename = filename
-            image_control.x = 0
-            image_control.y = 0
-            image_control.width = self.offscreen_canvas.width
-            image_control.height = self.offscreen_canvas.height
-            image_control.enabled = False
-            image_controls += [image_control]
+    def add_file(self, path):
+        """
+        Add a picture to the end of the sequence
+        """
+        if path not in self.files:
+            self.files += [path]
+            self.prefetch()
 
-        current_indx = 0
+    def remove_file(self, path):
+        """
+        Remove a picture from the sequence
+        """
+        if path in self.files:
+            indx = self.files.index(path)
+            del self.files[indx]
+            if indx < self.current_indx:
+                self.current_indx -= 1
+            if self.current_indx >= len(self.files):
+                self.current_indx = 0
+            future = self.prefetched.pop(path, None)
+            if future is not None:
+                future.cancel()
+            self.prefetch()
 
-        while len(image_controls) > 0 and not self.stop_event.is_set():
-            image_controls[current_indx].enabled = True
+    def prefetch(self):
+        """
+        Start decoding the pictures following the current one, up to the prefetch
+        count, and discard any decoded pictures no longer coming up
+        """
+        if self.stop_event.is_set():
+            return
 
-            # update the display buffer with image data from the controls
-            self.update()
+        upcoming = set()
+        for i in range(self.current_indx, self.current_indx + min(self.prefetch_count, len(self.files))):
+            path = self.files[i % len(self.files)]
+            upcoming.add(path)
+            if path not in self.prefetched:
+                size = (self.offscreen_canvas.width, self.offscreen_canvas.height)
+                self.prefetched[path] = self.executor.submit(load_image, path, size)
 
-            # redraw the display
-            self.draw()
+        for path in list(self.prefetched):
+            if path not in upcoming:
+                self.prefetched.pop(path).cancel()
 
-            # display for a delay
-            if self.stop_event.wait(self.app_config["delay"]):
-                break
+    def next_picture(self):
+        """
+        Show the next picture in the sequence, once it has been decoded
+        """
+        if len(self.files) == 0:
+            return
+
+        path = self.files[self.current_indx]
+        future = self.prefetched.get(path)
+        if future is None:
+            self.prefetch()
+            return self.retry_delay
+        if not future.done():
+            return self.retry_delay
+
+        del self.prefetched[path]
+        try:
+            self.image_control.image = future.result()
+        except Exception as err:
+            print("Exception loading picture %s: %s" % (path, err))
+
+        self.current_indx += 1
+        self.current_indx %= len(self.files)
+        self.prefetch()
+
+    def start(self):
+        """
+        Run the app, then stop watching folders and decoding pictures however
+        it exits, even if it was stopped before "run" started them
+        """
+        try:
+            return super(Slideshow, self).start()
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self):
+        """
+        Main routine to find pictures from folders based on the app configuration,
+        and display them in sequence on the LED display
+        """
+        self.image_control = self.create_control("image", "image")
+        self.image_control.x = 0
+        self.image_control.y = 0
 
-            # go on to the next picture
-            image_controls[current_indx].enabled = False
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.app_config.get("workers", 2))
+        self.watcher = FolderWatcher(self.app_config["folders"], self.extensions,
+            self.on_file_added, self.on_file_removed, self.app_config.get("pollInterval", 5.0))
+        self.files = self.watcher.start()
+        self.prefetch()
 
-            current_indx += 1
-            current_indx %= len(image_controls)
+        # display each picture for a delay
+        self.add_tick_callback(self.next_picture, self.app_config["delay"])
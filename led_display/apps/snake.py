@@ -33,9 +33,12 @@
 import time
 import random
 import threading
-from rgbmatrix import graphics
+import numpy
+from .. import graphics
+from ..canvas_utils import blit_array
 
 from ..app_base import AppBase
+from ..frame_scheduler import FramePacer
 
 class SnakeBody(object):
     """
@@ -93,7 +96,7 @@ def EraseSnake(display_handler, snake, snake_body):
 
 def InitColors(display_handler):
     """
-    Initialize screen colors
+    Initialize screen colors, which are drawn once the level is set up
     """
     for row in range(64):
         for col in range(64):
@@ -103,12 +106,12 @@ def InitColors(display_handler):
 
     # Add a screen border
     for col in range(64):
-        SetPixel(display_handler, 0, col, 3)
-        SetPixel(display_handler, 63, col, 3)
+        SetArena(0, col, 3)
+        SetArena(63, col, 3)
 
     for row in range(1, 63):
-        SetPixel(display_handler, row, 0, 3)
-        SetPixel(display_handler, row, 63, 3)
+        SetArena(row, 0, 3)
+        SetArena(row, 63, 3)
 
 def Level(display_handler, level_event, snake):
     """
@@ -134,7 +137,7 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 2:
         for i in range(16, 48):
-            SetPixel(display_handler, 31, i, 3)
+            SetArena(31, i, 3)
 
         snake.row = 6
         snake.col = 47
@@ -142,8 +145,8 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 3:
         for i in range(16, 48):
-            SetPixel(display_handler, i, 15, 3)
-            SetPixel(display_handler, i, 47, 3)
+            SetArena(i, 15, 3)
+            SetArena(i, 47, 3)
 
         snake.row = 31
         snake.col = 42
@@ -151,12 +154,12 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 4:
         for i in range(1, 32):
-            SetPixel(display_handler, i, 15, 3)
-            SetPixel(display_handler, 64 - i, 47, 3)
+            SetArena(i, 15, 3)
+            SetArena(64 - i, 47, 3)
 
         for i in range(1, 32):
-            SetPixel(display_handler, 47, i, 3)
-            SetPixel(display_handler, 15, 64 - i, 3)
+            SetArena(47, i, 3)
+            SetArena(15, 64 - i, 3)
 
         snake.row = 6
         snake.col = 42
@@ -164,12 +167,12 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 5:
         for i in range(17, 46):
-            SetPixel(display_handler, i, 15, 3)
-            SetPixel(display_handler, i, 47, 3)
+            SetArena(i, 15, 3)
+            SetArena(i, 47, 3)
 
         for i in range(17, 46):
-            SetPixel(display_handler, 15, i, 3)
-            SetPixel(display_handler, 47, i, 3)
+            SetArena(15, i, 3)
+            SetArena(47, i, 3)
 
         snake.row = 31
         snake.col = 42
@@ -178,13 +181,13 @@ def Level(display_handler, level_event, snake):
     elif current_level == 6:
         for i in range(1, 63):
             if i > 37 or i < 24:
-                SetPixel(display_handler, i, 7, 3)
-                SetPixel(display_handler, i, 15, 3)
-                SetPixel(display_handler, i, 23, 3)
-                SetPixel(display_handler, i, 31, 3)
-                SetPixel(display_handler, i, 39, 3)
-                SetPixel(display_handler, i, 47, 3)
-                SetPixel(display_handler, i, 55, 3)
+                SetArena(i, 7, 3)
+                SetArena(i, 15, 3)
+                SetArena(i, 23, 3)
+                SetArena(i, 31, 3)
+                SetArena(i, 39, 3)
+                SetArena(i, 47, 3)
+                SetArena(i, 55, 3)
 
         snake.row = 6
         snake.col = 42
@@ -192,7 +195,7 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 7:
         for i in range(1, 63, 2):
-            SetPixel(display_handler, i, 31, 3)
+            SetArena(i, 31, 3)
 
         snake.row = 6
         snake.col = 47
@@ -200,13 +203,13 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 8:
         for i in range(1, 48):
-            SetPixel(display_handler, i, 7, 3)
-            SetPixel(display_handler, 64-i, 15, 3)
-            SetPixel(display_handler, i, 23, 3)
-            SetPixel(display_handler, 64-i, 31, 3)
-            SetPixel(display_handler, i, 39, 3)
-            SetPixel(display_handler, 64-i, 47, 3)
-            SetPixel(display_handler, i, 55, 3)
+            SetArena(i, 7, 3)
+            SetArena(64-i, 15, 3)
+            SetArena(i, 23, 3)
+            SetArena(64-i, 31, 3)
+            SetArena(i, 39, 3)
+            SetArena(64-i, 47, 3)
+            SetArena(i, 55, 3)
 
         snake.row = 6
         snake.col = 51
@@ -214,8 +217,8 @@ def Level(display_handler, level_event, snake):
 
     elif current_level == 9:
         for i in range(3, 45):
-            SetPixel(display_handler, i+16, i, 3)
-            SetPixel(display_handler, i, i+16, 3)
+            SetArena(i+16, i, 3)
+            SetArena(i, i+16, 3)
 
         snake.row = 39
         snake.col = 59
@@ -223,18 +226,20 @@ def Level(display_handler, level_event, snake):
 
     else:
         for i in range(1, 63, 2):
-            SetPixel(display_handler, i, 7, 3)
-            SetPixel(display_handler, i+1, 15, 3)
-            SetPixel(display_handler, i, 23, 3)
-            SetPixel(display_handler, i+1, 31, 3)
-            SetPixel(display_handler, i, 39, 3)
-            SetPixel(display_handler, i+1, 47, 3)
-            SetPixel(display_handler, i, 55, 3)
+            SetArena(i, 7, 3)
+            SetArena(i+1, 15, 3)
+            SetArena(i, 23, 3)
+            SetArena(i+1, 31, 3)
+            SetArena(i, 39, 3)
+            SetArena(i+1, 47, 3)
+            SetArena(i, 55, 3)
 
         snake.row = 6
         snake.col = 51
         snake.direction = 2
 
+    display_handler.DrawArena()
+
 def PlayGame(display_handler, input_handler, speed, increase_speed):
     """
     Main function for game play
@@ -253,6 +258,9 @@ def PlayGame(display_handler, input_handler, speed, increase_speed):
 
     cur_speed = speed
 
+    # Paces each move of the snake without drifting
+    pacer = FramePacer(input_handler.stop_event)
+
     SpacePause(display_handler, input_handler, "Level " + str(current_level))
 
     exit_now = False
@@ -277,7 +285,7 @@ def PlayGame(display_handler, input_handler, speed, increase_speed):
                 SetPixel(display_handler, food_row, food_col, 8)
 
             # Snake speed adjustment
-            time.sleep(cur_speed * 0.0005)
+            pacer.wait(cur_speed * 0.0005)
 
             axis_y = input_handler.axis_state('rz')
             axis_x = input_handler.axis_state('z')
@@ -395,6 +403,13 @@ def SetPixel(display_handler, row, col, acolor):
         display_handler.SetPixel(col, row, acolor)
         arena[row][col] = acolor
 
+def SetArena(row, col, acolor):
+    """
+    Set a point of the arena, without drawing it until the next DrawArena
+    """
+    if row >= 0:
+        arena[row][col] = acolor
+
 def SpacePause(display_handler, input_handler, short_text):
     """
     Pause and wait for user input to continue
@@ -416,9 +431,7 @@ def SpacePause(display_handler, input_handler, short_text):
             break
 
     # Restore the screen background
-    for i in range(26, 36):
-        for j in range(64):
-            SetPixel(display_handler, i, j, arena[i][j])
+    display_handler.DrawArena(26, 36)
 
 def StillWantsToPlay(display_handler, input_handler):
     """
@@ -459,6 +472,7 @@ class DisplayHandler(object):
     def __init__(self, matrix, font_6_9):
         self.matrix = matrix
         self.font_6_9 = font_6_9
+        self.palette = numpy.array(ledColors, dtype=numpy.uint8)
 
     def Rect(self, x1, y1, x2, y2, acolor):
         drawColor = graphics.Color(ledColors[acolor-1][0], ledColors[acolor-1][1], ledColors[acolor-1][2])
@@ -476,6 +490,13 @@ class DisplayHandler(object):
     def SetPixel(self, x, y, acolor):
         self.matrix.SetPixel(x, y, ledColors[acolor-1][0], ledColors[acolor-1][1], ledColors[acolor-1][2])
 
+    def DrawArena(self, first_row=0, last_row=64):
+        """
+        Draw rows of the arena in one blit, rather than pixel by pixel
+        """
+        indices = numpy.array(arena[first_row:last_row]) - 1
+        blit_array(self.matrix, self.palette[indices], 0, first_row)
+
 class InputHandler(object):
     """
     Wrapper for the input device
@@ -551,6 +572,12 @@ class SnakeGame(AppBase):
             return self.input_handler.on_joystick_axis(axis_states)
         return False
 
+    def snapshot(self):
+        """
+        The game draws to the matrix directly, so it has no frame to transition from
+        """
+        return None
+
     def run(self):
         font_6_9 = self.load_font("6x9")
         display_handler = DisplayHandler(self.matrix, font_6_9)
@@ -41,14 +41,3 @@ class SynackLoading(AppBase):
         load_control.y = 0
         load_control.width = 64
         load_control.height = 64
-
-        while not self.stop_event.wait(0.1):
-
-            # update the display buffer with image data from the controls
-            self.update()
-
-            # redraw the display
-            self.draw()
-
-
-
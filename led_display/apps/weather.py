@@ -185,75 +185,67 @@ class Weather(AppBase):
         """
         Main routine to display the weather
         """
-        image_control = self.create_control("image", "image_0")
-        image_control.x = 0
-        image_control.y = 0
-        image_control.width = self.offscreen_canvas.width
-        image_control.height = self.offscreen_canvas.height
-
-        temp_control = self.create_control("text", "text_temperature")
-        temp_control.font = "7x13"
-        temp_control.color = [255, 255, 255]
-        temp_control.text = ""
-        temp_control.x = self.offscreen_canvas.width/2
-        temp_control.y = 15
-        temp_control.align = "center"
-        temp_control.scroll = "none"
-
-        weather_control = self.create_control("text", "text_weather")
-        weather_control.font = "6x9"
-        weather_control.color = [255, 255, 255]
-        weather_control.text = ""
-        weather_control.x = self.offscreen_canvas.width/2
-        weather_control.y = self.offscreen_canvas.height-5
-        weather_control.align = "center"
-        weather_control.scroll = "auto"
-
-        loading_control = self.create_control("text", "text_loading")
-        loading_control.font = "6x9"
-        loading_control.color = [255, 255, 255]
-        loading_control.text = "loading..."
-        loading_control.x = self.offscreen_canvas.width/2
-        loading_control.y = self.offscreen_canvas.height/2
-        loading_control.align = "center"
-        loading_control.scroll = "auto"
+        self.image_control = self.create_control("image", "image_0")
+        self.image_control.x = 0
+        self.image_control.y = 0
+        self.image_control.width = self.offscreen_canvas.width
+        self.image_control.height = self.offscreen_canvas.height
+
+        self.temp_control = self.create_control("text", "text_temperature")
+        self.temp_control.font = "7x13"
+        self.temp_control.color = [255, 255, 255]
+        self.temp_control.text = ""
+        self.temp_control.x = self.offscreen_canvas.width/2
+        self.temp_control.y = 15
+        self.temp_control.align = "center"
+        self.temp_control.scroll = "none"
+
+        self.weather_control = self.create_control("text", "text_weather")
+        self.weather_control.font = "6x9"
+        self.weather_control.color = [255, 255, 255]
+        self.weather_control.text = ""
+        self.weather_control.x = self.offscreen_canvas.width/2
+        self.weather_control.y = self.offscreen_canvas.height-5
+        self.weather_control.align = "center"
+        self.weather_control.scroll = "auto"
+
+        self.loading_control = self.create_control("text", "text_loading")
+        self.loading_control.font = "6x9"
+        self.loading_control.color = [255, 255, 255]
+        self.loading_control.text = "loading..."
+        self.loading_control.x = self.offscreen_canvas.width/2
+        self.loading_control.y = self.offscreen_canvas.height/2
+        self.loading_control.align = "center"
+        self.loading_control.scroll = "auto"
 
-        global weather_updater
-
-        last_refresh = None
-        update_rate = 0.1
-
-        while not self.stop_event.wait(update_rate):
-            weather_updater.update()
-
-            if weather_updater.last_refresh != last_refresh:
-                loading_control.enabled = False
-                last_refresh = weather_updater.last_refresh
-
-                if weather_updater.weather_icon_filename is not None:
-                    if os.path.exists(weather_updater.weather_icon_filename):
-                        image_control.filename = weather_updater.weather_icon_filename
-                
-                if weather_updater.temperature is not None:
-                    if weather_updater.units == "metric":
-                        temp_control.text = u"%d\u00b0C" % int(round(weather_updater.temperature))
-                    else:
-                        temp_control.text = u"%d\u00b0F" % int(round(weather_updater.temperature))
+        self.last_refresh = None
 
-                    if weather_updater.weather_main is not None:
-                        weather_control.text = weather_updater.weather_main
+        self.add_tick_callback(self.update_weather, 1.0)
 
-                if weather_updater.weather_icon_filename is not None and os.path.exists(weather_updater.weather_icon_filename):
-                    image_control.filename = weather_updater.weather_icon_filename
+    def update_weather(self):
+        """
+        Update the controls when new weather data has been retrieved
+        """
+        global weather_updater
 
-            # update the display buffer with image data from the controls
-            self.update()
+        weather_updater.update()
 
-            # redraw the display
-            self.draw()
+        if weather_updater.last_refresh != self.last_refresh:
+            self.loading_control.enabled = False
+            self.last_refresh = weather_updater.last_refresh
+
+            if weather_updater.weather_icon_filename is not None:
+                if os.path.exists(weather_updater.weather_icon_filename):
+                    self.image_control.filename = weather_updater.weather_icon_filename
+            
+            if weather_updater.temperature is not None:
+                if weather_updater.units == "metric":
+                    self.temp_control.text = u"%d\u00b0C" % int(round(weather_updater.temperature))
+                else:
+                    self.temp_control.text = u"%d\u00b0F" % int(round(weather_updater.temperature))
 
-            if weather_control.static:
-                update_rate = 1.0
-            else:
-                update_rate = 0.1
+                if weather_updater.weather_main is not None:
+                    self.weather_control.text = weather_updater.weather_main
 
+            if weather_updater.weather_icon_filename is not None and os.path.exists(weather_updater.weather_icon_filename):
+                self.image_control.filename = weather_updater.weather_icon_filename
@@ -0,0 +1,132 @@
+################################################################################
+# canvas_utils.py
+#-------------------------------------------------------------------------------
+# Helper routines for bulk drawing operations on a canvas.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+from PIL import Image
+
+from .displays.virtual_display import VirtualCanvas
+from .color_correction import apply_lut
+
+# Solid color images by (width, height, color), for filling regions of an LED
+# matrix canvas with a single SetImage call
+_solid_images = {}
+_max_solid_images = 64
+
+def fill_rect(canvas, rect, color):
+    """
+    Fill an (x, y, width, height) rectangle of a canvas with an (r, g, b) color
+    """
+    x, y, width, height = [int(value) for value in rect]
+
+    if isinstance(canvas, VirtualCanvas):
+        clipped = canvas.clip(x, y, width, height)
+        if clipped is not None:
+            x0, y0, x1, y1 = clipped
+            canvas.framebuffer[y0:y1, x0:x1] = color
+        return
+
+    # Clip to the canvas, so the cached images stay no larger than it
+    x0 = max(x, 0)
+    y0 = max(y, 0)
+    x1 = min(x + width, canvas.width)
+    y1 = min(y + height, canvas.height)
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    key = (x1 - x0, y1 - y0, tuple(color))
+    solid_image = _solid_images.get(key)
+    if solid_image is None:
+        if len(_solid_images) >= _max_solid_images:
+            _solid_images.clear()
+        solid_image = Image.new("RGB", (x1 - x0, y1 - y0), key[2])
+        _solid_images[key] = solid_image
+    canvas.SetImage(solid_image, x0, y0)
+
+def clear_rect(canvas, rect):
+    """
+    Clear an (x, y, width, height) rectangle of a canvas to black
+    """
+    fill_rect(canvas, rect, (0, 0, 0))
+
+def blit_array(canvas, pixels, x=0, y=0, width=None):
+    """
+    Copy RGB pixels onto a canvas at (x, y). The pixels are a (height, width, 3)
+    uint8 array, or any buffer of packed RGB rows "width" pixels wide, such as
+    bytes or a memory-mapped file. Virtual canvases copy the pixels straight
+    into their framebuffer; LED matrix canvases are given a PIL image copy.
+    """
+    if not isinstance(pixels, numpy.ndarray):
+        pixels = numpy.asarray(memoryview(pixels))
+    if pixels.dtype != numpy.uint8:
+        raise Exception("Pixels must be uint8, not %s" % pixels.dtype)
+    if pixels.ndim != 3:
+        if width is None:
+            raise Exception("The width is needed to blit a flat buffer of pixels")
+        pixels = pixels.reshape(-1, width, 3)
+
+    if isinstance(canvas, VirtualCanvas):
+        canvas.blit(pixels, x, y)
+        return
+
+    # LED matrix canvases only take RGB PIL images. Pillow copies RGB buffers
+    # into the image (it only maps L, RGBX and RGBA buffers in place), so this
+    # costs a copy of the clipped pixels on top of the panel library's upload.
+    x = int(x)
+    y = int(y)
+    x0 = max(x, 0)
+    y0 = max(y, 0)
+    x1 = min(x + pixels.shape[1], canvas.width)
+    y1 = min(y + pixels.shape[0], canvas.height)
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    pixels = numpy.ascontiguousarray(pixels[y0-y:y1-y, x0-x:x1-x])
+    canvas.SetImage(Image.frombuffer("RGB", (x1 - x0, y1 - y0), pixels, "raw", "RGB", 0, 1), x0, y0)
+
+def copy_rect(canvas, source, rect, lut=None):
+    """
+    Copy an (x, y, width, height) rectangle of a virtual canvas to the same
+    position on another canvas, mapping the pixels through a (3, 256) lookup
+    table if given
+    """
+    x, y, width, height = rect
+
+    if isinstance(canvas, VirtualCanvas):
+        clipped = canvas.clip(x, y, width, height)
+        if clipped is not None:
+            x0, y0, x1, y1 = clipped
+            if lut is None:
+                canvas.framebuffer[y0:y1, x0:x1] = source.framebuffer[y0:y1, x0:x1]
+            else:
+                apply_lut(source.framebuffer[y0:y1, x0:x1], lut, canvas.framebuffer[y0:y1, x0:x1])
+    else:
+        pixels = source.framebuffer[y:y+height, x:x+width]
+        if lut is not None:
+            pixels = apply_lut(pixels, lut)
+        blit_array(canvas, pixels, x, y)
@@ -0,0 +1,104 @@
+################################################################################
+# color_correction.py
+#-------------------------------------------------------------------------------
+# Output stage applying brightness, gamma and white balance to frames through
+# a per-channel lookup table.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+
+def build_lut(brightness=100, gamma=1.0, white_balance=(1.0, 1.0, 1.0)):
+    """
+    Build a (3, 256) uint8 lookup table mapping each channel's values through
+    gamma, then scaling them by the white balance and brightness (0 to 100)
+    """
+    values = numpy.linspace(0.0, 1.0, 256) ** gamma
+    scale = numpy.clip(numpy.array(white_balance, dtype=numpy.float64), 0.0, 1.0) * (min(max(brightness, 0), 100) / 100.0)
+    return numpy.rint(values[numpy.newaxis, :] * scale[:, numpy.newaxis] * 255.0).astype(numpy.uint8)
+
+def apply_lut(pixels, lut, out=None):
+    """
+    Map (height, width, 3) uint8 pixels through a (3, 256) lookup table
+    """
+    if out is None:
+        out = numpy.empty_like(pixels)
+    for channel in range(3):
+        out[:, :, channel] = lut[channel][pixels[:, :, channel]]
+    return out
+
+class ColorCorrection(object):
+    """
+    Color correction applied to frames on their way to the display. Changing
+    it takes effect from the next frame; "version" is incremented on every
+    change so apps know to redraw the whole display.
+    """
+    def __init__(self):
+        """
+        Initialize with no correction
+        """
+        self.lut = None
+        self.version = 0
+        self.settings = {}
+
+    def configure(self, settings):
+        """
+        Set the correction from a "colorCorrection" config section, with
+        "brightness" (0 to 100), "gamma", and "whiteBalance" as [r, g, b] scales
+        from 0.0 to 1.0
+        """
+        settings = dict(settings or {})
+        if settings == self.settings:
+            return
+
+        lut = build_lut(settings.get("brightness", 100), settings.get("gamma", 1.0), settings.get("whiteBalance", [1.0, 1.0, 1.0]))
+        if numpy.array_equal(lut, build_lut()):
+            lut = None
+
+        self.settings = settings
+        self.lut = lut
+        self.version += 1
+
+    def is_enabled(self):
+        """
+        Returns whether frames are changed by the correction
+        """
+        return self.lut is not None
+
+    def apply(self, pixels, out=None):
+        """
+        Correct (height, width, 3) pixels, returning them unchanged if there is
+        no correction
+        """
+        lut = self.lut
+        if lut is None:
+            if out is None:
+                return pixels
+            out[:] = pixels
+            return out
+        return apply_lut(pixels, lut, out)
+
+# Shared by all apps, configured from the "display" section of the system config
+color_correction = ColorCorrection()
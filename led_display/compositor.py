@@ -0,0 +1,124 @@
+################################################################################
+# compositor.py
+#-------------------------------------------------------------------------------
+# Alpha compositing of controls with transparency or partial opacity
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+
+from .displays.virtual_display import VirtualCanvas
+
+def div255(value):
+    """
+    Divide a uint16 array by 255 with rounding
+    """
+    value = value + 128
+    return (value + (value >> 8)) >> 8
+
+def premultiply(pixels):
+    """
+    Convert an (height, width, 4) RGBA uint8 array to premultiplied alpha
+    """
+    premultiplied = pixels.copy()
+    premultiplied[:, :, :3] = div255(pixels[:, :, :3].astype(numpy.uint16) * pixels[:, :, 3:4])
+    return premultiplied
+
+def composite(canvas, layer, x, y, opacity=1.0):
+    """
+    Blend a premultiplied (height, width, 4) RGBA layer over a virtual canvas
+    at (x, y), scaling its alpha by "opacity" from 0.0 to 1.0
+    """
+    height, width = layer.shape[:2]
+    clipped = canvas.clip(x, y, width, height)
+    if clipped is None:
+        return
+    x0, y0, x1, y1 = clipped
+
+    source = layer[y0-y:y1-y, x0-x:x1-x].astype(numpy.uint16)
+    if opacity < 1.0:
+        source = div255(source * int(round(max(opacity, 0.0) * 255)))
+
+    destination = canvas.framebuffer[y0:y1, x0:x1]
+    destination[:] = source[:, :, :3] + div255(destination * (255 - source[:, :, 3:4]))
+
+class Compositor(object):
+    """
+    Draws controls needing blending as RGBA layers composited in z-order.
+    Opaque controls are drawn to the canvas directly as usual.
+
+    LED matrix canvases can't be read back to blend with, so while any control
+    needs blending, frames are drawn to a virtual canvas instead, and the
+    damaged areas copied to the matrix canvas in bulk.
+    """
+    def __init__(self, width, height):
+        """
+        Initialize the compositor for a canvas size
+        """
+        self.canvas = VirtualCanvas(width, height)
+        self.active = False
+        self._black = VirtualCanvas(width, height)
+        self._white = VirtualCanvas(width, height)
+
+    def render_layer(self, control):
+        """
+        Render an opaque control's drawing as a premultiplied RGBA layer,
+        returning (layer, x, y), or None if it draws nothing. The control is
+        drawn over both black and white, and pixels which come out the same on
+        both are the ones it drew.
+        """
+        bounds = control.get_bounds()
+        if bounds is None:
+            bounds = (0, 0, self.canvas.width, self.canvas.height)
+        clipped = self.canvas.clip(*bounds)
+        if clipped is None:
+            return None
+        x0, y0, x1, y1 = clipped
+
+        self._black.framebuffer[y0:y1, x0:x1] = 0
+        self._white.framebuffer[y0:y1, x0:x1] = 255
+        control.draw(self._black)
+        control.draw(self._white)
+
+        black = self._black.framebuffer[y0:y1, x0:x1]
+        white = self._white.framebuffer[y0:y1, x0:x1]
+        layer = numpy.empty((y1 - y0, x1 - x0, 4), dtype=numpy.uint8)
+        layer[:, :, :3] = black
+        layer[:, :, 3] = numpy.where(numpy.all(black == white, axis=2), 255, 0)
+        layer[:, :, :3] &= layer[:, :, 3:4]
+        return (layer, x0, y0)
+
+    def draw(self, control, canvas):
+        """
+        Draw a control on a virtual canvas, blending it if needed
+        """
+        if not control.needs_blending():
+            control.draw(canvas)
+            return
+
+        layer = control.get_layer(self)
+        if layer is not None:
+            pixels, x, y = layer
+            composite(canvas, pixels, x, y, control.opacity)
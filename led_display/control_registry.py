@@ -0,0 +1,160 @@
+################################################################################
+# control_registry.py
+#-------------------------------------------------------------------------------
+# Storage for an app's controls, keeping them sorted in drawing order as they
+# are created, deleted, reordered, enabled, and disabled.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import bisect
+
+class ControlRegistry(object):
+    """
+    Controls of an app by ID, along with always-sorted lists of all controls
+    and of the enabled controls, in drawing (z-index) order
+    """
+    def __init__(self):
+        """
+        Initialize an empty registry
+        """
+        self._controls = {}
+        self._sort_keys = {}
+        self._next_sequence = 0
+        self.draw_order = []
+        self._draw_order_keys = []
+        self.enabled_controls = []
+        self._enabled_keys = []
+
+    def add(self, control):
+        """
+        Add a control. Any existing control with the same ID must be removed first.
+        """
+        if control.control_id in self._controls:
+            raise Exception("A control with ID %s already exists" % control.control_id)
+
+        # Controls with the same z-index are drawn in the order they were added
+        sort_key = (control.z_index, self._next_sequence)
+        self._next_sequence += 1
+
+        self._controls[control.control_id] = control
+        self._sort_keys[control.control_id] = sort_key
+        self._insert(self.draw_order, self._draw_order_keys, control, sort_key)
+        if control.enabled:
+            self._insert(self.enabled_controls, self._enabled_keys, control, sort_key)
+
+    def remove(self, control_id):
+        """
+        Remove a control by ID, returning the removed control
+        """
+        control = self._controls.pop(control_id)
+        sort_key = self._sort_keys.pop(control_id)
+        self._remove(self.draw_order, self._draw_order_keys, sort_key)
+        self._remove(self.enabled_controls, self._enabled_keys, sort_key)
+        return control
+
+    def update_z_index(self, control):
+        """
+        Move a control to its place in the drawing order after its z-index changed
+        """
+        if self._controls.get(control.control_id) is not control:
+            return
+
+        old_key = self._sort_keys[control.control_id]
+        if old_key[0] == control.z_index:
+            return
+
+        sort_key = (control.z_index, old_key[1])
+        self._sort_keys[control.control_id] = sort_key
+        self._remove(self.draw_order, self._draw_order_keys, old_key)
+        self._insert(self.draw_order, self._draw_order_keys, control, sort_key)
+        if self._remove(self.enabled_controls, self._enabled_keys, old_key):
+            self._insert(self.enabled_controls, self._enabled_keys, control, sort_key)
+
+    def update_enabled(self, control):
+        """
+        Add or remove a control from the enabled controls after it was enabled or disabled
+        """
+        if self._controls.get(control.control_id) is not control:
+            return
+
+        sort_key = self._sort_keys[control.control_id]
+        self._remove(self.enabled_controls, self._enabled_keys, sort_key)
+        if control.enabled:
+            self._insert(self.enabled_controls, self._enabled_keys, control, sort_key)
+
+    def _insert(self, controls, keys, control, sort_key):
+        """
+        Insert a control into a sorted list
+        """
+        index = bisect.bisect_left(keys, sort_key)
+        keys.insert(index, sort_key)
+        controls.insert(index, control)
+
+    def _remove(self, controls, keys, sort_key):
+        """
+        Remove a control from a sorted list, returning whether it was present
+        """
+        index = bisect.bisect_left(keys, sort_key)
+        if index < len(keys) and keys[index] == sort_key:
+            del keys[index]
+            del controls[index]
+            return True
+        return False
+
+    def get(self, control_id, default=None):
+        """
+        Retrieve a control by ID
+        """
+        return self._controls.get(control_id, default)
+
+    def items(self):
+        """
+        Retrieve (control ID, control) pairs
+        """
+        return self._controls.items()
+
+    def keys(self):
+        """
+        Retrieve the control IDs
+        """
+        return self._controls.keys()
+
+    def values(self):
+        """
+        Retrieve the controls
+        """
+        return self._controls.values()
+
+    def __getitem__(self, control_id):
+        return self._controls[control_id]
+
+    def __contains__(self, control_id):
+        return control_id in self._controls
+
+    def __iter__(self):
+        return iter(self._controls)
+
+    def __len__(self):
+        return len(self._controls)
@@ -98,16 +98,14 @@ class ControllerBase(object):
         """
         Controller function to set configuration
         """
-        self.main_app().config = config
-        self.main_app().reload_running_app()
+        self.main_app().set_config(config)
         return True
 
     def save_config(self, config):
         """
         Controller function to set and save configuration
         """
-        self.main_app().config = config
-        self.main_app().reload_running_app()
+        self.main_app().set_config(config)
         self.main_app().save_system_config(self.main_app().config_directory, config)
         return True
 
@@ -135,6 +133,12 @@ class ControllerBase(object):
         """
         return self.main_app().on_joystick_axis(axis_states)
 
+    def get_perf_stats(self):
+        """
+        Controller function to retrieve frame timing statistics
+        """
+        return self.main_app().get_perf_stats()
+
     def enter_sleep_mode(self):
         """
         Controller function to turn off the LED display
@@ -98,6 +98,12 @@ class ControllerClient(object):
         """
         return self.send_sync_command("save_config", {"config": config})
 
+    def get_perf_stats(self):
+        """
+        Retrieve frame timing statistics
+        """
+        return self.send_sync_command("get_perf_stats", {})
+
     def send_input_event(self, input_event):
         """
         Inject an input event
@@ -67,6 +67,7 @@ class ControllerServer(ControllerBase):
             "get_config": self.on_get_config,
             "set_config": self.on_set_config,
             "save_config": self.on_save_config,
+            "get_perf_stats": self.on_get_perf_stats,
         }
 
     def run(self):
@@ -148,6 +149,12 @@ class ControllerServer(ControllerBase):
         self.save_config(data["config"])
         return {}
 
+    def on_get_perf_stats(self, data):
+        """
+        Handle a frame timing statistics request from the client
+        """
+        return {"perf_stats": self.get_perf_stats()}
+
     def on_input_event(self, data):
         """
         Handle input event injection from the client
@@ -0,0 +1,185 @@
+################################################################################
+# damage_tracker.py
+#-------------------------------------------------------------------------------
+# Tracks which regions of a double buffered display need to be redrawn, based
+# on the controls which have changed.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+def intersects(rect_a, rect_b):
+    """
+    Returns whether two (x, y, width, height) rectangles overlap
+    """
+    return (rect_a[0] < rect_b[0] + rect_b[2] and rect_b[0] < rect_a[0] + rect_a[2] and
+            rect_a[1] < rect_b[1] + rect_b[3] and rect_b[1] < rect_a[1] + rect_a[3])
+
+def contains(outer, inner):
+    """
+    Returns whether the rectangle "outer" entirely contains the rectangle "inner"
+    """
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+            inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+def union(rect_a, rect_b):
+    """
+    Returns the bounding rectangle of two rectangles
+    """
+    x0 = min(rect_a[0], rect_b[0])
+    y0 = min(rect_a[1], rect_b[1])
+    x1 = max(rect_a[0] + rect_a[2], rect_b[0] + rect_b[2])
+    y1 = max(rect_a[1] + rect_a[3], rect_b[1] + rect_b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def merge_overlapping(rects):
+    """
+    Merge overlapping rectangles, until none of the resulting rectangles overlap
+    """
+    merged = []
+    for rect in rects:
+        merged_rect = True
+        while merged_rect:
+            merged_rect = False
+            for i, other in enumerate(merged):
+                if intersects(rect, other):
+                    rect = union(rect, merged.pop(i))
+                    merged_rect = True
+                    break
+        merged += [rect]
+    return merged
+
+class DamageTracker(object):
+    """
+    Tracks damaged regions of a double buffered canvas. Since each offscreen canvas
+    returned by SwapOnVSync holds the frame from before the last swap, each frame
+    redraws the damage from the previous frame as well as its own.
+    """
+    def __init__(self, width, height, buffer_count=2):
+        """
+        Initialize the tracker for a canvas size
+        """
+        self.width = width
+        self.height = height
+        self.buffer_count = buffer_count
+        self.rects = []
+        self.history = []
+        self.drawn_bounds = {}
+        self.full_frames = 0
+        self.invalidate_all()
+
+    def invalidate_all(self):
+        """
+        Redraw the full canvas, in every buffer
+        """
+        self.full_frames = self.buffer_count
+
+    def clip(self, rect):
+        """
+        Clip a rectangle to the canvas (None is the full canvas), returning None
+        if nothing is visible
+        """
+        if rect is None:
+            return (0, 0, self.width, self.height)
+
+        x0 = max(int(rect[0]), 0)
+        y0 = max(int(rect[1]), 0)
+        x1 = min(int(rect[0]) + int(rect[2]), self.width)
+        y1 = min(int(rect[1]) + int(rect[3]), self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def add(self, rect):
+        """
+        Mark a rectangle of the canvas as damaged
+        """
+        rect = self.clip(rect)
+        if rect is not None:
+            self.rects += [rect]
+
+    def control_changed(self, control, bounds, visible):
+        """
+        Mark both the area a control was last drawn to, and where it will now
+        be drawn, as damaged
+        """
+        drawn_bounds = self.drawn_bounds.pop(control, None)
+        if drawn_bounds is not None:
+            self.add(drawn_bounds)
+        if visible:
+            self.add(bounds)
+
+    def control_drawn(self, control, bounds):
+        """
+        Record where a control was drawn
+        """
+        if bounds is not None:
+            self.drawn_bounds[control] = bounds
+        else:
+            self.drawn_bounds.pop(control, None)
+
+    def resolve(self, control_bounds):
+        """
+        Retrieve the regions to redraw this frame, given a list of (control, bounds)
+        for the visible controls in drawing order. Regions are grown until each
+        control is either entirely inside one region or outside all of them, so
+        redrawing a control never overwrites pixels outside of the regions.
+        Returns (rects, controls to redraw).
+        """
+        current = self.rects
+        self.rects = []
+
+        if self.full_frames > 0:
+            self.full_frames -= 1
+            rects = [(0, 0, self.width, self.height)]
+        else:
+            rects = list(current)
+            for previous in self.history:
+                rects += previous
+
+        self.history = (self.history + [current])[-(self.buffer_count - 1):] if self.buffer_count > 1 else []
+
+        rects = merge_overlapping(rects)
+
+        grown = len(rects) > 0
+        while grown:
+            grown = False
+            for control, bounds in control_bounds:
+                if bounds is None:
+                    continue
+                for i, rect in enumerate(rects):
+                    if intersects(bounds, rect) and not contains(rect, bounds):
+                        rects[i] = union(rect, bounds)
+                        grown = True
+            if grown:
+                rects = merge_overlapping(rects)
+
+        redraw = set()
+        for control, bounds in control_bounds:
+            if bounds is not None:
+                for rect in rects:
+                    if intersects(bounds, rect):
+                        redraw.add(control)
+                        break
+
+        return (rects, redraw)
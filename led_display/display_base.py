@@ -0,0 +1,47 @@
+################################################################################
+# display_base.py
+#-------------------------------------------------------------------------------
+# Base class for a display backend, which the LED display application framework
+# draws to, such as an LED matrix or a virtual framebuffer.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+class DisplayBase(object):
+    """
+    Base class to be implemented by all display backends
+    """
+    def __init__(self, config):
+        """
+        Initialize a display backend
+        """
+        self.config = config
+
+    def create_matrix(self):
+        """
+        Create the matrix that apps draw to, to be implemented by the display backend.
+        The matrix must support CreateFrameCanvas, SwapOnVSync, SetPixel, SetImage,
+        Fill, and Clear, like the rpi-rgb-led-matrix RGBMatrix.
+        """
+        return None
@@ -0,0 +1,285 @@
+################################################################################
+# network_display.py
+#-------------------------------------------------------------------------------
+# Display backend streaming each frame to remote receivers over TCP or UDP,
+# in addition to or instead of a local LED matrix.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import time
+import socket
+import threading
+
+import numpy
+
+from ..display_base import DisplayBase
+from ..canvas_utils import blit_array
+from ..network_frames import FrameEncoder, LENGTH, DEFAULT_PORT, MAX_DATAGRAM_SIZE
+from .virtual_display import VirtualMatrix, VirtualDisplay
+
+def parse_address(address):
+    """
+    Parse a "host:port" or "host" receiver address into (host, port)
+    """
+    host, separator, port = address.rpartition(":")
+    if separator == "":
+        return (address, DEFAULT_PORT)
+    return (host, int(port))
+
+class FrameSender(object):
+    """
+    Sends frames to one receiver on a thread of its own, so a slow or
+    unreachable receiver never holds up drawing. Only the latest frame is
+    kept; frames published faster than they can be sent are merged, as
+    each frame is sent as the tiles changed since the last one sent.
+    """
+    def __init__(self, address, protocol="tcp", tile_size=16, keyframe_interval=1.0, retry_delay=1.0):
+        """
+        Initialize a sender for a receiver address. Over UDP, where packets may
+        be lost, every tile is sent again every "keyframe_interval" seconds.
+        """
+        self.address = parse_address(address)
+        self.protocol = protocol
+        self.keyframe_interval = keyframe_interval
+        self.retry_delay = retry_delay
+        self.encoder = FrameEncoder(tile_size)
+        self.socket = None
+        self.pending = None
+        self.sending = None
+        self.has_frame = False
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_keyframe = 0.0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def start(self):
+        """
+        Start sending published frames
+        """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop sending frames and disconnect
+        """
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self._disconnect()
+
+    def publish(self, framebuffer):
+        """
+        Send a copy of a (height, width, 3) frame, replacing any frame not yet sent
+        """
+        with self.condition:
+            if self.pending is None or self.pending.shape != framebuffer.shape:
+                self.pending = numpy.empty_like(framebuffer)
+            self.pending[:] = framebuffer
+            self.has_frame = True
+            self.condition.notify()
+
+    def _connect(self):
+        """
+        Open the socket to the receiver
+        """
+        if self.protocol == "udp":
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.connect(self.address)
+        else:
+            self.socket = socket.create_connection(self.address, timeout=self.retry_delay)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print("Sending frames to %s:%d" % self.address)
+
+    def _disconnect(self):
+        """
+        Close the socket, so the next frame is sent in full after reconnecting
+        """
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self.encoder.reset()
+
+    def _send(self, frame):
+        """
+        Encode and send a frame's changed tiles
+        """
+        if self.protocol == "udp":
+            now = time.monotonic()
+            keyframe = now - self.last_keyframe >= self.keyframe_interval
+            if keyframe:
+                self.last_keyframe = now
+            for packet in self.encoder.encode(frame, keyframe, MAX_DATAGRAM_SIZE):
+                self.socket.send(packet)
+                self.bytes_sent += len(packet)
+        else:
+            packets = self.encoder.encode(frame)
+            if len(packets) > 0:
+                data = LENGTH.pack(len(packets[0])) + packets[0]
+                self.socket.sendall(data)
+                self.bytes_sent += len(data)
+        self.frames_sent += 1
+
+    def _run(self):
+        """
+        Send the latest published frame until stopped, reconnecting as needed
+        """
+        while not self.stop_event.is_set():
+            with self.condition:
+                while not self.has_frame and not self.stop_event.is_set():
+                    self.condition.wait()
+                if self.stop_event.is_set():
+                    break
+                self.pending, self.sending = self.sending, self.pending
+                self.has_frame = False
+
+            try:
+                if self.socket is None:
+                    self._connect()
+                self._send(self.sending)
+            except OSError as err:
+                if self.socket is not None:
+                    print("Stopped sending frames to %s:%d: %s" % (self.address + (err,)))
+                self._disconnect()
+                self.stop_event.wait(self.retry_delay)
+
+                # Resend the frame missed once reconnected
+                with self.condition:
+                    if not self.has_frame:
+                        self.pending, self.sending = self.sending, self.pending
+                        self.has_frame = True
+
+class NetworkMatrix(VirtualMatrix):
+    """
+    Matrix drawn to like a virtual matrix, which streams each swapped frame
+    to remote receivers, and uploads it to a local matrix if there is one.
+    Apps which draw straight to the matrix rather than swapping canvases,
+    like the snake game, are mirrored by flushing the displayed frame every
+    "flush_interval" seconds whenever it has changed.
+    """
+    def __init__(self, width, height, senders, local_matrix=None, flush_interval=1.0/60):
+        """
+        Initialize the matrix with started frame senders
+        """
+        super(NetworkMatrix, self).__init__(width, height)
+        self.senders = senders
+        self.local_matrix = local_matrix
+        self.local_canvas = None
+        if local_matrix is not None:
+            self.local_canvas = local_matrix.CreateFrameCanvas()
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+
+        # Frame last sent, to tell when something was drawn straight to the matrix
+        self.shown = self.framebuffer.copy()
+
+        self.flush_thread = threading.Thread(target=self._run_flush)
+        self.flush_thread.daemon = True
+        self.flush_thread.start()
+
+    def _publish(self, framebuffer):
+        """
+        Send a frame to the receivers, with the lock held
+        """
+        for sender in self.senders:
+            sender.publish(framebuffer)
+        self.shown[:] = framebuffer
+
+    def flush(self):
+        """
+        Mirror anything drawn straight to the matrix since the last frame sent
+        """
+        with self.lock:
+            if numpy.array_equal(self.framebuffer, self.shown):
+                return
+            if self.local_matrix is not None:
+                blit_array(self.local_matrix, self.framebuffer)
+            self._publish(self.framebuffer)
+
+    def _run_flush(self):
+        """
+        Flush direct drawing periodically, for the life of the process
+        """
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def Clear(self):
+        """
+        Clear the displayed frame to black, locally and remotely
+        """
+        with self.lock:
+            super(NetworkMatrix, self).Clear()
+            if self.local_matrix is not None:
+                self.local_matrix.Clear()
+            self._publish(self.framebuffer)
+
+    def SwapOnVSync(self, new_frame, framerate_fraction=1):
+        """
+        Display an offscreen canvas, sending it to the receivers and showing it
+        on the local matrix, waiting for its refresh if there is one
+        """
+        with self.lock:
+            self._publish(new_frame.framebuffer)
+            if self.local_matrix is not None:
+                blit_array(self.local_canvas, new_frame.framebuffer)
+                self.local_canvas = self.local_matrix.SwapOnVSync(self.local_canvas, framerate_fraction)
+            return super(NetworkMatrix, self).SwapOnVSync(new_frame, framerate_fraction)
+
+class NetworkDisplay(DisplayBase):
+    """
+    Display backend mirroring frames onto remote panels running the frame
+    receiver, as well as a local display backend if configured
+    """
+    def create_matrix(self):
+        """
+        Create a NetworkMatrix sending to the configured receivers
+        """
+        display_config = self.config["display"]
+
+        local_matrix = None
+        local_backend = display_config.get("networkLocalBackend", "rgbmatrix")
+        if local_backend:
+            from .. import addons
+            local_matrix = addons.displays[local_backend](self.config).create_matrix()
+            width, height = local_matrix.width, local_matrix.height
+        else:
+            width, height = VirtualDisplay(self.config).get_size()
+
+        senders = []
+        for address in display_config.get("networkReceivers", []):
+            sender = FrameSender(address, display_config.get("networkProtocol", "tcp"),
+                display_config.get("networkTileSize", 16), display_config.get("networkKeyframeInterval", 1.0))
+            sender.start()
+            senders += [sender]
+
+        return NetworkMatrix(width, height, senders, local_matrix, display_config.get("networkFlushInterval", 1.0/60))
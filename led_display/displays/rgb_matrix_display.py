@@ -0,0 +1,77 @@
+################################################################################
+# rgb_matrix_display.py
+#-------------------------------------------------------------------------------
+# Display backend for an LED matrix driven by the rpi-rgb-led-matrix library.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+from ..display_base import DisplayBase
+
+try:
+    from rgbmatrix import RGBMatrix, RGBMatrixOptions
+except ImportError:
+    RGBMatrix = None
+    RGBMatrixOptions = None
+
+class RGBMatrixDisplay(DisplayBase):
+    """
+    Display backend for an LED matrix
+    """
+    def create_matrix(self):
+        """
+        Create an RGBMatrix based on the "display" section of "$LED_DISPLAY_CONFIG/system.json"
+        """
+        if RGBMatrix is None:
+            raise Exception("The rgbmatrix module is not installed. Set \"backend\": \"virtual\" in the display config to run without an LED matrix.")
+
+        display_config = self.config["display"]
+
+        options = RGBMatrixOptions()
+
+        if display_config.get("ledGpioMapping") != None:
+            options.hardware_mapping = display_config["ledGpioMapping"]
+        options.rows = display_config["ledRows"]
+        options.cols = display_config["ledCols"]
+        options.chain_length = display_config["ledChain"]
+        options.parallel = display_config["ledParallel"]
+        options.row_address_type = display_config["ledRowAddrType"]
+        options.multiplexing = display_config["ledMultiplexing"]
+        options.pwm_bits = display_config["ledPwmBits"]
+        options.brightness = display_config["ledBrightness"]
+        options.pwm_lsb_nanoseconds = display_config["ledPwmLsbNanoseconds"]
+        options.led_rgb_sequence = display_config["ledRgbSequence"]
+        options.pixel_mapper_config = display_config["ledPixelMapper"]
+        if display_config["ledShowRefresh"]:
+            options.show_refresh_rate = 1
+
+        if display_config.get("ledSlowdownGpio") != None:
+            options.gpio_slowdown = display_config["ledSlowdownGpio"]
+        if display_config.get("ledNoHardwarePulse") != None:
+            options.disable_hardware_pulsing = display_config["ledNoHardwarePulse"]
+
+        # Dropping privileges makes other things fail
+        options.drop_privileges = False
+
+        return RGBMatrix(options = options)
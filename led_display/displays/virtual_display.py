@@ -0,0 +1,180 @@
+################################################################################
+# virtual_display.py
+#-------------------------------------------------------------------------------
+# Headless display backend, drawing to a NumPy framebuffer instead of an LED
+# matrix. Useful for running, profiling, and benchmarking apps off a Pi.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+
+from ..display_base import DisplayBase
+
+class VirtualCanvas(object):
+    """
+    Canvas backed by an (height, width, 3) uint8 NumPy framebuffer, implementing
+    the same drawing interface as an rpi-rgb-led-matrix FrameCanvas
+    """
+    def __init__(self, width, height):
+        """
+        Initialize a blank canvas
+        """
+        self.width = width
+        self.height = height
+        self.brightness = 100
+        self.framebuffer = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+
+    def SetPixel(self, x, y, red, green, blue):
+        """
+        Set a single pixel, ignoring pixels outside of the canvas
+        """
+        x = int(x)
+        y = int(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.framebuffer[y, x] = (red, green, blue)
+
+    def SetImage(self, image, offset_x=0, offset_y=0, unsafe=True):
+        """
+        Copy an RGB PIL image onto the canvas
+        """
+        if image.mode != "RGB":
+            raise Exception("Currently, only RGB mode is supported for SetImage(). Please create images with mode 'RGB' or convert first with image = image.convert('RGB').")
+
+        self.blit(numpy.asarray(image), offset_x, offset_y)
+
+    def Fill(self, red, green, blue):
+        """
+        Fill the whole canvas with a color
+        """
+        self.framebuffer[:, :] = (red, green, blue)
+
+    def Clear(self):
+        """
+        Clear the whole canvas to black
+        """
+        self.framebuffer.fill(0)
+
+    def clip(self, x, y, width, height):
+        """
+        Clip a rectangle to the canvas, returning (x0, y0, x1, y1), or None if
+        nothing is visible
+        """
+        x0 = max(int(x), 0)
+        y0 = max(int(y), 0)
+        x1 = min(int(x) + width, self.width)
+        y1 = min(int(y) + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1, y1)
+
+    def blit(self, pixels, x, y):
+        """
+        Copy an (height, width, 3) array of pixels onto the canvas at (x, y)
+        """
+        x = int(x)
+        y = int(y)
+        clipped = self.clip(x, y, pixels.shape[1], pixels.shape[0])
+        if clipped is not None:
+            x0, y0, x1, y1 = clipped
+            self.framebuffer[y0:y1, x0:x1] = pixels[y0-y:y1-y, x0-x:x1-x]
+
+    def draw_mask(self, mask, x, y, red, green, blue):
+        """
+        Set the pixels of a boolean (height, width) mask at (x, y) to a color
+        """
+        x = int(x)
+        y = int(y)
+        clipped = self.clip(x, y, mask.shape[1], mask.shape[0])
+        if clipped is not None:
+            x0, y0, x1, y1 = clipped
+            self.framebuffer[y0:y1, x0:x1][mask[y0-y:y1-y, x0-x:x1-x]] = (red, green, blue)
+
+class VirtualMatrix(VirtualCanvas):
+    """
+    Matrix backed by a NumPy framebuffer, implementing the same interface as an
+    rpi-rgb-led-matrix RGBMatrix. Drawing directly to the matrix draws to the
+    currently displayed frame.
+    """
+    def __init__(self, width, height):
+        """
+        Initialize a blank matrix
+        """
+        super(VirtualMatrix, self).__init__(width, height)
+        self.frame_count = 0
+
+    def CreateFrameCanvas(self):
+        """
+        Create an offscreen canvas which can be swapped onto the matrix
+        """
+        return VirtualCanvas(self.width, self.height)
+
+    def SwapOnVSync(self, new_frame, framerate_fraction=1):
+        """
+        Display an offscreen canvas, returning a canvas containing the previously
+        displayed frame to be reused for drawing. This does not wait, so frames
+        are swapped as fast as they are drawn.
+        """
+        self.framebuffer, new_frame.framebuffer = new_frame.framebuffer, self.framebuffer
+        self.frame_count += 1
+        return new_frame
+
+class VirtualDisplay(DisplayBase):
+    """
+    Display backend for a virtual matrix, sized like the configured LED panels
+    """
+    def get_size(self):
+        """
+        Compute the display (width, height) from the panel configuration,
+        accounting for the pixel mappers which change the display shape
+        """
+        display_config = self.config["display"]
+
+        width = display_config.get("virtualWidth")
+        height = display_config.get("virtualHeight")
+        if width is not None and height is not None:
+            return (width, height)
+
+        width = display_config["ledCols"] * display_config["ledChain"]
+        height = display_config["ledRows"] * display_config["ledParallel"]
+
+        for mapper in display_config.get("ledPixelMapper", "").split(";"):
+            mapper_name = mapper.split(":")[0].strip()
+            if mapper_name == "U-mapper":
+                width, height = width // 2, height * 2
+            elif mapper_name == "Rotate":
+                angle = int(mapper.split(":")[1]) % 360
+                if angle in (90, 270):
+                    width, height = height, width
+            elif mapper_name not in ("", "Mirror"):
+                print("Pixel mapper %s is not emulated by the virtual display" % mapper_name)
+
+        return (width, height)
+
+    def create_matrix(self):
+        """
+        Create a VirtualMatrix of the configured size
+        """
+        width, height = self.get_size()
+        return VirtualMatrix(width, height)
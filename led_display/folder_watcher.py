@@ -0,0 +1,261 @@
+################################################################################
+# folder_watcher.py
+#-------------------------------------------------------------------------------
+# Keeps an index of files in folders, updated as files are added and removed
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF
+
+# struct inotify_event: wd, mask, cookie, len, followed by the name
+EVENT_HEADER = struct.Struct("iIII")
+
+def load_inotify():
+    """
+    Load the libc inotify functions, or return None where they aren't available
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError, TypeError):
+        return None
+
+class FolderWatcher(object):
+    """
+    Keeps the set of files with matching extensions in a list of folders. The
+    folders are listed once at start, and afterwards kept up to date through
+    inotify where available, otherwise by polling each folder's modification
+    time and only listing folders which changed. "on_added" and "on_removed"
+    are called with a path from the watcher thread.
+    """
+    def __init__(self, folders, extensions, on_added=None, on_removed=None, poll_interval=5.0):
+        """
+        Initialize the watcher
+        """
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.extensions = [extension.lower() for extension in extensions]
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.poll_interval = poll_interval
+        self.files = set()
+        self.folder_files = {}
+        self.folder_mtimes = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+        self.inotify_fd = None
+        self.watches = {}
+        self.wake_pipe = None
+
+    def is_eligible(self, filename):
+        """
+        Returns whether a file has one of the watched extensions
+        """
+        return os.path.splitext(filename)[1].lower() in self.extensions
+
+    def scan(self):
+        """
+        List the watched folders, returning the sorted list of matching files
+        """
+        for folder in self.folders:
+            self._scan_folder(folder, notify=False)
+        with self.lock:
+            return sorted(self.files)
+
+    def _scan_folder(self, folder, notify=True):
+        """
+        List a folder, applying any differences from its previous listing
+        """
+        try:
+            self.folder_mtimes[folder] = os.stat(folder).st_mtime_ns
+            files = set(os.path.join(folder, filename) for filename in os.listdir(folder) if self.is_eligible(filename))
+        except OSError as err:
+            print("Exception listing folder %s: %s" % (folder, err))
+            files = set()
+
+        previous = self.folder_files.get(folder, set())
+        self.folder_files[folder] = files
+        for path in sorted(files - previous):
+            self._add(path, notify)
+        for path in sorted(previous - files):
+            self._remove(path, notify)
+
+    def _add(self, path, notify=True):
+        """
+        Add a file to the index
+        """
+        with self.lock:
+            if path in self.files:
+                return
+            self.files.add(path)
+        if notify and self.on_added is not None:
+            self.on_added(path)
+
+    def _remove(self, path, notify=True):
+        """
+        Remove a file from the index
+        """
+        with self.lock:
+            if path not in self.files:
+                return
+            self.files.discard(path)
+        if notify and self.on_removed is not None:
+            self.on_removed(path)
+
+    def start(self):
+        """
+        List the folders, and start watching them for changes. Returns the
+        sorted list of matching files.
+        """
+        libc = load_inotify()
+        if libc is not None:
+            self.inotify_fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if self.inotify_fd < 0:
+                self.inotify_fd = None
+            else:
+                for folder in self.folders:
+                    wd = libc.inotify_add_watch(self.inotify_fd, folder.encode(), WATCH_MASK)
+                    if wd < 0:
+                        print("Polling folder %s: %s" % (folder, os.strerror(ctypes.get_errno())))
+                    else:
+                        self.watches[wd] = folder
+
+        # Watch before listing, so files added in between aren't missed
+        files = self.scan()
+        self.wake_pipe = os.pipe()
+
+        self.watch_thread = threading.Thread(target=self.run)
+        self.watch_thread.daemon = True
+        self.watch_thread.start()
+        return files
+
+    def stop(self):
+        """
+        Stop watching the folders
+        """
+        self.stop_event.set()
+        if self.wake_pipe is not None:
+            os.write(self.wake_pipe[1], b"\0")
+        if self.watch_thread is not None:
+            self.watch_thread.join()
+            self.watch_thread = None
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+        if self.wake_pipe is not None:
+            os.close(self.wake_pipe[0])
+            os.close(self.wake_pipe[1])
+            self.wake_pipe = None
+
+    def _read_events(self):
+        """
+        Apply the pending inotify events
+        """
+        try:
+            data = os.read(self.inotify_fd, 64 * 1024)
+        except OSError as err:
+            if err.errno == errno.EAGAIN:
+                return
+            raise
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += EVENT_HEADER.size + length
+
+            folder = self.watches.get(wd)
+            if folder is None:
+                continue
+
+            if mask & (IN_DELETE_SELF | IN_IGNORED):
+                # The folder itself went away, so fall back to polling it
+                del self.watches[wd]
+                self._scan_folder(folder)
+                continue
+
+            if mask & IN_ISDIR or not self.is_eligible(name):
+                continue
+
+            path = os.path.join(folder, name)
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.folder_files.setdefault(folder, set()).add(path)
+                self._add(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.folder_files.setdefault(folder, set()).discard(path)
+                self._remove(path)
+
+    def _poll(self):
+        """
+        List again any folder not watched by inotify whose modification time changed
+        """
+        watched = set(self.watches.values())
+        for folder in self.folders:
+            if folder in watched:
+                continue
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self.folder_mtimes.get(folder):
+                self._scan_folder(folder)
+
+    def run(self):
+        """
+        Watch thread main routine
+        """
+        while not self.stop_event.is_set():
+            try:
+                if self.inotify_fd is not None and len(self.watches) > 0:
+                    readable, _, _ = select.select([self.inotify_fd, self.wake_pipe[0]], [], [], self.poll_interval)
+                    if self.inotify_fd in readable:
+                        self._read_events()
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                self._poll()
+            except Exception as err:
+                print("Exception watching folders: %s" % err)
+                self.stop_event.wait(self.poll_interval)
@@ -0,0 +1,160 @@
+################################################################################
+# frame_receiver.py
+#-------------------------------------------------------------------------------
+# Receives frames streamed by a display using the network backend, and shows
+# them on the local LED matrix.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import json
+import socket
+import argparse
+
+from .canvas_utils import blit_array
+from .network_frames import FrameDecoder, recv_exactly, max_packet_size, LENGTH, DEFAULT_PORT
+from .displays.rgb_matrix_display import RGBMatrixDisplay
+from .displays.virtual_display import VirtualDisplay
+
+# Display backends frames can be shown on, without loading the apps
+displays = {
+    "rgbmatrix": RGBMatrixDisplay,
+    "virtual": VirtualDisplay,
+}
+
+class FrameReceiver(object):
+    """
+    Listens for frames from a sender, and swaps each one onto a matrix as
+    soon as its last packet arrives
+    """
+    def __init__(self, matrix, port=DEFAULT_PORT, protocol="tcp"):
+        """
+        Initialize the receiver for a matrix
+        """
+        self.matrix = matrix
+        self.canvas = matrix.CreateFrameCanvas()
+        self.port = port
+        self.protocol = protocol
+        self.decoder = FrameDecoder(matrix.width, matrix.height)
+        self.max_packet_size = max_packet_size(matrix.width, matrix.height)
+        self.frames_shown = 0
+
+    def show_frame(self):
+        """
+        Show the frame decoded so far
+        """
+        blit_array(self.canvas, self.decoder.framebuffer)
+        self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        self.frames_shown += 1
+
+    def receive_packet(self, packet):
+        """
+        Apply a received packet, showing the frame if it was the last packet of it
+        """
+        try:
+            if self.decoder.decode(packet):
+                self.show_frame()
+        except Exception as err:
+            print("Exception decoding frame packet: %s" % err)
+
+    def run_tcp(self, server):
+        """
+        Receive frames from one sender at a time
+        """
+        server.listen(1)
+        while True:
+            conn, addr = server.accept()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print("Receiving frames from %s:%d" % addr)
+            try:
+                while True:
+                    length = recv_exactly(conn, LENGTH.size)
+                    if length is None:
+                        break
+                    # Never trust the sender to allocate more than a frame
+                    length = LENGTH.unpack(length)[0]
+                    if length > self.max_packet_size:
+                        print("Dropping connection sending a %d byte packet" % length)
+                        break
+                    packet = recv_exactly(conn, length)
+                    if packet is None:
+                        break
+                    self.receive_packet(packet)
+            except OSError as err:
+                print("Exception receiving frames: %s" % err)
+            conn.close()
+
+    def run_udp(self, server):
+        """
+        Receive frames from any sender
+        """
+        while True:
+            packet = server.recv(65535)
+            self.receive_packet(packet)
+
+    def run(self):
+        """
+        Main receiver loop
+        """
+        if self.protocol == "udp":
+            server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("0.0.0.0", self.port))
+
+        try:
+            if self.protocol == "udp":
+                self.run_udp(server)
+            else:
+                self.run_tcp(server)
+        finally:
+            server.close()
+
+def main():
+    """
+    Show frames from a remote display on the LED matrix configured in
+    "$LED_DISPLAY_CONFIG/system.json"
+    """
+    parser = argparse.ArgumentParser(description="Show frames streamed from another LED display")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--protocol", choices=["tcp", "udp"], default="tcp", help="Protocol the sender uses")
+    args = parser.parse_args()
+
+    config_directory = os.getenv("LED_DISPLAY_CONFIG")
+    if config_directory is None:
+        config_directory = os.path.join(os.getcwd(), "config")
+    with open(os.path.join(config_directory, "system.json")) as f:
+        config = json.loads(f.read())
+
+    backend = config["display"].get("backend", "rgbmatrix")
+    if backend not in displays:
+        raise Exception("Frames can't be received on the %s display backend" % backend)
+    matrix = displays[backend](config).create_matrix()
+
+    FrameReceiver(matrix, args.port, args.protocol).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+################################################################################
+# frame_scheduler.py
+#-------------------------------------------------------------------------------
+# Frame scheduler which drives an app's tick callbacks and display updates at
+# a target frame rate.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import time
+import weakref
+import threading
+import collections
+
+class TickCallback(object):
+    """
+    A function called periodically by the frame scheduler
+    """
+    def __init__(self, callback, interval, next_time):
+        """
+        Initialize the callback with an interval in seconds (None for every frame)
+        """
+        self.callback = callback
+        self.interval = interval
+        self.next_time = next_time
+
+class FrameScheduler(object):
+    """
+    Drives an app's frames: runs tick callbacks when they are due, and updates
+    and draws the display at a target frame rate. Frames are skipped when no
+    control has changed and none are animating, sleeping until a control is
+    invalidated or a callback is due.
+    """
+    def __init__(self, app, frame_rate):
+        """
+        Initialize the scheduler for an app
+        """
+        self.app = weakref.ref(app)
+        self.frame_rate = frame_rate
+        self.callbacks = []
+        self.pending_calls = collections.deque()
+        self.wake_event = threading.Event()
+
+        # Time of the frame being run, which animations use as their clock
+        self.frame_time = time.monotonic()
+
+    def add_tick_callback(self, callback, interval=None):
+        """
+        Call a function every "interval" seconds, or every frame if None. If the
+        function returns a number, it is the delay in seconds until its next call.
+        """
+        self.callbacks += [TickCallback(callback, interval, time.monotonic())]
+        self.wake()
+
+    def remove_tick_callback(self, callback):
+        """
+        Stop calling a function
+        """
+        self.callbacks = [tick for tick in self.callbacks if tick.callback != callback]
+
+    def call_soon(self, callback):
+        """
+        Call a function once, at the start of the next frame
+        """
+        self.pending_calls.append(callback)
+        self.wake()
+
+    def wake(self):
+        """
+        Wake the scheduler if it is sleeping, such as after a control changed
+        """
+        self.wake_event.set()
+
+    def run_frame(self, now):
+        """
+        Run the callbacks due at time "now", then update and draw the display
+        if needed. Returns whether a frame was drawn.
+        """
+        self.frame_time = now
+
+        while len(self.pending_calls) > 0:
+            self.pending_calls.popleft()()
+
+        for tick in list(self.callbacks):
+            if tick.next_time <= now:
+                delay = tick.callback()
+                if delay is not None:
+                    tick.next_time = now + delay
+                elif tick.interval is not None:
+                    # Keep a fixed cadence, unless we have fallen behind
+                    tick.next_time = max(tick.next_time + tick.interval, now)
+                else:
+                    tick.next_time = now
+
+        app = self.app()
+        with app.render_lock:
+            if not app.needs_update():
+                return False
+            app.update()
+            app.draw()
+        return True
+
+    def run(self, stop_event):
+        """
+        Run frames until "stop_event" is set
+        """
+        period = 1.0 / self.frame_rate
+        next_frame = time.monotonic()
+
+        while not stop_event.is_set():
+            now = time.monotonic()
+            self.run_frame(now)
+            self.wake_event.clear()
+
+            # Schedule against fixed deadlines so frame timing doesn't drift,
+            # skipping any frames we have fallen too far behind on
+            next_frame += period
+            if next_frame < now:
+                next_frame = now + period
+
+            # Animating apps draw every frame, while static apps sleep until a
+            # control changes or a callback is due
+            app = self.app()
+            animating = not app.is_static()
+            if animating or app.needs_update() or len(self.pending_calls) > 0:
+                wake_time = next_frame
+            else:
+                wake_time = None
+            app = None
+
+            for tick in self.callbacks:
+                next_time = max(tick.next_time, next_frame) if tick.interval is None else tick.next_time
+                if wake_time is None or next_time < wake_time:
+                    wake_time = next_time
+
+            if wake_time is None:
+                self.wake_event.wait()
+            else:
+                timeout = wake_time - time.monotonic()
+                if timeout > 0:
+                    if animating:
+                        stop_event.wait(timeout)
+                    else:
+                        self.wake_event.wait(timeout)
+
+class FramePacer(object):
+    """
+    Paces a loop that runs its own frames, sleeping until fixed deadlines so the
+    time spent in the loop body doesn't add up to drift
+    """
+    def __init__(self, stop_event):
+        """
+        Initialize the pacer, which stops waiting when "stop_event" is set
+        """
+        self.stop_event = stop_event
+        self.next_time = None
+
+    def wait(self, period):
+        """
+        Wait until "period" seconds after the previous deadline. Returns True if
+        the stop event was set.
+        """
+        now = time.monotonic()
+        if self.next_time is None or self.next_time + period < now:
+            self.next_time = now
+        self.next_time += period
+        return self.stop_event.wait(max(self.next_time - now, 0.0))
+
+    def reset(self):
+        """
+        Start pacing again from now, such as after pausing
+        """
+        self.next_time = None
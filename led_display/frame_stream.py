@@ -0,0 +1,264 @@
+################################################################################
+# frame_stream.py
+#-------------------------------------------------------------------------------
+# Container of pre-rendered, panel-sized RGB frames for fast playback, and a
+# converter to build one from a sequence of images
+#
+# Usage: python -m led_display.frame_stream output.ledf input [input ...] --width 64 --height 64 --fps 30
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+
+import numpy
+from PIL import Image
+
+# File header: magic, version, width, height, frames per second, frame count
+HEADER = struct.Struct("<4sHHHfI")
+MAGIC = b"LEDF"
+VERSION = 1
+
+# Frame table entry: data offset, data length, encoding
+FRAME_ENTRY = struct.Struct("<QIB3x")
+
+# Frame encodings:
+# - raw: height * width * 3 bytes of RGB
+# - rle: run count N (uint32), N run lengths (uint16), then N RGB colors
+# - delta: changed pixel count N (uint32), N pixel indices (uint32), then N RGB
+#   colors, applied to the previous frame
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+ENCODING_DELTA = 2
+
+COUNT = struct.Struct("<I")
+
+def encode_rle(pixels):
+    """
+    Run-length encode an (N, 3) array of pixels
+    """
+    changes = numpy.flatnonzero(numpy.any(pixels[1:] != pixels[:-1], axis=1)) + 1
+    starts = numpy.concatenate(([0], changes))
+    lengths = numpy.diff(numpy.concatenate((starts, [len(pixels)])))
+
+    # Split runs too long for a uint16 length
+    splits = (lengths - 1) // 0xFFFF
+    if splits.any():
+        starts = numpy.repeat(starts, splits + 1) + numpy.concatenate([numpy.arange(count + 1) * 0xFFFF for count in splits])
+        lengths = numpy.diff(numpy.concatenate((starts, [len(pixels)])))
+
+    return COUNT.pack(len(starts)) + lengths.astype("<u2").tobytes() + pixels[starts].tobytes()
+
+def decode_rle(data, offset=0):
+    """
+    Decode run-length encoded pixels from a buffer into an (N, 3) array
+    """
+    count = COUNT.unpack_from(data, offset)[0]
+    offset += COUNT.size
+    lengths = numpy.frombuffer(data, dtype="<u2", count=count, offset=offset)
+    colors = numpy.frombuffer(data, dtype=numpy.uint8, count=count * 3, offset=offset + count * 2).reshape(-1, 3)
+    return numpy.repeat(colors, lengths, axis=0)
+
+def encode_delta(pixels, previous):
+    """
+    Encode the pixels of an (N, 3) array which differ from the previous frame
+    """
+    indices = numpy.flatnonzero(numpy.any(pixels != previous, axis=1))
+    return COUNT.pack(len(indices)) + indices.astype("<u4").tobytes() + pixels[indices].tobytes()
+
+class FrameStreamWriter(object):
+    """
+    Writes frames to a frame stream file, storing each in whichever encoding is smallest
+    """
+    def __init__(self, path, width, height, frame_rate, keyframe_interval=30):
+        """
+        Create the file. Every "keyframe_interval" frames is stored without
+        reference to the previous frame, bounding the cost of seeking.
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.frame_rate = frame_rate
+        self.keyframe_interval = keyframe_interval
+        self.entries = []
+        self.previous = None
+        self.file = open(path + ".tmp", "wb")
+        self.file.write(b"\0" * HEADER.size)
+
+    def add_frame(self, frame):
+        """
+        Add a (height, width, 3) uint8 array as the next frame
+        """
+        pixels = numpy.ascontiguousarray(frame, dtype=numpy.uint8).reshape(-1, 3)
+        if len(pixels) != self.width * self.height:
+            raise Exception("Frame is not %dx%d" % (self.width, self.height))
+
+        candidates = [(ENCODING_RAW, pixels.tobytes()), (ENCODING_RLE, encode_rle(pixels))]
+        if self.previous is not None and len(self.entries) % self.keyframe_interval != 0:
+            candidates += [(ENCODING_DELTA, encode_delta(pixels, self.previous))]
+        encoding, data = min(candidates, key=lambda candidate: len(candidate[1]))
+
+        self.entries += [(self.file.tell(), len(data), encoding)]
+        self.file.write(data)
+        self.previous = pixels
+
+    def close(self):
+        """
+        Write the frame table and header, and move the file into place
+        """
+        table_offset = self.file.tell()
+        for entry in self.entries:
+            self.file.write(FRAME_ENTRY.pack(*entry))
+        self.file.write(struct.pack("<Q", table_offset))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.frame_rate, len(self.entries)))
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+class FrameStream(object):
+    """
+    A frame stream file, memory-mapped for playback. Raw frames are returned
+    as views of the mapping, without copying; compressed frames are decoded
+    into a reused buffer.
+    """
+    def __init__(self, path):
+        """
+        Open and map a frame stream file
+        """
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, self.frame_rate, self.frame_count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("%s is not a frame stream file" % path)
+
+        table_offset = struct.unpack_from("<Q", self.data, len(self.data) - 8)[0]
+        self.entries = [FRAME_ENTRY.unpack_from(self.data, table_offset + i * FRAME_ENTRY.size) for i in range(self.frame_count)]
+
+        self.buffer = numpy.zeros((self.height * self.width, 3), dtype=numpy.uint8)
+        self.buffer_index = None
+
+    def _view(self, offset, dtype, count):
+        """
+        View part of the mapping as an array, without copying
+        """
+        return numpy.frombuffer(self.data, dtype=dtype, count=count, offset=offset)
+
+    def _decode(self, index):
+        """
+        Decode a compressed frame into the buffer, which must hold the previous
+        frame for a delta frame
+        """
+        offset, length, encoding = self.entries[index]
+        if encoding == ENCODING_RAW:
+            self.buffer[:] = self._view(offset, numpy.uint8, length).reshape(-1, 3)
+            self.buffer_index = index
+            return
+
+        if encoding == ENCODING_RLE:
+            self.buffer[:] = decode_rle(self.data, offset)
+        elif encoding == ENCODING_DELTA:
+            count = COUNT.unpack_from(self.data, offset)[0]
+            offset += COUNT.size
+            indices = self._view(offset, "<u4", count)
+            self.buffer[indices] = self._view(offset + count * 4, numpy.uint8, count * 3).reshape(-1, 3)
+        self.buffer_index = index
+
+    def get_frame(self, index):
+        """
+        Retrieve a frame as a (height, width, 3) uint8 array, which is only
+        valid until the next call
+        """
+        offset, length, encoding = self.entries[index]
+        if encoding == ENCODING_RAW:
+            return self._view(offset, numpy.uint8, length).reshape(self.height, self.width, 3)
+
+        if encoding == ENCODING_DELTA and self.buffer_index != index - 1:
+            # Seeking, so decode forward from the last frame not based on its predecessor
+            start = index - 1
+            while self.entries[start][2] == ENCODING_DELTA:
+                start -= 1
+            for i in range(start, index):
+                self._decode(i)
+
+        if self.buffer_index != index:
+            self._decode(index)
+        return self.buffer.reshape(self.height, self.width, 3)
+
+    def close(self):
+        """
+        Unmap the file
+        """
+        self.data.close()
+
+def load_frames(paths, width, height):
+    """
+    Load a sequence of images (including every frame of animated images) as
+    (height, width, 3) arrays, each scaled to fit and centered on black
+    """
+    for path in paths:
+        image = Image.open(path)
+        for frame_num in range(getattr(image, "n_frames", 1)):
+            image.seek(frame_num)
+            frame = image.convert("RGB")
+            frame.thumbnail((width, height), Image.LANCZOS)
+            canvas = Image.new("RGB", (width, height))
+            canvas.paste(frame, ((width - frame.width) // 2, (height - frame.height) // 2))
+            yield numpy.asarray(canvas)
+
+def main():
+    """
+    Convert a sequence of images into a frame stream file
+    """
+    parser = argparse.ArgumentParser(description="Convert images into an LED display frame stream")
+    parser.add_argument("output", help="Frame stream file to write")
+    parser.add_argument("inputs", nargs="+", help="Images in order, or folders of images played in filename order")
+    parser.add_argument("--width", type=int, default=64, help="Panel width in pixels")
+    parser.add_argument("--height", type=int, default=64, help="Panel height in pixels")
+    parser.add_argument("--fps", type=float, default=30.0, help="Playback frame rate")
+    parser.add_argument("--keyframe-interval", type=int, default=30, help="Frames between frames stored without deltas")
+    args = parser.parse_args()
+
+    paths = []
+    for input_path in args.inputs:
+        if os.path.isdir(input_path):
+            paths += [os.path.join(input_path, filename) for filename in sorted(os.listdir(input_path))]
+        else:
+            paths += [input_path]
+
+    writer = FrameStreamWriter(args.output, args.width, args.height, args.fps, args.keyframe_interval)
+    for frame in load_frames(paths, args.width, args.height):
+        writer.add_frame(frame)
+    writer.close()
+
+    size = os.path.getsize(args.output)
+    raw_size = len(writer.entries) * args.width * args.height * 3
+    print("Wrote %d frames to %s (%d bytes, %.1f%% of raw)" % (len(writer.entries), args.output, size, 100.0 * size / max(raw_size, 1)))
+
+if __name__ == "__main__":
+    main()
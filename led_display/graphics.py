@@ -0,0 +1,314 @@
+################################################################################
+# graphics.py
+#-------------------------------------------------------------------------------
+# Drawing primitives (fonts, colors, text, lines), compatible with both the
+# rpi-rgb-led-matrix canvases and virtual framebuffer canvases.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import numpy
+
+from .displays.virtual_display import VirtualCanvas
+
+try:
+    from rgbmatrix import graphics as rgbmatrix_graphics
+except ImportError:
+    rgbmatrix_graphics = None
+
+# Glyph drawn in place of characters missing from a font
+REPLACEMENT_CODEPOINT = 0xFFFD
+
+class Color(object):
+    """
+    An RGB color, with components from 0 to 255
+    """
+    def __init__(self, red=0, green=0, blue=0):
+        """
+        Initialize the color
+        """
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self._native = None
+
+    def __getstate__(self):
+        """
+        Retrieve the color's state for pickling, without the rgbmatrix Color
+        """
+        state = self.__dict__.copy()
+        state["_native"] = None
+        return state
+
+    def get_native(self):
+        """
+        Retrieve the equivalent rgbmatrix Color, for drawing to an LED matrix
+        """
+        if self._native is None:
+            self._native = rgbmatrix_graphics.Color(self.red, self.green, self.blue)
+        return self._native
+
+class Glyph(object):
+    """
+    A single character of a BDF font
+    """
+    def __init__(self, device_width, x_offset, y_offset, mask):
+        """
+        Initialize the glyph from its metrics and a boolean (height, width) bitmap
+        """
+        self.device_width = device_width
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.mask = mask
+
+class Font(object):
+    """
+    A BDF font, loaded in Python for drawing to virtual canvases and lazily
+    loaded by rgbmatrix for drawing to an LED matrix
+    """
+    def __init__(self):
+        """
+        Initialize an empty font
+        """
+        self.height = 0
+        self.baseline = 0
+        self.glyphs = {}
+        self.first_codepoint = 0
+        self.widths = numpy.zeros(0, dtype=numpy.int32)
+        self.ascents = numpy.zeros(0, dtype=numpy.int32)
+        self.missing_width = 0
+        self._path = None
+        self._outline_of = None
+        self._native = None
+
+    def LoadFont(self, path):
+        """
+        Load a BDF font file
+        """
+        glyphs = {}
+        codepoint = None
+        device_width = 0
+        bbx = None
+        rows = None
+
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if not fields:
+                    continue
+
+                if rows is not None:
+                    if fields[0] == "ENDCHAR":
+                        if codepoint is not None and codepoint >= 0 and bbx is not None:
+                            glyphs[codepoint] = Glyph(device_width, bbx[2], bbx[3], self._decode_bitmap(rows, bbx[0], bbx[1]))
+                        rows = None
+                    else:
+                        rows += [fields[0]]
+                elif fields[0] == "FONTBOUNDINGBOX":
+                    self.height = int(fields[2])
+                    self.baseline = self.height + int(fields[4])
+                elif fields[0] == "STARTCHAR":
+                    codepoint = None
+                    device_width = 0
+                    bbx = None
+                elif fields[0] == "ENCODING":
+                    codepoint = int(fields[1])
+                elif fields[0] == "DWIDTH":
+                    device_width = int(fields[1])
+                elif fields[0] == "BBX":
+                    bbx = [int(field) for field in fields[1:5]]
+                elif fields[0] == "BITMAP":
+                    rows = []
+
+        self.glyphs = glyphs
+        self._path = path
+        self._build_metrics()
+        return True
+
+    def _build_metrics(self):
+        """
+        Build the width and ascent tables, indexed by codepoint from "first_codepoint"
+        through the last codepoint in the font. Codepoints missing from the font
+        have the metrics of the replacement character they are drawn with.
+        """
+        replacement = self.glyphs.get(REPLACEMENT_CODEPOINT)
+        self.missing_width = replacement.device_width if replacement is not None else 0
+        missing_ascent = replacement.mask.shape[0] + replacement.y_offset if replacement is not None else 0
+
+        if len(self.glyphs) == 0:
+            self.first_codepoint = 0
+            self.widths = numpy.zeros(0, dtype=numpy.int32)
+            self.ascents = numpy.zeros(0, dtype=numpy.int32)
+            return
+
+        self.first_codepoint = min(self.glyphs)
+        size = max(self.glyphs) - self.first_codepoint + 1
+        self.widths = numpy.full(size, self.missing_width, dtype=numpy.int32)
+        self.ascents = numpy.full(size, missing_ascent, dtype=numpy.int32)
+        for codepoint, glyph in self.glyphs.items():
+            self.widths[codepoint - self.first_codepoint] = glyph.device_width
+            self.ascents[codepoint - self.first_codepoint] = glyph.mask.shape[0] + glyph.y_offset
+
+    def _table_indices(self, text):
+        """
+        Convert text to indices into the metrics tables, and a mask of which are in range
+        """
+        indices = numpy.frombuffer(text.encode("utf-32-le"), dtype=numpy.uint32).astype(numpy.int64) - self.first_codepoint
+        return indices, (indices >= 0) & (indices < len(self.widths))
+
+    def TextWidth(self, text):
+        """
+        Retrieve the width of a line of text, as drawn by DrawText
+        """
+        if len(text) == 0:
+            return 0
+        indices, in_range = self._table_indices(text)
+        return int(self.widths[indices[in_range]].sum()) + self.missing_width * int(len(indices) - in_range.sum())
+
+    def TextAscent(self, text):
+        """
+        Retrieve the height of the tallest character in a line of text above the baseline
+        """
+        if len(text) == 0:
+            return 0
+        indices, in_range = self._table_indices(text)
+        ascent = int(self.ascents[indices[in_range]].max()) if in_range.any() else 0
+        if not in_range.all() and REPLACEMENT_CODEPOINT in self.glyphs:
+            glyph = self.glyphs[REPLACEMENT_CODEPOINT]
+            ascent = max(ascent, glyph.mask.shape[0] + glyph.y_offset)
+        return ascent
+
+    @staticmethod
+    def _decode_bitmap(rows, width, height):
+        """
+        Decode hex BDF bitmap rows into a boolean (height, width) array
+        """
+        if height == 0 or width == 0:
+            return numpy.zeros((height, width), dtype=bool)
+        row_bytes = numpy.frombuffer(bytes.fromhex("".join(rows[:height])), dtype=numpy.uint8)
+        bits = numpy.unpackbits(row_bytes.reshape(height, -1), axis=1)
+        return bits[:, :width].astype(bool)
+
+    def CharacterWidth(self, codepoint):
+        """
+        Retrieve the width of a character, or -1 if it is not in the font
+        """
+        glyph = self.glyphs.get(codepoint)
+        if glyph is None:
+            return -1
+        return glyph.device_width
+
+    def CreateOutlineFont(self):
+        """
+        Create a new font which draws a one pixel outline around each character
+        """
+        outline = Font()
+        outline.height = self.height + 2
+        outline.baseline = self.baseline + 1
+        outline._outline_of = self
+
+        for codepoint, glyph in self.glyphs.items():
+            height, width = glyph.mask.shape
+            padded = numpy.zeros((height + 2, width + 2), dtype=bool)
+            padded[1:-1, 1:-1] = glyph.mask
+            grown = numpy.zeros_like(padded)
+            for dy in range(3):
+                for dx in range(3):
+                    grown[dy:dy+height, dx:dx+width] |= glyph.mask
+            outline.glyphs[codepoint] = Glyph(glyph.device_width + 2, glyph.x_offset, glyph.y_offset - 1, grown & ~padded)
+
+        outline._build_metrics()
+        return outline
+
+    def find_glyph(self, codepoint):
+        """
+        Retrieve the glyph drawn for a codepoint, falling back to the replacement character
+        """
+        glyph = self.glyphs.get(codepoint)
+        if glyph is None:
+            glyph = self.glyphs.get(REPLACEMENT_CODEPOINT)
+        return glyph
+
+    def get_native(self):
+        """
+        Retrieve the equivalent rgbmatrix Font, for drawing to an LED matrix
+        """
+        if self._native is None:
+            if self._outline_of is not None:
+                self._native = self._outline_of.get_native().CreateOutlineFont()
+            else:
+                self._native = rgbmatrix_graphics.Font()
+                self._native.LoadFont(self._path)
+        return self._native
+
+def DrawText(canvas, font, x, y, color, text):
+    """
+    Draw text with its baseline at (x, y), returning the width of the drawn text
+    """
+    if not isinstance(canvas, VirtualCanvas):
+        return rgbmatrix_graphics.DrawText(canvas, font.get_native(), int(x), int(y), color.get_native(), text)
+
+    x = int(x)
+    y = int(y)
+    start_x = x
+
+    for character in text:
+        glyph = font.find_glyph(ord(character))
+        if glyph is None:
+            continue
+        canvas.draw_mask(glyph.mask, x + glyph.x_offset, y - glyph.mask.shape[0] - glyph.y_offset, color.red, color.green, color.blue)
+        x += glyph.device_width
+
+    return x - start_x
+
+def DrawLine(canvas, x0, y0, x1, y1, color):
+    """
+    Draw a line from (x0, y0) to (x1, y1), inclusive
+    """
+    if not isinstance(canvas, VirtualCanvas):
+        return rgbmatrix_graphics.DrawLine(canvas, int(x0), int(y0), int(x1), int(y1), color.get_native())
+
+    x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+    dx = x1 - x0
+    dy = y1 - y0
+
+    # Same fixed-point stepping as rgbmatrix, so lines match pixel for pixel
+    if abs(dx) > abs(dy):
+        if x1 < x0:
+            x0, y0, x1, y1, dx, dy = x1, y1, x0, y0, -dx, -dy
+        xs = numpy.arange(x0, x1 + 1)
+        ys = (0x8000 + (y0 << 16) + numpy.arange(dx + 1) * int((dy << 16) / dx)) >> 16
+    elif dy != 0:
+        if y1 < y0:
+            x0, y0, x1, y1, dx, dy = x1, y1, x0, y0, -dx, -dy
+        ys = numpy.arange(y0, y1 + 1)
+        xs = (0x8000 + (x0 << 16) + numpy.arange(dy + 1) * int((dx << 16) / dy)) >> 16
+    else:
+        xs = numpy.array([x0])
+        ys = numpy.array([y0])
+
+    # Clipped the same as other drawing, which may be limited to part of the canvas
+    left, top, right, bottom = canvas.clip(0, 0, canvas.width, canvas.height)
+    visible = (xs >= left) & (xs < right) & (ys >= top) & (ys < bottom)
+    canvas.framebuffer[ys[visible], xs[visible]] = (color.red, color.green, color.blue)
@@ -0,0 +1,133 @@
+################################################################################
+# image_cache.py
+#-------------------------------------------------------------------------------
+# Process-wide cache of decoded and resized images
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import threading
+import collections
+
+from PIL import Image
+
+from .thumbnail_cache import thumbnails, decode_image
+
+def load_image(path, size, resample=Image.BICUBIC, mode="RGB"):
+    """
+    Load an image file shrunk to fit within "size" (width, height) and
+    converted to "mode", through the on-disk thumbnail cache for RGB images
+    """
+    if mode == "RGB":
+        return thumbnails.get(path, size, resample)
+    return decode_image(path, size, resample, mode)
+
+def image_has_alpha(path):
+    """
+    Returns whether an image file has transparency, reading only its header
+    """
+    with Image.open(path) as image:
+        return image.mode in ("RGBA", "LA", "PA", "RGBa", "La") or "transparency" in image.info
+
+class ImageCache(object):
+    """
+    Least recently used cache of images decoded from disk and resized to fit a
+    target size, keyed by path, modification time, target size and resample
+    mode. Cached images are shared, so they must not be modified.
+    """
+    def __init__(self, max_bytes=32*1024*1024):
+        """
+        Initialize an empty cache, holding up to "max_bytes" of decoded pixel data
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def image_bytes(image):
+        """
+        Estimate the memory used by an image's pixel data
+        """
+        return image.width * image.height * len(image.getbands())
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Change the memory cap, evicting images if needed
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove least recently used images until the cache is within its cap
+        """
+        while self.total_bytes > self.max_bytes and len(self.entries) > 0:
+            key, image = self.entries.popitem(last=False)
+            self.total_bytes -= self.image_bytes(image)
+
+    def get(self, path, size, resample=Image.BICUBIC, mode="RGB"):
+        """
+        Retrieve an image file shrunk to fit within "size" (width, height) and
+        converted to "mode", decoding it only if it isn't already cached. With a
+        mode of None, the image is RGBA if the file has transparency or RGB
+        otherwise, so the file is only read to check when it isn't cached.
+        """
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns, tuple(size), resample, mode)
+
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        if mode is None:
+            image = load_image(path, size, resample, "RGBA" if image_has_alpha(path) else "RGB")
+        else:
+            image = load_image(path, size, resample, mode)
+
+        with self.lock:
+            if key not in self.entries and self.image_bytes(image) <= self.max_bytes:
+                self.entries[key] = image
+                self.total_bytes += self.image_bytes(image)
+                self._evict()
+        return image
+
+    def clear(self):
+        """
+        Remove all cached images
+        """
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+# Shared by all apps, so switching between screens doesn't decode images again
+decoded_images = ImageCache()
@@ -36,6 +36,19 @@ import os
 from . import addons
 from .app_base import AppBase
 from .controllers.joystick_translator import JoystickTranslator
+from .image_cache import decoded_images
+from .thumbnail_cache import thumbnails
+from .transitions import Transition, transition_types
+from .color_correction import color_correction
+
+def without_color_correction(config):
+    """
+    Copy a system configuration, leaving out the color correction settings
+    """
+    config = dict(config)
+    config["display"] = dict(config.get("display", {}))
+    config["display"].pop("colorCorrection", None)
+    return config
 
 class MainApp(AppBase):
     """
@@ -68,6 +81,16 @@ class MainApp(AppBase):
         # AppBase initialization
         super(MainApp, self).__init__(system_config, {}, self.loaded_fonts, config_directory=config_directory)
 
+        # Memory cap for decoded images shared between apps
+        decoded_images.set_max_bytes(system_config["settings"].get("imageCacheMegabytes", 32) * 1024 * 1024)
+
+        # Display-ready thumbnails persisted between runs
+        thumbnail_directory = system_config["settings"].get("thumbnailCacheDirectory", thumbnails.directory)
+        thumbnails.configure(thumbnail_directory or None, system_config["settings"].get("thumbnailCacheMegabytes", 64) * 1024 * 1024)
+
+        # Brightness, gamma and white balance applied to every frame
+        color_correction.configure(system_config["display"].get("colorCorrection"))
+
         # Check if display should turn on at boot?
         self.off_at_boot = system_config["settings"]["displayOffAfterBoot"]
 
@@ -77,6 +100,15 @@ class MainApp(AppBase):
         self.screen_index = 0
         self.restart_app = False
 
+        # Transitions between screens, which may be overridden per screen. The
+        # budget is the longest time from navigating to the next screen being
+        # fully shown, including its startup time.
+        self.transition_defaults = system_config["settings"].get("transition", {"type": "crossfade", "duration": 0.25})
+        self.transition_budget = system_config["settings"].get("transitionBudget", 0.5)
+        self.transition_frame_rate = system_config["settings"].get("transitionFrameRate", 60)
+        self.navigation_time = None
+        self.navigation_direction = 1
+
         # Translate joystick data to input events
         self.joystick_translator = JoystickTranslator()
 
@@ -97,6 +129,7 @@ class MainApp(AppBase):
         """
         self.terminate_event.set()
         self.stop_running_app()
+        self.stop()
 
     def save_screen_order(self, config_directory, screen_order):
         """
@@ -106,6 +139,27 @@ class MainApp(AppBase):
         with open(screen_order_path, "w") as f:
             f.writelines(screen_order)
 
+    def set_config(self, config):
+        """
+        Apply a new system configuration. Color correction changes take effect
+        on the running app; any other change restarts it.
+        """
+        previous_config = self.config
+        self.config = config
+        self.set_color_correction(config.get("display", {}).get("colorCorrection"))
+        if without_color_correction(config) != without_color_correction(previous_config):
+            self.reload_running_app()
+
+    def set_color_correction(self, settings):
+        """
+        Change the color correction live, redrawing the running app
+        """
+        color_correction.configure(settings)
+        app = self.running_app
+        while app is not None:
+            app.scheduler.wake()
+            app = app.running_app
+
     def get_state(self):
         """
         Retrieve the current app state
@@ -129,12 +183,12 @@ class MainApp(AppBase):
             if input_event == "right":
                 self.screen_index += 1
                 self.screen_index %= len(self.screen_order)
-                self.stop_running_app()
+                self.navigate(1)
                 handled = True
             elif input_event == "left":
                 self.screen_index -= 1
                 self.screen_index %= len(self.screen_order)
-                self.stop_running_app()
+                self.navigate(-1)
                 handled = True
 
         if not handled:
@@ -146,6 +200,35 @@ class MainApp(AppBase):
 
         return handled
 
+    def navigate(self, direction):
+        """
+        Stop the current screen to move to the next (direction 1) or previous
+        (direction -1) one, transitioning from it if it's showing
+        """
+        if self.running_app is not None:
+            self.navigation_time = time.monotonic()
+            self.navigation_direction = direction
+            self.stop_running_app()
+        else:
+            self.navigation_time = None
+
+    def create_transition(self, app_config):
+        """
+        Returns the Transition to play when starting a screen after navigating
+        to it, or None to show it straight away
+        """
+        navigation_time, self.navigation_time = self.navigation_time, None
+        if navigation_time is None or self.last_frame is None:
+            return None
+
+        settings = dict(self.transition_defaults)
+        settings.update(app_config.get("transition", {}))
+        if settings.get("type", "none") not in transition_types:
+            return None
+
+        return Transition(self.last_frame, settings["type"], settings.get("duration", 0.25),
+            self.navigation_direction, navigation_time + self.transition_budget, self.transition_frame_rate)
+
     def on_joystick_press(self, button, button_states):
         """
         Handle a joystick button press. Return true if handled.
@@ -0,0 +1,207 @@
+################################################################################
+# network_frames.py
+#-------------------------------------------------------------------------------
+# Protocol for streaming frames to remote displays, sending only the tiles
+# which changed since the previous frame, compressed when it helps.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import struct
+
+import numpy
+
+from .frame_stream import encode_rle, decode_rle, ENCODING_RAW, ENCODING_RLE
+
+DEFAULT_PORT = 7890
+
+# Packet header: magic, version, flags, frame number, frame width, frame
+# height, packet index, packet count, tile count
+PACKET_HEADER = struct.Struct("<4sBBIHHHHH")
+MAGIC = b"LEDN"
+VERSION = 1
+
+# Packet flags: a keyframe has every tile of the frame, not only changed ones
+FLAG_KEYFRAME = 0x01
+
+# Tile header: x, y, width, height, encoding, data length. Tiles are encoded
+# like frame stream frames, raw or run-length encoded.
+TILE_HEADER = struct.Struct("<HHHHBI")
+
+# Length prefix of each packet sent over TCP
+LENGTH = struct.Struct("<I")
+
+# Largest UDP packet sent, unless a single tile is bigger, to avoid IP
+# fragmentation on typical networks
+MAX_DATAGRAM_SIZE = 1400
+
+def max_packet_size(width, height):
+    """
+    Largest packet a frame of up to width x height can be sent in: a header per
+    tile, with at most as many tiles as pixels, and no more than the raw pixels
+    """
+    return PACKET_HEADER.size + width * height * (TILE_HEADER.size + 3)
+
+def recv_exactly(sock, length):
+    """
+    Receive exactly "length" bytes from a TCP socket, or None if it closed first
+    """
+    data = bytearray(length)
+    view = memoryview(data)
+    received = 0
+    while received < length:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return None
+        received += count
+    return data
+
+class FrameEncoder(object):
+    """
+    Encodes frames into packets for one receiver, with only the tiles which
+    differ from the last frame encoded
+    """
+    def __init__(self, tile_size=16):
+        """
+        Initialize the encoder, which sends a keyframe first
+        """
+        self.tile_size = tile_size
+        self.previous = None
+        self.frame_num = 0
+
+    def reset(self):
+        """
+        Send a keyframe next, such as after reconnecting to the receiver
+        """
+        self.previous = None
+
+    def encode_tile(self, pixels):
+        """
+        Encode a tile's pixels in whichever encoding is smaller, as (encoding, data)
+        """
+        pixels = pixels.reshape(-1, 3)
+        raw = pixels.tobytes()
+        rle = encode_rle(pixels)
+        if len(rle) < len(raw):
+            return (ENCODING_RLE, rle)
+        return (ENCODING_RAW, raw)
+
+    def get_changed_tiles(self, frame):
+        """
+        Retrieve the (x, y, width, height) tiles of a frame which differ from
+        the previous frame
+        """
+        height, width = frame.shape[:2]
+        xs = numpy.arange(0, width, self.tile_size)
+        ys = numpy.arange(0, height, self.tile_size)
+
+        if self.previous is None or self.previous.shape != frame.shape:
+            changed = numpy.ones((len(ys), len(xs)), dtype=bool)
+        else:
+            # Reduce the changed pixels to one flag per tile
+            changed = numpy.any(frame != self.previous, axis=2)
+            changed = numpy.logical_or.reduceat(numpy.logical_or.reduceat(changed, ys, axis=0), xs, axis=1)
+
+        return [(int(xs[col]), int(ys[row]), min(self.tile_size, width - int(xs[col])), min(self.tile_size, height - int(ys[row])))
+            for row, col in zip(*numpy.nonzero(changed))]
+
+    def encode(self, frame, keyframe=False, max_packet_size=None):
+        """
+        Encode a (height, width, 3) uint8 frame into a list of packets, split
+        so each is no larger than "max_packet_size" if possible. Returns no
+        packets if nothing changed.
+        """
+        if keyframe:
+            self.previous = None
+        flags = FLAG_KEYFRAME if self.previous is None else 0
+        tiles = self.get_changed_tiles(frame)
+        if len(tiles) == 0:
+            return []
+
+        encoded = []
+        for x, y, width, height in tiles:
+            encoding, data = self.encode_tile(frame[y:y+height, x:x+width])
+            encoded += [TILE_HEADER.pack(x, y, width, height, encoding, len(data)) + data]
+
+        # Group the tiles into packets
+        groups = [[]]
+        size = PACKET_HEADER.size
+        for tile in encoded:
+            if max_packet_size is not None and len(groups[-1]) > 0 and size + len(tile) > max_packet_size:
+                groups += [[]]
+                size = PACKET_HEADER.size
+            groups[-1] += [tile]
+            size += len(tile)
+
+        frame_height, frame_width = frame.shape[:2]
+        packets = []
+        for i, group in enumerate(groups):
+            header = PACKET_HEADER.pack(MAGIC, VERSION, flags, self.frame_num, frame_width, frame_height, i, len(groups), len(group))
+            packets += [header + b"".join(group)]
+
+        self.frame_num = (self.frame_num + 1) & 0xFFFFFFFF
+        self.previous = numpy.array(frame)
+        return packets
+
+class FrameDecoder(object):
+    """
+    Applies received packets to a framebuffer
+    """
+    def __init__(self, max_width, max_height):
+        """
+        Initialize the decoder for frames of up to max_width x max_height, with
+        no frame received yet
+        """
+        self.max_width = max_width
+        self.max_height = max_height
+        self.framebuffer = None
+
+    def decode(self, packet):
+        """
+        Apply a packet's tiles to the framebuffer. Returns True if it was the
+        last packet of a frame, so the frame can be shown.
+        """
+        magic, version, flags, frame_num, width, height, index, count, tile_count = PACKET_HEADER.unpack_from(packet)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("Not a frame packet")
+        if width > self.max_width or height > self.max_height:
+            raise Exception("Frame is larger than %dx%d" % (self.max_width, self.max_height))
+
+        if self.framebuffer is None or self.framebuffer.shape != (height, width, 3):
+            self.framebuffer = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+
+        offset = PACKET_HEADER.size
+        for i in range(tile_count):
+            x, y, tile_width, tile_height, encoding, length = TILE_HEADER.unpack_from(packet, offset)
+            offset += TILE_HEADER.size
+            if x + tile_width > width or y + tile_height > height:
+                raise Exception("Tile is outside of the frame")
+            if encoding == ENCODING_RLE:
+                pixels = decode_rle(packet, offset)
+            else:
+                pixels = numpy.frombuffer(packet, dtype=numpy.uint8, count=length, offset=offset)
+            self.framebuffer[y:y+tile_height, x:x+tile_width] = pixels.reshape(tile_height, tile_width, 3)
+            offset += length
+
+        return index == count - 1
@@ -0,0 +1,143 @@
+################################################################################
+# perf_stats.py
+#-------------------------------------------------------------------------------
+# Frame timing instrumentation, kept in fixed-size ring buffers
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+from collections import deque
+
+class PerfStats(object):
+    """
+    Records on_frame and draw durations per control, swap time, and frame
+    intervals, keeping only the most recent samples of each
+    """
+
+    def __init__(self, history_size=120):
+        """
+        Initialize empty ring buffers holding up to "history_size" samples each
+        """
+        self.history_size = history_size
+        self.frame_count = 0
+        self.last_frame_time = None
+        self.update_times = deque(maxlen=history_size)
+        self.swap_times = deque(maxlen=history_size)
+        self.frame_intervals = deque(maxlen=history_size)
+        self.control_times = {}
+
+    def _get_control_times(self, control_id):
+        """
+        Retrieve the on_frame and draw buffers for a control, creating them if needed
+        """
+        times = self.control_times.get(control_id)
+        if times is None:
+            times = {"on_frame": deque(maxlen=self.history_size), "draw": deque(maxlen=self.history_size)}
+            self.control_times[control_id] = times
+        return times
+
+    def record_on_frame(self, control_id, duration):
+        """
+        Record the time taken by a control's on_frame
+        """
+        self._get_control_times(control_id)["on_frame"].append(duration)
+
+    def record_draw(self, control_id, duration):
+        """
+        Record the time taken by a control's draw
+        """
+        self._get_control_times(control_id)["draw"].append(duration)
+
+    def record_update(self, duration):
+        """
+        Record the total time taken by an update
+        """
+        self.update_times.append(duration)
+
+    def record_swap(self, duration, now):
+        """
+        Record the time taken to swap a frame onto the display, at time "now"
+        """
+        self.swap_times.append(duration)
+        if self.last_frame_time is not None:
+            self.frame_intervals.append(now - self.last_frame_time)
+        self.last_frame_time = now
+        self.frame_count += 1
+
+    def remove_control(self, control_id):
+        """
+        Discard the samples for a deleted control
+        """
+        self.control_times.pop(control_id, None)
+
+    def reset(self):
+        """
+        Discard all samples
+        """
+        self.frame_count = 0
+        self.last_frame_time = None
+        self.update_times.clear()
+        self.swap_times.clear()
+        self.frame_intervals.clear()
+        self.control_times = {}
+
+    @staticmethod
+    def summarize(samples):
+        """
+        Summarize a buffer of durations in seconds as average, max and last in milliseconds
+        """
+        if len(samples) == 0:
+            return {"count": 0, "avg_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        return {
+            "count": len(samples),
+            "avg_ms": 1000.0 * sum(samples) / len(samples),
+            "max_ms": 1000.0 * max(samples),
+            "last_ms": 1000.0 * samples[-1],
+        }
+
+    def get_stats(self):
+        """
+        Retrieve a JSON-serializable summary of the recorded samples
+        """
+        fps = 0.0
+        intervals = list(self.frame_intervals)
+        if len(intervals) > 0 and sum(intervals) > 0:
+            fps = len(intervals) / sum(intervals)
+
+        controls = {}
+        for control_id, times in list(self.control_times.items()):
+            controls[control_id] = {
+                "on_frame": self.summarize(list(times["on_frame"])),
+                "draw": self.summarize(list(times["draw"])),
+            }
+
+        return {
+            "enabled": True,
+            "frame_count": self.frame_count,
+            "fps": fps,
+            "frame_interval": self.summarize(intervals),
+            "update": self.summarize(list(self.update_times)),
+            "swap": self.summarize(list(self.swap_times)),
+            "controls": controls,
+        }
@@ -0,0 +1,142 @@
+################################################################################
+# render_thread.py
+#-------------------------------------------------------------------------------
+# Render thread which swaps finished frames onto the LED matrix, so apps can
+# draw the next frame while the previous one waits for the panel.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import threading
+import collections
+
+import numpy
+
+from .canvas_utils import blit_array
+from .color_correction import color_correction
+
+class RenderThread(object):
+    """
+    Owns the matrix's canvas double buffer, uploading frames published by apps
+    and swapping them onto the matrix. Frames are full (height, width, 3) uint8
+    buffers taken from a pool, so publishing one never waits for a swap.
+
+    Frames are queued up to "queue_size". When the display falls behind, the
+    oldest queued frame is dropped rather than adding to the latency.
+    """
+    def __init__(self, matrix, queue_size=1, pool_size=None):
+        """
+        Initialize the render thread for a matrix
+        """
+        self.matrix = matrix
+        self.queue_size = max(1, queue_size)
+        self.pool_size = pool_size if pool_size is not None else self.queue_size + 2
+        self.shape = None
+        self.pool = []
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.frames_swapped = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        """
+        Start swapping published frames
+        """
+        canvas = self.matrix.CreateFrameCanvas()
+        self.shape = (canvas.height, canvas.width, 3)
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, args=(canvas,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the thread, discarding any frames not yet swapped
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def acquire(self):
+        """
+        Take a buffer to draw a frame into, from the pool if one is free
+        """
+        with self.condition:
+            if len(self.pool) > 0:
+                return self.pool.pop()
+        return numpy.empty(self.shape, dtype=numpy.uint8)
+
+    def release(self, pixels):
+        """
+        Return a buffer to the pool once it's no longer needed
+        """
+        with self.condition:
+            if len(self.pool) < self.pool_size:
+                self.pool.append(pixels)
+
+    def publish(self, pixels):
+        """
+        Queue a frame buffer from "acquire" to be shown. The buffer belongs to
+        the render thread from then on.
+        """
+        with self.condition:
+            if len(self.queue) >= self.queue_size:
+                self.frames_dropped += 1
+                dropped = self.queue.popleft()
+                if len(self.pool) < self.pool_size:
+                    self.pool.append(dropped)
+            self.queue.append(pixels)
+            self.condition.notify()
+
+    def get_stats(self):
+        """
+        Retrieve counts of frames swapped and dropped
+        """
+        return {
+            "frames_swapped": self.frames_swapped,
+            "frames_dropped": self.frames_dropped,
+            "queued": len(self.queue),
+        }
+
+    def _run(self, canvas):
+        """
+        Upload and swap queued frames until stopped
+        """
+        while True:
+            with self.condition:
+                while len(self.queue) == 0 and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    break
+                pixels = self.queue.popleft()
+
+            blit_array(canvas, color_correction.apply(pixels, pixels))
+            canvas = self.matrix.SwapOnVSync(canvas)
+            self.frames_swapped += 1
+            self.release(pixels)
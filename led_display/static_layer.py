@@ -0,0 +1,93 @@
+################################################################################
+# static_layer.py
+#-------------------------------------------------------------------------------
+# Cached background bitmap of the static controls drawn below the first
+# dynamic control of an app.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+from .displays.virtual_display import VirtualCanvas
+from .canvas_utils import copy_rect
+
+class StaticLayer(object):
+    """
+    Background bitmap of static controls, so each frame only the dynamic
+    controls on top of it need to be drawn
+    """
+    def __init__(self, width, height):
+        """
+        Initialize an empty layer for a canvas size
+        """
+        self.canvas = VirtualCanvas(width, height)
+        self.controls = []
+        self.valid = False
+
+    def get_static_controls(self, sorted_controls):
+        """
+        Retrieve the static controls below the first dynamic control, or an
+        empty list if there is no dynamic control to draw on top of the layer
+        """
+        for i, control in enumerate(sorted_controls):
+            if not control.static:
+                return sorted_controls[:i]
+        return []
+
+    def update(self, controls, compositor):
+        """
+        Render the layer from a list of static controls, if they have changed
+        since it was last rendered, blending them with the compositor as needed.
+        Returns whether the list of controls differs from the last render.
+        """
+        changed = controls != self.controls
+        if self.valid and not changed:
+            return False
+
+        self.canvas.Clear()
+        for control in controls:
+            compositor.draw(control, self.canvas)
+
+        self.controls = controls
+        self.valid = True
+        return changed
+
+    def control_changed(self, control):
+        """
+        Render the layer again on the next update if a control drawn to it has
+        changed, even if frames are drawn without the layer meanwhile
+        """
+        if self.valid and control in self.controls:
+            self.valid = False
+
+    def invalidate(self):
+        """
+        Render the layer again on the next update
+        """
+        self.valid = False
+
+    def blit(self, canvas, rect):
+        """
+        Copy an (x, y, width, height) rectangle of the layer onto a canvas
+        """
+        copy_rect(canvas, self.canvas, rect)
@@ -30,9 +30,27 @@
 
 import weakref
 import os
+import hashlib
+import threading
+
+import numpy
 from PIL import Image
-from rgbmatrix import graphics
+from . import graphics
 from .app_controls import Control
+from .thumbnail_cache import thumbnails, hash_file
+from .canvas_utils import blit_array
+
+# Number of frames in the animation, and the frame each layer's cycle starts at
+FRAME_COUNT = 16
+LAYER_OFFSETS = [0, 2, 4, 8]
+LAYER_FILENAMES = ["srt_loading_1.png", "srt_loading_2.png", "srt_loading_3.png", "srt_loading_4.png"]
+
+# Changing how frames are computed should change this, so cached frames aren't reused
+FRAMES_VERSION = 1
+
+# Frames computed by this process, keyed the same as the disk cache
+_frame_cache = {}
+_frame_cache_lock = threading.Lock()
 
 def compute_alpha(alpha_min, alpha_max, frame_num, frame_max):
     frame_num = min(frame_num, frame_max-frame_num)
@@ -51,6 +69,93 @@ def compute_alpha(alpha_min, alpha_max, frame_num, frame_max):
     )
     return alpha
 
+def div255(value):
+    """
+    Divide by 255 with rounding, as Pillow does when blending
+    """
+    value = value + 128
+    return (value + (value >> 8)) >> 8
+
+def compute_frames(layers):
+    """
+    Compute every frame of the load animation from the four RGBA layers, as a
+    (frames, height, width, 3) array. Each frame fades the layers in and out
+    over a black background, matching Pillow's composite and alpha_composite
+    pixel for pixel.
+    """
+    height, width = layers[0].shape[:2]
+    alphas = numpy.array([[compute_alpha(75, 205, (-frame_num+offset)%FRAME_COUNT, FRAME_COUNT) for offset in LAYER_OFFSETS]
+        for frame_num in range(FRAME_COUNT)], dtype=numpy.int64)
+
+    # Each layer is pasted using its own alpha as the mask. Color is the same
+    # in every frame; only the alpha left behind differs.
+    rgb = numpy.zeros((height, width, 3), dtype=numpy.int64)
+    alpha = numpy.full((FRAME_COUNT, height, width), 255, dtype=numpy.int64)
+    for i, layer in enumerate(layers):
+        layer = layer.astype(numpy.int64)
+        mask = layer[:, :, 3]
+        rgb = div255(layer[:, :, :3] * mask[:, :, None] + rgb * (255 - mask[:, :, None]))
+        alpha = div255(alphas[:, i, None, None] * mask + alpha * (255 - mask))
+
+    # Composited over opaque black, color is scaled by the remaining alpha
+    value = rgb[None, :, :, :] * (alpha[:, :, :, None] << 7) + (0x80 << 7)
+    frames = (((value >> 8) + value) >> 8) >> 7
+    return frames.astype(numpy.uint8)
+
+def load_layers(load_path, size):
+    """
+    Load the four animation layers, shrunk to fit within "size", as RGBA arrays
+    padded to "size"
+    """
+    layers = []
+    for filename in LAYER_FILENAMES:
+        image = Image.open(os.path.join(load_path, filename)).convert("RGBA")
+        image.thumbnail(size, Image.LANCZOS)
+        layer = numpy.zeros((size[1], size[0], 4), dtype=numpy.uint8)
+        layer[:image.height, :image.width] = numpy.asarray(image)
+        layers += [layer]
+    return layers
+
+def get_frames(load_path, size):
+    """
+    Retrieve the animation frames for a size, computing them only if they
+    aren't already cached in memory or on disk. Frames are keyed by the
+    content of the layer images and the size.
+    """
+    key_hash = hashlib.sha1(("%d %dx%d" % (FRAMES_VERSION, size[0], size[1])).encode())
+    for filename in LAYER_FILENAMES:
+        key_hash.update(hash_file(os.path.join(load_path, filename)).encode())
+    key = "synack_load_%s.npy" % key_hash.hexdigest()
+
+    with _frame_cache_lock:
+        frames = _frame_cache.get(key)
+    if frames is not None:
+        return frames
+
+    # Stored with the thumbnails, counting against their size cap
+    cache_path = thumbnails.get_path(key)
+    frames = None
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            frames = numpy.load(cache_path)
+        except Exception as err:
+            print("Exception loading cached frames from %s: %s" % (cache_path, err))
+
+    if frames is None or frames.shape != (FRAME_COUNT, size[1], size[0], 3):
+        frames = compute_frames(load_layers(load_path, size))
+        if cache_path is not None:
+            try:
+                temp_path = "%s.%d.tmp.npy" % (cache_path, threading.get_ident())
+                numpy.save(temp_path, frames)
+                os.replace(temp_path, cache_path)
+                thumbnails.add_file(key)
+            except Exception as err:
+                print("Exception caching frames to %s: %s" % (cache_path, err))
+
+    with _frame_cache_lock:
+        _frame_cache[key] = frames
+    return frames
+
 class SynackLoadAnimationControl(Control):
     """
     Control for displaying the Synack load animation
@@ -66,16 +171,7 @@ class SynackLoadAnimationControl(Control):
         self._frame_num = 0
         self._width = 0
         self._height = 0
-        self._frames = []
-        self._bkg = None
-        self._load_1 = None
-        self._load_2 = None
-        self._load_3 = None
-        self._load_4 = None
-        self._load_1_weighted = None
-        self._load_2_weighted = None
-        self._load_3_weighted = None
-        self._load_4_weighted = None
+        self._frames = None
 
     def set_path(self, path):
         """
@@ -95,7 +191,9 @@ class SynackLoadAnimationControl(Control):
         """
         Set x coordinate of image (top-left)
         """
-        self._x = x
+        if x != self._x:
+            self._x = x
+            self.invalidate()
 
     def get_x(self):
         """
@@ -107,7 +205,9 @@ class SynackLoadAnimationControl(Control):
         """
         Set y coordinate of image (top-left)
         """
-        self._y = y
+        if y != self._y:
+            self._y = y
+            self.invalidate()
 
     def get_y(self):
         """
@@ -144,68 +244,63 @@ class SynackLoadAnimationControl(Control):
         return self._height
 
     def _update(self):
-        load_path = self._path
-
-        if self._width > 0 and self._height > 0:
-            self._bkg = Image.new('RGB', (64,64))
-            self._bkg.putalpha(255)
-            self._load_1 = Image.open(os.path.join(load_path, "srt_loading_1.png"))
-            self._load_1.thumbnail((self._width, self._height), Image.ANTIALIAS)
-            self._load_2 = Image.open(os.path.join(load_path, "srt_loading_2.png"))
-            self._load_2.thumbnail((self._width, self._height), Image.ANTIALIAS)
-            self._load_3 = Image.open(os.path.join(load_path, "srt_loading_3.png"))
-            self._load_3.thumbnail((self._width, self._height), Image.ANTIALIAS)
-            self._load_4 = Image.open(os.path.join(load_path, "srt_loading_4.png"))
-            self._load_4.thumbnail((self._width, self._height), Image.ANTIALIAS)
-
-            self._load_1_weighted = self._load_1.copy()
-            self._load_2_weighted = self._load_2.copy()
-            self._load_3_weighted = self._load_3.copy()
-            self._load_4_weighted = self._load_4.copy()
-
-            self._frames = []
+        """
+        Load the animation frames based on current parameters
+        """
+        if self._path != "" and self._width > 0 and self._height > 0:
+            self._frames = get_frames(self._path, (self._width, self._height))
             self._frame_num = 0
+            self.invalidate()
 
-    def on_frame(self):
+    def __getstate__(self):
         """
-        Handles a new frame event, for the animation
+        Retrieve the control's state for pickling, without the animation frames
         """
-        self._frame_num = (self._frame_num+1)%16
+        state = super(SynackLoadAnimationControl, self).__getstate__()
+        state["_frames"] = None
+        return state
 
-    def draw(self, canvas):
+    def load_resources(self):
         """
-        Draw the control's graphical data on the canvas.
+        Load the animation frames again after unpickling, keeping the current frame
         """
-        if len(self._frames) > self._frame_num:
-            composite = self._frames[self._frame_num]
-        else:
-            alpha_min = 75
-            alpha_max = 205
+        if self._path != "" and self._width > 0 and self._height > 0:
+            self._frames = get_frames(self._path, (self._width, self._height))
 
-            load_1_alpha = compute_alpha(alpha_min, alpha_max, (-self._frame_num)%16, 16)
-            load_2_alpha = compute_alpha(alpha_min, alpha_max, (-self._frame_num+2)%16, 16)
-            load_3_alpha = compute_alpha(alpha_min, alpha_max, (-self._frame_num+4)%16, 16)
-            load_4_alpha = compute_alpha(alpha_min, alpha_max, (-self._frame_num+8)%16, 16)
+    def get_bounds(self):
+        """
+        Returns the (x, y, width, height) area the animation draws to
+        """
+        if self._frames is None:
+            return (0, 0, 0, 0)
+        return (self._x, self._y, self._width, self._height)
 
-            self._load_1_weighted.putalpha(load_1_alpha)
-            self._load_2_weighted.putalpha(load_2_alpha)
-            self._load_3_weighted.putalpha(load_3_alpha)
-            self._load_4_weighted.putalpha(load_4_alpha)
+    def get_static(self):
+        """
+        Returns whether the display contents is static
+        """
+        return False
 
-            composite = Image.composite(self._load_1_weighted, self._bkg, self._load_1)
-            composite = Image.composite(self._load_2_weighted, composite, self._load_2)
-            composite = Image.composite(self._load_3_weighted, composite, self._load_3)
-            composite = Image.composite(self._load_4_weighted, composite, self._load_4)
-            composite = Image.alpha_composite(self._bkg, composite)
-            composite = composite.convert("RGB")
+    def on_frame(self):
+        """
+        Handles a new frame event, for the animation
+        """
+        self._frame_num = (self._frame_num+1)%FRAME_COUNT
+        self.invalidate()
 
-            self._frames += [composite]
+    def draw(self, canvas):
+        """
+        Draw the control's graphical data on the canvas.
+        """
+        if self._frames is None:
+            return
 
-        canvas.SetImage(composite, offset_x=self._x, offset_y=self._y)
+        blit_array(canvas, self._frames[self._frame_num], self._x, self._y)
 
     path = property(get_path, set_path)
     x = property(get_x, set_x)
     y = property(get_y, set_y)
     width = property(get_width, set_width)
     height = property(get_height, set_height)
+    static = property(get_static)
 
@@ -0,0 +1,127 @@
+################################################################################
+# text_cache.py
+#-------------------------------------------------------------------------------
+# Cache of pre-rasterized text, shared by all text controls
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import threading
+import collections
+
+import numpy
+
+class TextRaster(object):
+    """
+    A line of text rasterized into a single boolean mask
+    """
+    def __init__(self, mask, left, top, width):
+        """
+        Initialize the raster. The mask is drawn "left" pixels right of the
+        text's x coordinate and "top" pixels above its baseline, and "width" is
+        the total advance width of the text.
+        """
+        self.mask = mask
+        self.left = left
+        self.top = top
+        self.width = width
+
+    def draw(self, canvas, x, y, color):
+        """
+        Draw the text with its baseline at (x, y) on a virtual canvas
+        """
+        canvas.draw_mask(self.mask, int(x) + self.left, int(y) - self.top, color.red, color.green, color.blue)
+
+def rasterize_text(font, text):
+    """
+    Rasterize a line of text in a font, the same way graphics.DrawText draws it
+    """
+    placements = []
+    pen = 0
+    for character in text:
+        glyph = font.find_glyph(ord(character))
+        if glyph is None:
+            continue
+        height, width = glyph.mask.shape
+        if height > 0 and width > 0:
+            placements += [(glyph.mask, pen + glyph.x_offset, height + glyph.y_offset)]
+        pen += glyph.device_width
+
+    if len(placements) == 0:
+        return TextRaster(numpy.zeros((0, 0), dtype=bool), 0, 0, pen)
+
+    left = min(x for mask, x, glyph_top in placements)
+    right = max(x + mask.shape[1] for mask, x, glyph_top in placements)
+    top = max(glyph_top for mask, x, glyph_top in placements)
+    bottom = min(glyph_top - mask.shape[0] for mask, x, glyph_top in placements)
+
+    raster = numpy.zeros((top - bottom, right - left), dtype=bool)
+    for mask, x, glyph_top in placements:
+        y = top - glyph_top
+        raster[y:y+mask.shape[0], x-left:x-left+mask.shape[1]] |= mask
+
+    return TextRaster(raster, left, top, pen)
+
+class TextRasterCache(object):
+    """
+    Least recently used cache of rasterized text, keyed by font and text. Color
+    is applied when drawing, so text shown in several colors shares one entry.
+    """
+    def __init__(self, max_entries=256):
+        """
+        Initialize an empty cache holding up to "max_entries" rasters
+        """
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, font, text):
+        """
+        Retrieve the raster for text in a font, rasterizing it if needed
+        """
+        key = (font, text)
+        with self.lock:
+            raster = self.entries.get(key)
+            if raster is not None:
+                self.entries.move_to_end(key)
+                return raster
+
+        raster = rasterize_text(font, text)
+
+        with self.lock:
+            self.entries[key] = raster
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return raster
+
+    def clear(self):
+        """
+        Remove all cached rasters
+        """
+        with self.lock:
+            self.entries.clear()
+
+# Shared by all text controls, so repeated text such as menu items and clock
+# digits is only rasterized once
+text_rasters = TextRasterCache()
@@ -0,0 +1,288 @@
+################################################################################
+# thumbnail_cache.py
+#-------------------------------------------------------------------------------
+# Persistent cache of images pre-scaled to display resolution, stored as raw RGB
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import json
+import time
+import atexit
+import struct
+import hashlib
+import threading
+
+from PIL import Image
+
+# Header of each cached thumbnail: magic, width, height
+HEADER = struct.Struct("<4sHH")
+MAGIC = b"LEDT"
+
+# Extensions of the files counted against the size cap: thumbnails, and
+# arrays stored by controls through "add_file"
+CACHED_EXTENSIONS = (".rgb", ".npy")
+
+# JPEGs are decoded at a reduced scale of at least this many times the
+# target size, leaving the rest of the shrinking to the resample filter
+DRAFT_GAP = 2
+
+def decode_image(path, size, resample=Image.BICUBIC, mode="RGB"):
+    """
+    Decode an image file, shrunk to fit within "size" (width, height) and
+    converted to "mode"
+    """
+    image = Image.open(path)
+
+    # Let the JPEG decoder scale down by up to 8x while decoding, rather than
+    # decoding every pixel of a large photo only to throw most of them away
+    if image.format == "JPEG":
+        image.draft(mode if mode in ("RGB", "L") else None, (size[0] * DRAFT_GAP, size[1] * DRAFT_GAP))
+
+    image.thumbnail(tuple(size), resample)
+    return image.convert(mode)
+
+def hash_file(path):
+    """
+    Hash the contents of a file
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ThumbnailCache(object):
+    """
+    Cache directory of images already shrunk to fit the display, stored as raw
+    RGB so showing one is only a file read and a copy, with no decoding.
+    Thumbnails are keyed by the source file's content hash and target size.
+    Hashes are remembered by path, and recomputed when the source file's
+    modification time or size changes. The least recently used files are
+    removed once the directory exceeds its size cap.
+    """
+
+    # Seconds between saves of the hash index while new files are being hashed
+    index_save_interval = 5.0
+
+    def __init__(self, directory=None, max_bytes=64*1024*1024):
+        """
+        Initialize the cache in a directory, or disabled if None
+        """
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.configure(directory, max_bytes)
+
+    def configure(self, directory, max_bytes):
+        """
+        Change the cache directory (None to disable) and its size cap. The
+        directory is scanned when the cache is first used.
+        """
+        self.flush()
+        with self.lock:
+            self.directory = directory
+            self.max_bytes = max_bytes
+            self.loaded = False
+            self.hashes = {}
+            self.index_changed = False
+            self.index_save_time = time.monotonic()
+            self.files = {}
+            self.total_bytes = 0
+
+    def _load(self):
+        """
+        Create the cache directory if needed, and load its index and file sizes
+        """
+        with self.lock:
+            if self.loaded or self.directory is None:
+                return
+            self.loaded = True
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self.hashes = self._load_index()
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(CACHED_EXTENSIONS) and not entry.name.endswith(".tmp.npy"):
+                        stat = entry.stat()
+                        self.files[entry.name] = [stat.st_size, stat.st_mtime]
+                        self.total_bytes += stat.st_size
+            except Exception as err:
+                print("Disabling thumbnail cache in %s: %s" % (self.directory, err))
+                self.directory = None
+
+    def _index_path(self):
+        """
+        Path of the file remembering content hashes
+        """
+        return os.path.join(self.directory, "index.json")
+
+    def _load_index(self):
+        """
+        Load the remembered content hashes, by source path
+        """
+        try:
+            with open(self._index_path()) as f:
+                return json.loads(f.read())
+        except (IOError, ValueError):
+            return {}
+
+    def flush(self):
+        """
+        Save the remembered content hashes if they changed, replacing the index
+        atomically. Hashes of files whose thumbnails have all been removed are
+        forgotten.
+        """
+        with self.lock:
+            if not self.loaded or not self.index_changed or self.directory is None:
+                return
+            cached_hashes = set(name.split("_")[0] for name in self.files)
+            self.hashes = dict((path, entry) for path, entry in self.hashes.items() if entry["hash"] in cached_hashes)
+            self.index_changed = False
+            self.index_save_time = time.monotonic()
+
+            try:
+                temp_path = self._index_path() + ".tmp"
+                with open(temp_path, "w") as f:
+                    f.write(json.dumps(self.hashes))
+                os.replace(temp_path, self._index_path())
+            except Exception as err:
+                print("Exception saving thumbnail index in %s: %s" % (self.directory, err))
+
+    def _content_hash(self, path):
+        """
+        Retrieve the content hash of a source file, hashing it again if it changed
+        """
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.hashes.get(path)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["hash"]
+
+        content_hash = hash_file(path)
+        with self.lock:
+            self.hashes[path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": content_hash}
+            self.index_changed = True
+        return content_hash
+
+    def _read(self, name):
+        """
+        Read a cached thumbnail into an RGB image, or return None if missing
+        """
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                data = f.read()
+        except IOError:
+            return None
+
+        if len(data) < HEADER.size:
+            return None
+        magic, width, height = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + width * height * 3:
+            return None
+
+        self._touch(name)
+        return Image.frombytes("RGB", (width, height), data[HEADER.size:])
+
+    def _touch(self, name):
+        """
+        Mark a cached file as recently used, so it isn't the next to be removed
+        """
+        now = time.time()
+        with self.lock:
+            if name in self.files:
+                self.files[name][1] = now
+
+    def _write(self, name, image):
+        """
+        Store a thumbnail, removing the least recently used ones beyond the size cap
+        """
+        path = os.path.join(self.directory, name)
+        temp_path = "%s.%d.tmp" % (path, threading.get_ident())
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, image.width, image.height))
+            f.write(image.tobytes())
+        os.replace(temp_path, path)
+        self.add_file(name)
+
+    def get_path(self, name):
+        """
+        Retrieve the path of a file stored in the cache directory by name, marking
+        it as recently used, or None if the cache is disabled. Files written there
+        should be added with "add_file", to count against the size cap.
+        """
+        self._load()
+        if self.directory is None:
+            return None
+        self._touch(name)
+        return os.path.join(self.directory, name)
+
+    def add_file(self, name):
+        """
+        Count a file written to the cache directory against the size cap,
+        removing the least recently used files beyond it
+        """
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            size = os.path.getsize(path)
+            if name in self.files:
+                self.total_bytes -= self.files[name][0]
+            self.files[name] = [size, time.time()]
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                oldest = min(self.files, key=lambda key: self.files[key][1])
+                self.total_bytes -= self.files.pop(oldest)[0]
+                try:
+                    os.remove(os.path.join(self.directory, oldest))
+                except OSError:
+                    pass
+
+    def get(self, path, size, resample=Image.BICUBIC):
+        """
+        Retrieve an image file shrunk to fit within "size" (width, height) as RGB,
+        decoding and storing it only if it isn't already cached
+        """
+        self._load()
+        if self.directory is None:
+            return decode_image(path, size, resample)
+
+        path = os.path.abspath(path)
+        name = "%s_%dx%d_%d.rgb" % (self._content_hash(path), size[0], size[1], resample)
+
+        image = self._read(name)
+        if image is None:
+            image = decode_image(path, size, resample)
+            try:
+                self._write(name, image)
+            except Exception as err:
+                print("Exception writing thumbnail for %s: %s" % (path, err))
+
+        # Saved now and then rather than per file, as the index grows with the folder
+        if self.index_changed and time.monotonic() - self.index_save_time >= self.index_save_interval:
+            self.flush()
+        return image
+
+# Shared by all apps, in the user's cache directory unless configured otherwise
+thumbnails = ThumbnailCache(os.path.join(os.path.expanduser("~"), ".cache", "led-display", "thumbnails"))
+atexit.register(thumbnails.flush)
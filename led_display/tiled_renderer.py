@@ -0,0 +1,266 @@
+################################################################################
+# tiled_renderer.py
+#-------------------------------------------------------------------------------
+# Renderer which draws controls a tile at a time in worker processes, into a
+# framebuffer in shared memory, for large chained displays.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import pickle
+import weakref
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy
+
+from .displays.virtual_display import VirtualCanvas
+from .damage_tracker import intersects
+from .compositor import Compositor
+
+class TileCanvas(VirtualCanvas):
+    """
+    Virtual canvas over a shared framebuffer, where drawing is limited to the
+    tile being rendered, so workers never draw over each other's tiles
+    """
+    def __init__(self, framebuffer):
+        """
+        Initialize the canvas over a (height, width, 3) uint8 framebuffer
+        """
+        self.height, self.width = framebuffer.shape[:2]
+        self.brightness = 100
+        self.framebuffer = framebuffer
+        self.tile = (0, 0, self.width, self.height)
+
+    def set_tile(self, rect):
+        """
+        Limit drawing to an (x, y, width, height) tile
+        """
+        x, y, width, height = rect
+        self.tile = (x, y, x + width, y + height)
+
+    def SetPixel(self, x, y, red, green, blue):
+        """
+        Set a single pixel, ignoring pixels outside of the tile
+        """
+        x = int(x)
+        y = int(y)
+        tile_x0, tile_y0, tile_x1, tile_y1 = self.tile
+        if tile_x0 <= x < tile_x1 and tile_y0 <= y < tile_y1:
+            self.framebuffer[y, x] = (red, green, blue)
+
+    def Fill(self, red, green, blue):
+        """
+        Fill the tile with a color
+        """
+        x0, y0, x1, y1 = self.tile
+        self.framebuffer[y0:y1, x0:x1] = (red, green, blue)
+
+    def Clear(self):
+        """
+        Clear the tile to black
+        """
+        x0, y0, x1, y1 = self.tile
+        self.framebuffer[y0:y1, x0:x1] = 0
+
+    def clip(self, x, y, width, height):
+        """
+        Clip a rectangle to the tile, returning (x0, y0, x1, y1), or None if
+        nothing is visible
+        """
+        tile_x0, tile_y0, tile_x1, tile_y1 = self.tile
+        x0 = max(int(x), tile_x0)
+        y0 = max(int(y), tile_y0)
+        x1 = min(int(x) + width, tile_x1)
+        y1 = min(int(y) + height, tile_y1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1, y1)
+
+def run_worker(config, shared_name, shape, connection):
+    """
+    Worker process main loop: receive the controls for each frame, with any
+    changed controls pickled, and draw the tiles requested
+    """
+    from .app_base import AppBase
+
+    shared = shared_memory.SharedMemory(name=shared_name)
+    canvas = TileCanvas(numpy.ndarray(shape, dtype=numpy.uint8, buffer=shared.buf))
+
+    # Controls look up fonts and the display size through their app
+    app = AppBase(config, {}, {})
+    app.offscreen_canvas = VirtualCanvas(shape[1], shape[0])
+    compositor = Compositor(shape[1], shape[0])
+    controls = {}
+
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+
+            frame_controls, tiles = message
+            current = {}
+            drawn = []
+            for key, payload, bounds in frame_controls:
+                control = controls.get(key)
+                if payload is not None:
+                    control = pickle.loads(payload)
+                    control.app_base = weakref.ref(app)
+                    control.load_resources()
+                current[key] = control
+                if bounds is not None:
+                    drawn += [(control, bounds)]
+            controls = current
+            app.dirty_controls.clear()
+
+            for tile in tiles:
+                canvas.set_tile(tile)
+                canvas.Clear()
+                for control, bounds in drawn:
+                    if intersects(bounds, tile):
+                        compositor.draw(control, canvas)
+
+            connection.send(True)
+    finally:
+        # The framebuffer view must go before the shared memory can be closed
+        canvas = None
+        shared.close()
+
+class TiledRenderer(object):
+    """
+    Draws frames with a pool of worker processes, each rendering a fixed set of
+    tiles into a framebuffer in shared memory. Only tiles overlapping the
+    damaged regions are drawn. Controls are pickled to the workers when they
+    change, without the resources they can load again, such as fonts, images
+    and animation frames.
+    """
+    def __init__(self, config, width, height, workers=2, tile_size=64):
+        """
+        Initialize the renderer for a display size
+        """
+        self.config = config
+        self.width = width
+        self.height = height
+        self.worker_count = max(1, workers)
+        self.tiles = [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+            for y in range(0, height, tile_size) for x in range(0, width, tile_size)]
+        self.shared = None
+        self.canvas = None
+        self.processes = []
+        self.connections = []
+        self.keys = weakref.WeakKeyDictionary()
+        self.stale = weakref.WeakSet()
+        self.unpicklable = weakref.WeakSet()
+        self.worker_keys = set()
+        self.next_key = itertools.count()
+
+    def start(self):
+        """
+        Create the shared framebuffer and start the worker processes
+        """
+        shape = (self.height, self.width, 3)
+        self.shared = shared_memory.SharedMemory(create=True, size=self.width * self.height * 3)
+        framebuffer = numpy.ndarray(shape, dtype=numpy.uint8, buffer=self.shared.buf)
+        framebuffer.fill(0)
+        self.canvas = VirtualCanvas(self.width, self.height)
+        self.canvas.framebuffer = framebuffer
+
+        # Spawned, as forking a process with other threads running isn't safe
+        context = multiprocessing.get_context("spawn")
+        for i in range(self.worker_count):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=run_worker, args=(self.config, self.shared.name, shape, child_connection))
+            process.daemon = True
+            process.start()
+            self.processes += [process]
+            self.connections += [parent_connection]
+
+    def stop(self):
+        """
+        Stop the workers and free the shared framebuffer
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (OSError, EOFError):
+                pass
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.connections = []
+        self.keys = weakref.WeakKeyDictionary()
+        self.worker_keys = set()
+
+        if self.shared is not None:
+            self.canvas = None
+            self.shared.close()
+            self.shared.unlink()
+            self.shared = None
+
+    def render(self, control_bounds, dirty_controls, rects):
+        """
+        Redraw the tiles overlapping a list of (x, y, width, height) rects, given
+        (control, clipped bounds) for every visible control in drawing order and
+        the controls changed since the last frame. Returns False if a control
+        can't be pickled, in which case nothing was drawn.
+        """
+        self.stale.update(dirty_controls)
+
+        tiles = [tile for tile in self.tiles if any(intersects(tile, rect) for rect in rects)]
+        if len(tiles) == 0:
+            return True
+
+        frame_controls = []
+        sent = []
+        for control, bounds in control_bounds:
+            if control in self.unpicklable:
+                return False
+            key = self.keys.get(control)
+            if key is None:
+                key = next(self.next_key)
+                self.keys[control] = key
+
+            # Workers only keep the controls of the last frame they drew
+            payload = None
+            if key not in self.worker_keys or control in self.stale:
+                try:
+                    payload = pickle.dumps(control, pickle.HIGHEST_PROTOCOL)
+                except Exception as err:
+                    print("Drawing without tiles, as control %s can't be pickled: %s" % (control.control_id, err))
+                    self.unpicklable.add(control)
+                    return False
+                sent += [control]
+            frame_controls += [(key, payload, bounds)]
+
+        for i, connection in enumerate(self.connections):
+            connection.send((frame_controls, tiles[i::self.worker_count]))
+        for connection in self.connections:
+            connection.recv()
+
+        self.worker_keys = set(key for key, payload, bounds in frame_controls)
+        for control in sent:
+            self.stale.discard(control)
+        return True
@@ -0,0 +1,125 @@
+################################################################################
+# transitions.py
+#-------------------------------------------------------------------------------
+# Transitions played between the last frame of a screen and the first frame
+# of the next one.
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import time
+import numpy
+
+from .frame_scheduler import FramePacer
+
+def crossfade(outgoing, incoming, progress, direction, out):
+    """
+    Fade from the outgoing frame to the incoming frame
+    """
+    weight = int(round(progress * 256))
+    blended = outgoing.astype(numpy.uint16) * (256 - weight)
+    blended += incoming.astype(numpy.uint16) * weight
+    numpy.right_shift(blended, 8, out=blended)
+    out[:] = blended
+
+def slide(outgoing, incoming, progress, direction, out):
+    """
+    Slide the incoming frame in from the side, pushing the outgoing frame out
+    """
+    width = out.shape[1]
+    offset = int(round(progress * width))
+    if direction >= 0:
+        out[:, :width-offset] = outgoing[:, offset:]
+        out[:, width-offset:] = incoming[:, :offset]
+    else:
+        out[:, offset:] = outgoing[:, :width-offset]
+        out[:, :offset] = incoming[:, width-offset:]
+
+def wipe(outgoing, incoming, progress, direction, out):
+    """
+    Uncover the incoming frame with an edge moving across the outgoing frame
+    """
+    width = out.shape[1]
+    offset = int(round(progress * width))
+    if direction >= 0:
+        out[:, :width-offset] = outgoing[:, :width-offset]
+        out[:, width-offset:] = incoming[:, width-offset:]
+    else:
+        out[:, offset:] = outgoing[:, offset:]
+        out[:, :offset] = incoming[:, :offset]
+
+transition_types = {
+    "crossfade": crossfade,
+    "slide": slide,
+    "wipe": wipe,
+}
+
+class Transition(object):
+    """
+    Plays a transition from the outgoing screen's last frame to the incoming
+    screen's first frame. The transition must finish by a deadline, so it is
+    shortened (or skipped) when the incoming screen was slow to start.
+    """
+
+    # Shortest transition worth playing, in frames
+    min_frames = 3
+
+    def __init__(self, outgoing, transition_type, duration, direction, deadline, frame_rate):
+        """
+        Initialize a transition from an outgoing (height, width, 3) frame. A
+        positive direction means moving to the next screen, negative the previous
+        one. The deadline is a time.monotonic() value.
+        """
+        self.outgoing = outgoing
+        self.render = transition_types[transition_type]
+        self.duration = duration
+        self.direction = direction
+        self.deadline = deadline
+        self.frame_rate = frame_rate
+
+    def play(self, present_frame, incoming, stop_event):
+        """
+        Show the transition with "present_frame", which displays a complete
+        frame, ending on the incoming frame. Returns False if there was no time
+        left to play the transition.
+        """
+        start = time.monotonic()
+        duration = min(self.duration, self.deadline - start)
+        frame_interval = 1.0 / self.frame_rate
+        if incoming is None or incoming.shape != self.outgoing.shape or duration < self.min_frames * frame_interval:
+            return False
+
+        out = numpy.empty_like(incoming)
+        pacer = FramePacer(stop_event)
+        progress = 0.0
+        while progress < 1.0:
+            progress = min((time.monotonic() - start) / duration, 1.0)
+            if stop_event.is_set():
+                progress = 1.0
+            self.render(self.outgoing, incoming, progress, self.direction, out)
+            present_frame(out)
+            if progress < 1.0:
+                pacer.wait(frame_interval)
+
+        return True
@@ -0,0 +1,92 @@
+################################################################################
+# test_static_layer.py
+#-------------------------------------------------------------------------------
+# Regression tests for the cached static layer, comparing incrementally
+# drawn frames against a full redraw
+# 
+# By Malcolm Stagg
+#
+# Copyright (c) 2021 SODIUM-24, LLC
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+
+import os
+import unittest
+
+from led_display.app_base import AppBase
+from led_display.displays.virtual_display import VirtualCanvas
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+CONFIG = {
+    "display": {"backend": "virtual", "virtualWidth": 64, "virtualHeight": 64},
+    "settings": {"title": "test", "webInterfaceEnable": False, "displayOffAfterBoot": False, "loadScreenApp": ""},
+    "fonts": {"paths": [FONTS_DIR]},
+}
+
+class StaticLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.app = AppBase(CONFIG, {}, {})
+        self.app.setup_display()
+
+    def draw_frames(self, count):
+        """
+        Update and draw a number of frames, returning the number of pixels each
+        differs from a full redraw by
+        """
+        differences = []
+        for i in range(count):
+            self.app.update()
+            self.app.draw()
+            canvas = VirtualCanvas(64, 64)
+            for control in self.app.controls.enabled_controls:
+                control.draw(canvas)
+            differences += [int((canvas.framebuffer != self.app.matrix.framebuffer).any(axis=2).sum())]
+        return differences
+
+    def test_static_control_changed_while_layer_unused(self):
+        rect = self.app.create_control("rect", "rect")
+        rect.has_fill = True
+        rect.fill_color = [255, 0, 0]
+        rect.x = 0
+        rect.y = 10
+        rect.width = 20
+        rect.height = 20
+
+        text = self.app.create_control("text", "text")
+        text.font = "6x9"
+        text.text = "a line of text too long to fit, so it scrolls"
+        text.scroll = "auto"
+        text.y = 20
+        text.z_index = 1
+        self.assertEqual(self.draw_frames(3), [0, 0, 0])
+
+        # Without a dynamic control, frames are drawn without the static layer
+        text.enabled = False
+        self.assertEqual(self.draw_frames(2), [0, 0])
+        rect.x = 30
+        self.assertEqual(self.draw_frames(2), [0, 0])
+
+        text.enabled = True
+        self.assertEqual(self.draw_frames(6), [0] * 6)
+
+if __name__ == "__main__":
+    unittest.main()